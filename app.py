@@ -1,12 +1,87 @@
-from flask import Flask, jsonify, render_template
-import mysql.connector
-from utils.db_connection import get_db_config
+from flask import Flask, Response, jsonify, render_template, request
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+from utils.db_pool import get_connection, get_pool_stats
+from utils.api_payloads import compute_etag, get_datamart_version, query_payload, read_payload
+from utils.response_cache import ResponseCache, response_cache_settings
+from utils.daily_revenue_query import BUCKETS, parse_filters, query_page, iter_ndjson
+from utils.request_metrics import RequestMetrics, TimingMiddleware
 import os
+import json
+import logging
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TEMPLATE_DIR = os.path.join(BASE_DIR, "templates")
 
 app = Flask(__name__, template_folder=TEMPLATE_DIR)
+logger = logging.getLogger("dashboard")
+
+def _datamart_version():
+    # dm_version / dm_api_payload / bảng rollup và index được tạo bởi sql/db_datamart.sql (DB đã có dữ liệu:
+    # sql/migrate_datamart_api.sql) và bước load datamart của ETL: web process chỉ đọc (user dashboard không cần quyền DDL)
+    with get_connection("datamart") as conn:
+        return get_datamart_version(conn)
+
+def _load_payload(key, version):
+    # Ưu tiên JSON do bước load datamart dựng sẵn, chưa có (hoặc cũ hơn version) thì truy vấn trực tiếp
+    with get_connection("datamart") as conn:
+        stored = read_payload(conn, key)
+        if stored and stored[0] == version:
+            return stored[2], stored[1], stored[3]
+        body = query_payload(conn, key)
+    return body, compute_etag(body), None
+
+# Data chỉ đổi sau mỗi lần chạy ETL -> cache trong bộ nhớ, bỏ khi datamart version tăng
+response_cache = ResponseCache(_datamart_version, **response_cache_settings())
+
+def cached_json(key, loader=None):
+    """
+    Response JSON từ cache kèm ETag: client gửi If-None-Match khớp thì trả 304,
+    client nhận gzip thì trả body đã nén sẵn
+    """
+    entry = response_cache.get(key, loader or _load_payload)
+    if request.if_none_match.contains(entry.etag):
+        resp = Response(status=304)
+    else:
+        use_gzip = entry.gzip_body is not None and "gzip" in request.accept_encodings
+        resp = Response(entry.gzip_body if use_gzip else entry.body, mimetype="application/json")
+        if use_gzip:
+            resp.headers["Content-Encoding"] = "gzip"
+    resp.set_etag(entry.etag)
+    resp.headers["Vary"] = "Accept-Encoding"
+    # Trình duyệt luôn hỏi lại (If-None-Match) nên thấy ngay dữ liệu của lần ETL mới
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+def _filtered_key(filters):
+    # Key theo filters đã chuẩn hóa: thứ tự tham số / tham số lạ không tạo entry mới
+    return "dm_daily_revenue?" + json.dumps(filters, default=str, sort_keys=True)
+
+def _filtered_loader(filters):
+    def load(key, version):
+        with get_connection("datamart") as conn:
+            body = query_page(conn, filters)
+        return body, compute_etag(body), None
+    return load
+
+def warm_up():
+    """
+    Dựng sẵn cache của các response dashboard mở đầu tiên (toàn bộ bảng, top, tuần/tháng)
+    trước khi server nhận request. DB chưa sẵn sàng thì chỉ ghi log: server vẫn chạy,
+    cache được dựng ở request đầu. Trả về số key đã dựng
+    """
+    warmed = 0
+    try:
+        for key in ("dm_daily_revenue", "dm_top_movies"):
+            response_cache.get(key, _load_payload)
+            warmed += 1
+        for bucket in BUCKETS[1:]:
+            filters = parse_filters(MultiDict({"bucket": bucket}))
+            response_cache.get(_filtered_key(filters), _filtered_loader(filters))
+            warmed += 1
+    except Exception as e:
+        logger.warning(f"Cache warm-up stopped after {warmed} responses: {e}")
+    return warmed
 
 @app.route("/")
 def index():
@@ -14,63 +89,66 @@ def index():
 
 @app.route("/api/dm_daily_revenue")
 def api_daily_revenue():
-    cfg = get_db_config("datamart")
-    conn = mysql.connector.connect(**cfg)
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT movie_name, full_date, revenue_vnd, tickets_sold, showtimes
-        FROM dm_daily_revenue
-        ORDER BY full_date ASC
-    """)
-
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-
-    return jsonify([
-        {
-            "movie": r[0],
-            "date": str(r[1]),
-            "revenue": int(r[2]),
-            "tickets": int(r[3]),
-            "showtimes": int(r[4])
-        }
-        for r in rows
-    ])
+    """
+    Không tham số: toàn bộ bảng (payload dựng sẵn). Tham số: from, to (YYYY-MM-DD), movie (lặp lại được),
+    bucket=day|week|month (đọc bảng rollup tuần/tháng), limit + cursor (phân trang, trả về {"data", "next_cursor"})
+    """
+    if not request.args:
+        return cached_json("dm_daily_revenue")
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return cached_json(_filtered_key(filters), _filtered_loader(filters))
+
+@app.route("/api/dm_daily_revenue.ndjson")
+def api_daily_revenue_ndjson():
+    """
+    Cùng tham số như /api/dm_daily_revenue, trả về NDJSON stream: đọc DB theo từng lô và ghi ra ngay,
+    không dựng toàn bộ kết quả trong bộ nhớ (không cache)
+    """
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def generate():
+        # Kết nối được giữ tới khi stream xong (hoặc client ngắt) rồi mới trả về pool
+        with get_connection("datamart") as conn:
+            yield from iter_ndjson(conn, filters)
+
+    return Response(generate(), mimetype="application/x-ndjson")
 
 @app.route("/api/dm_top_movies")
 def api_top_movies():
-    cfg = get_db_config("datamart")
-    conn = mysql.connector.connect(**cfg)
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT 
-            movie_name,
-            MAX(total_revenue) AS revenue,
-            MAX(total_tickets) AS tickets,
-            MAX(total_showtimes) AS showtimes,
-            MIN(ranking) AS rank
-        FROM dm_top_movies
-        GROUP BY movie_name
-        ORDER BY rank ASC;
-    """)
-
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-
-    return jsonify([
-        {
-            "movie": r[0],
-            "revenue": int(r[1]),
-            "tickets": int(r[2]),
-            "showtimes": int(r[3]),
-            "rank": int(r[4])
-        }
-        for r in rows
-    ])
+    return cached_json("dm_top_movies")
+
+@app.route("/metrics")
+def metrics():
+    """
+    Histogram độ trễ theo endpoint + trạng thái pool kết nối và cache response (text format Prometheus)
+    """
+    gauges = {}
+    for db_key, stats in get_pool_stats().items():
+        for name in ("open", "idle", "size", "waits"):
+            gauges.setdefault(f"db_pool_{name}", []).append(({"db": db_key}, stats[name]))
+    for name, value in response_cache.get_stats().items():
+        if value is not None:
+            gauges[f"response_cache_{name}"] = [({}, value)]
+    return Response(request_metrics.render(gauges), mimetype="text/plain; version=0.0.4")
+
+def _endpoint_label(environ):
+    # Tên route Flask (không dùng path thô), URL không khớp route nào gom vào "not_found"
+    try:
+        endpoint, _ = app.url_map.bind_to_environ(environ).match()
+        return endpoint
+    except HTTPException:
+        return "not_found"
+
+# Đo cả thời gian ghi body (response stream NDJSON), không chỉ thời gian chạy view
+request_metrics = RequestMetrics()
+app.wsgi_app = TimingMiddleware(app.wsgi_app, request_metrics, _endpoint_label)
 
 
 if __name__ == "__main__":
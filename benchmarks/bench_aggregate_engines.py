@@ -0,0 +1,68 @@
+# benchmarks/bench_aggregate_engines.py
+# So sánh 2 engine tổng hợp datamart (pandas / sql) trên data warehouse đang cấu hình:
+# số byte server gửi về, bộ nhớ Python đỉnh và thời gian chạy (full rebuild, không ghi CSV)
+# Chạy: python benchmarks/bench_aggregate_engines.py --repeat 3
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils.db_pool import get_connection
+from etl.aggregate_data import get_max_revenue_id, pandas_daily, sql_daily, sql_top, aggregate_top
+
+def session_bytes_sent():
+    # Pool trả lại kết nối theo LIFO nên khi chạy đơn luồng đây là cùng session với engine
+    with get_connection("warehouse") as conn:
+        cur = conn.cursor()
+        cur.execute("SHOW SESSION STATUS LIKE 'Bytes_sent'")
+        value = int(cur.fetchone()[1])
+        cur.close()
+    return value
+
+def run_pandas(max_id):
+    daily = pandas_daily(None, max_id)
+    return daily, aggregate_top(daily)
+
+def run_sql(max_id):
+    return sql_daily(None, max_id), sql_top(max_id)
+
+def measure(fn, max_id):
+    before = session_bytes_sent()
+    tracemalloc.start()
+    start = time.perf_counter()
+    daily, top = fn(max_id)
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    transferred = session_bytes_sent() - before
+    return {
+        "wall_s": round(wall, 4),
+        "peak_mem_mb": round(peak / 1024 / 1024, 2),
+        "bytes_transferred": transferred,
+        "daily_rows": len(daily),
+        "top_rows": len(top),
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    max_id = get_max_revenue_id()
+    if max_id is None:
+        raise SystemExit("fact_revenue is empty")
+
+    results = {}
+    for name, fn in (("pandas", run_pandas), ("sql", run_sql)):
+        runs = [measure(fn, max_id) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["wall_s"])
+        results[name] = best
+    print(json.dumps({"max_revenue_id": max_id, "engines": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/bench_api_cache.py
+# Độ trễ API dashboard (Flask test client) trên datamart SQLite (benchmarks/sqlite_standin.py):
+#   legacy    : truy vấn + dựng JSON mỗi request (cách cũ)
+#   cold      : request đầu sau khi load datamart (đọc payload dựng sẵn 1 lần)
+#   warm      : cache trong bộ nhớ
+#   warm_gzip : cache, body gzip dựng sẵn
+#   not_mod   : If-None-Match khớp -> 304
+# Kiểm tra nội dung giống cách cũ, và load datamart lần nữa làm cache bị thay (version tăng).
+# Chạy: python benchmarks/bench_api_cache.py --movies 200 --days 365 --requests 200
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from datetime import date, timedelta
+
+import pandas as pd
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlite_standin import sqlite_databases
+from utils.db_pool import get_connection
+from utils.log_to_db import flush_db_logs
+from utils.api_payloads import query_payload
+
+ENDPOINTS = {"dm_daily_revenue": "/api/dm_daily_revenue", "dm_top_movies": "/api/dm_top_movies"}
+
+
+def make_aggregates(movies, days, seed=0):
+    start = date(2025, 1, 1)
+    daily = pd.DataFrame([
+        {"movie_name": f"Phim {m:04d}", "full_date": start + timedelta(days=d),
+         "revenue_vnd": (m * 7919 + d * 104729 + seed) % 5_000_000_000,
+         "tickets_sold": (m * 31 + d * 17 + seed) % 90_000, "showtimes": (m + d + seed) % 5_000}
+        for m in range(movies) for d in range(days)])
+    top = (daily.groupby("movie_name", as_index=False)[["revenue_vnd", "tickets_sold", "showtimes"]].sum()
+           .sort_values("revenue_vnd", ascending=False))
+    top["ranking"] = range(1, len(top) + 1)
+    return daily, top
+
+
+def percentiles(times):
+    times = sorted(times)
+    return {"p50_ms": round(statistics.median(times) * 1000, 3),
+            "p99_ms": round(times[min(len(times) - 1, int(len(times) * 0.99))] * 1000, 3)}
+
+
+def timed_requests(fn, n):
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return percentiles(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movies", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with sqlite_databases():
+        # Import trong khối with: load_datamart đọc etl_config khi import
+        from etl.load_datamart import load_to_datamart
+        import app as dashboard
+
+        daily, top = make_aggregates(args.movies, args.days)
+        load_to_datamart(daily, top)
+        client = dashboard.app.test_client()
+
+        def legacy(key):
+            # Cách cũ: mỗi request 1 truy vấn + dựng JSON từng dòng
+            with get_connection("datamart") as conn:
+                return query_payload(conn, key)
+
+        report = {"rows": len(daily)}
+        for key, url in ENDPOINTS.items():
+            expected = json.loads(legacy(key))
+            res = {"legacy": timed_requests(lambda: legacy(key), args.requests)}
+
+            def cold():
+                dashboard.response_cache.clear()
+                resp = client.get(url)
+                assert resp.status_code == 200
+            res["cold"] = timed_requests(cold, max(args.requests // 10, 5))
+
+            resp = client.get(url)
+            assert resp.get_json() == expected
+            etag = resp.headers["ETag"]
+            res["warm"] = timed_requests(lambda: client.get(url), args.requests)
+            gz = client.get(url, headers={"Accept-Encoding": "gzip"})
+            res["warm_gzip"] = timed_requests(lambda: client.get(url, headers={"Accept-Encoding": "gzip"}),
+                                              args.requests)
+            res["not_mod"] = timed_requests(lambda: client.get(url, headers={"If-None-Match": etag}),
+                                            args.requests)
+            assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+            res["bytes"] = len(resp.data)
+            res["gzip_bytes"] = len(gz.data) if gz.headers.get("Content-Encoding") == "gzip" else None
+            report[key] = res
+
+        # Load lại với dữ liệu khác -> version tăng, request sau (hết version_check_interval) thấy
+        # dữ liệu mới, ETag đổi
+        dashboard.response_cache.version_check_interval = 0
+        old_etag = client.get(ENDPOINTS["dm_daily_revenue"]).headers["ETag"]
+        load_to_datamart(*make_aggregates(args.movies, args.days, seed=1))
+        resp = client.get(ENDPOINTS["dm_daily_revenue"], headers={"If-None-Match": old_etag})
+        assert resp.status_code == 200 and resp.get_json() == json.loads(legacy("dm_daily_revenue"))
+        report["cache"] = dashboard.response_cache.get_stats()
+        flush_db_logs()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# benchmarks/bench_api_queries.py
+# /api/dm_daily_revenue có filter/phân trang/gom tuần-tháng và bản NDJSON stream, trên datamart SQLite
+# (benchmarks/sqlite_standin.py), dữ liệu sinh như bench_api_cache:
+#   - kết quả filter / bucket khớp tính lại bằng pandas, đi hết các trang bằng cursor = kết quả đầy đủ,
+#     NDJSON = kết quả đầy đủ
+#   - kích thước response + độ trễ: toàn bảng vs 1 tháng 1 phim vs 1 trang vs gom theo tháng
+#   - bộ nhớ đỉnh (tracemalloc) khi stream NDJSON toàn bảng so với dựng 1 mảng JSON
+# Chạy: python benchmarks/bench_api_queries.py --movies 200 --days 365
+import os
+import sys
+import json
+import argparse
+import tracemalloc
+
+import pandas as pd
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlite_standin import sqlite_databases
+from bench_api_cache import make_aggregates, timed_requests
+from utils.db_pool import get_connection
+from utils.log_to_db import flush_db_logs
+from utils.api_payloads import query_payload
+
+URL = "/api/dm_daily_revenue"
+
+
+def expected_rows(daily, date_from=None, date_to=None, movies=None, bucket="day"):
+    # Tính lại bằng pandas; tuần/tháng: bucket giao với [from, to], tổng của cả bucket
+    df = daily.copy()
+    df["full_date"] = pd.to_datetime(df["full_date"])
+    if bucket == "week":
+        df["full_date"] = df["full_date"] - pd.to_timedelta(df["full_date"].dt.weekday, unit="D")
+    elif bucket == "month":
+        df["full_date"] = df["full_date"].dt.to_period("M").dt.to_timestamp()
+    df = (df.groupby(["full_date", "movie_name"], as_index=False)[["revenue_vnd", "tickets_sold", "showtimes"]]
+          .sum().sort_values(["full_date", "movie_name"]))
+    if date_from:
+        start = pd.Timestamp(date_from)
+        if bucket == "week":
+            start -= pd.Timedelta(days=start.weekday())
+        elif bucket == "month":
+            start = start.replace(day=1)
+        df = df[df["full_date"] >= start]
+    if date_to:
+        df = df[df["full_date"] <= date_to]
+    if movies:
+        df = df[df["movie_name"].isin(movies)]
+    return [{"movie": r.movie_name, "date": r.full_date.strftime("%Y-%m-%d"), "revenue": int(r.revenue_vnd),
+             "tickets": int(r.tickets_sold), "showtimes": int(r.showtimes)} for r in df.itertuples()]
+
+
+def walk_pages(client, query, limit):
+    items, cursor, pages = [], None, 0
+    while True:
+        params = dict(query, limit=limit, **({"cursor": cursor} if cursor else {}))
+        body = client.get(URL, query_string=params).get_json()
+        items.extend(body["data"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if not cursor:
+            return items, pages
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movies", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    with sqlite_databases():
+        from etl.load_datamart import load_to_datamart
+        import app as dashboard
+
+        daily, top = make_aggregates(args.movies, args.days)
+        load_to_datamart(daily, top)
+        client = dashboard.app.test_client()
+        movie = daily["movie_name"].iloc[0]
+
+        cases = {
+            "full": ({}, {}),
+            "month_one_movie": ({"from": "2025-03-01", "to": "2025-03-31", "movie": movie},
+                                {"date_from": "2025-03-01", "date_to": "2025-03-31", "movies": [movie]}),
+            "two_movies_weekly": ({"movie": [movie, "Phim 0002"], "bucket": "week"},
+                                  {"movies": [movie, "Phim 0002"], "bucket": "week"}),
+            "monthly_all": ({"bucket": "month"}, {"bucket": "month"}),
+            "weekly_range": ({"bucket": "week", "from": "2025-03-05", "to": "2025-04-02"},
+                             {"bucket": "week", "date_from": "2025-03-05", "date_to": "2025-04-02"}),
+        }
+        for name, (query, kwargs) in cases.items():
+            got = client.get(URL, query_string=query).get_json()
+            assert got == expected_rows(daily, **kwargs), name
+            items, pages = walk_pages(client, {k: v for k, v in query.items()}, 997)
+            assert items == got, f"{name}: pages differ"
+            ndjson = client.get(URL + ".ndjson", query_string=query).get_data(as_text=True)
+            assert [json.loads(line) for line in ndjson.splitlines()] == got, f"{name}: ndjson differs"
+            print(f"{name:18s}: {len(got):7,d} rows, {len(json.dumps(got, ensure_ascii=False)) / 1024:8.1f} KiB, "
+                  f"{pages} pages of 997 | cached p50 "
+                  f"{timed_requests(lambda: client.get(URL, query_string=query), args.requests)['p50_ms']:.2f} ms")
+
+        assert client.get(URL, query_string={"bucket": "year"}).status_code == 400
+        assert client.get(URL, query_string={"cursor": "nope"}).status_code == 400
+        assert client.get(URL, query_string={"limit": "0"}).status_code == 400
+
+        # Trang đầu (không cache) vs toàn bảng (không cache): chi phí query + JSON
+        def uncached(query):
+            dashboard.response_cache.clear()
+            client.get(URL, query_string=query)
+        for name, query in [("full table", {"from": "2000-01-01"}), ("first page", {"limit": 100}),
+                            ("one month, one movie", cases["month_one_movie"][0])]:
+            print(f"uncached {name:22s}: p50 {timed_requests(lambda: uncached(query), 10)['p50_ms']:8.2f} ms")
+
+        def full_json():
+            with get_connection("datamart") as conn:
+                query_payload(conn, "dm_daily_revenue")
+
+        def stream_ndjson():
+            resp = client.get(URL + ".ndjson", buffered=False)
+            for _ in resp.response:
+                pass
+            resp.close()
+        print(f"peak memory full JSON array : {peak_memory(full_json) / 1024 / 1024:7.1f} MiB")
+        print(f"peak memory NDJSON stream   : {peak_memory(stream_ndjson) / 1024 / 1024:7.1f} MiB")
+        flush_db_logs()
+
+
+if __name__ == "__main__":
+    main()
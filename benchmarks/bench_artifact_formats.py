@@ -0,0 +1,103 @@
+# benchmarks/bench_artifact_formats.py
+# So sánh format artifact trung gian (csv / parquet / arrow) cho cleaned và daily aggregate:
+# dung lượng trên đĩa, thời gian ghi, thời gian đọc (kể cả pd.read_csv kiểu cũ) ở nhiều mức dữ liệu.
+# Dữ liệu gốc = các file trong data/cleaned, data/aggregate hiện có, nhân lên theo --scales
+# (đổi ngày + tên phim để không trùng lặp hoàn toàn, giống dữ liệu nhiều ngày/nhiều phim hơn)
+# Chạy: python benchmarks/bench_artifact_formats.py --scales 1,10,100 --repeat 5
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import pandas as pd
+from datetime import date, timedelta
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils.artifact_store import FORMATS, write_artifact, read_artifact
+
+BASE_FILES = {
+    "cleaned": "data/cleaned/boxoffice_cleaned_*.csv",
+    "daily": "data/aggregate/dm_daily_revenue_*.csv",
+}
+DATE_COLUMNS = {"cleaned": "scraped_date", "daily": "full_date"}
+NAME_COLUMNS = {"cleaned": "film_name", "daily": "movie_name"}
+
+def load_base(stage):
+    files = sorted(glob.glob(os.path.join(project_root, BASE_FILES[stage])))
+    if not files:
+        raise SystemExit(f"No base files for {stage}: {BASE_FILES[stage]}")
+    return pd.concat([read_artifact(f, stage) for f in files], ignore_index=True)
+
+def scale_frame(base, stage, factor):
+    """
+    Nhân base lên factor lần: bản thứ i lùi ngày i*7 và thêm hậu tố vào tên phim
+    """
+    date_col, name_col = DATE_COLUMNS[stage], NAME_COLUMNS[stage]
+    parts = []
+    for i in range(factor):
+        part = base.copy()
+        part[date_col] = [d - timedelta(days=7 * i) for d in part[date_col]]
+        if i:
+            part[name_col] = part[name_col] + f" #{i % 20}"
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def bench(stage, df, workdir, repeat):
+    results = {}
+    for name in FORMATS:
+        path = write_artifact(stage, df, date(2025, 1, 1), workdir, [name])
+        write_s = timed(lambda: write_artifact(stage, df, date(2025, 1, 1), workdir, [name]), repeat)
+        read_s = timed(lambda: read_artifact(path, stage), repeat)
+        results[name] = {
+            "bytes": os.path.getsize(path),
+            "write_s": round(write_s, 5),
+            "read_s": round(read_s, 5),
+        }
+        if name == "csv":
+            # Cách đọc trước đây: pd.read_csv tự suy kiểu, ngày vẫn là chuỗi
+            legacy_s = timed(lambda: pd.read_csv(path, encoding="utf-8-sig"), repeat)
+            results["csv_legacy_read"] = {"read_s": round(legacy_s, 5)}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default="1,10,100", help="Các hệ số nhân dữ liệu, phân tách bằng dấu phẩy")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="In kết quả dạng JSON")
+    args = parser.parse_args()
+
+    report = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for stage in BASE_FILES:
+            base = load_base(stage)
+            for factor in (int(s) for s in args.scales.split(",")):
+                df = scale_frame(base, stage, factor)
+                report[f"{stage}_x{factor}"] = {"rows": len(df), **bench(stage, df, workdir, args.repeat)}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for key, res in report.items():
+        csv_bytes, csv_read = res["csv"]["bytes"], res["csv"]["read_s"]
+        print(f"{key} ({res['rows']:,} rows) | csv_legacy read {res['csv_legacy_read']['read_s'] * 1000:.1f} ms")
+        for name in FORMATS:
+            r = res[name]
+            print(f"  {name:8s} {r['bytes'] / 1024:10.1f} KiB ({r['bytes'] / csv_bytes:5.2f}x csv) | "
+                  f"write {r['write_s'] * 1000:8.1f} ms | read {r['read_s'] * 1000:8.1f} ms "
+                  f"({csv_read / r['read_s']:5.1f}x faster than csv)")
+
+if __name__ == "__main__":
+    main()
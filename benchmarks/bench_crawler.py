@@ -0,0 +1,142 @@
+# benchmarks/bench_crawler.py
+# Crawler asyncio (extract_data.crawl_to_csv) trên server fixture local:
+#   - nguồn theo ngày: boxoffice.html?date=... (server bỏ qua query string, trả cùng trang fixture)
+#     mỗi request bị trễ --latency ms giống site thật
+#   - 1 nguồn "flaky" trả 503 ở 2 lần đầu -> phải được thử lại
+# So sánh tải tuần tự (fetch_conditional + parse từng trang như extract cũ) với crawler ở các mức
+# concurrency; kiểm tra mỗi trang đủ dòng, khoảng cách trung bình giữa các request cùng host >= host_interval,
+# file raw theo ngày có cột nguồn và dòng staging mang đúng URL nguồn.
+# Chạy: python benchmarks/bench_crawler.py --days 30 --latency 100
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from datetime import date, timedelta
+from urllib.parse import urlsplit, parse_qs
+
+import pandas as pd
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixture_server import serve_fixtures, QuietHandler
+from utils.async_crawler import AsyncCrawler
+from utils.http_fetch import fetch_conditional
+from utils.row_builders import build_staging_rows
+from utils.source_registry import register_source, unregister_source, list_sources
+from utils.table_parsers import RAW_SOURCE_COLUMN
+import etl.extract_data as extract
+
+EXPECTED_RAW = os.path.join(project_root, "data", "raw", "boxoffice_25112025.csv")
+
+
+class SlowFlakyHandler(QuietHandler):
+    """
+    ?latency=ms -> trễ trước khi trả lời; ?fail=n -> n request đầu tới URL đó trả 503.
+    Ghi lại thời điểm nhận request để kiểm tra giới hạn tốc độ
+    """
+    lock = threading.Lock()
+    hits = {}
+    request_times = []
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+        with self.lock:
+            self.request_times.append(time.monotonic())
+            count = self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        time.sleep(int(query.get("latency", ["0"])[0]) / 1000)
+        if count <= int(query.get("fail", ["0"])[0]):
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        super().do_GET()
+
+
+def parse(html, parser_name):
+    return extract.parse_table_rows(html, parser_name or "lxml")
+
+
+def serial_fetch(sources, dates, cache_dir):
+    # Cách cũ: từng trang một, không thử lại -> trả về số trang lỗi
+    failures = 0
+    for source in sources:
+        for url, file_date in source.targets(dates):
+            try:
+                html, _ = fetch_conditional(url, cache_dir)
+                parse(html, source.parser)
+            except Exception:
+                failures += 1
+    return failures
+
+
+def mean_gap(times):
+    # Đo ở server nên từng khoảng cách bị thread/mạng làm lệch; trung bình thì không thể nhỏ hơn interval
+    times = sorted(times)
+    return (times[-1] - times[0]) / (len(times) - 1) if len(times) > 1 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=30, help="Số trang lịch sử theo ngày")
+    parser.add_argument("--latency", type=int, default=100, help="Độ trễ mỗi request (ms)")
+    parser.add_argument("--concurrency", default="1,4,8,16")
+    parser.add_argument("--host-interval", type=float, default=0.01)
+    args = parser.parse_args()
+
+    expected = pd.read_csv(EXPECTED_RAW, encoding="utf-8-sig", dtype=str).to_dict("records")
+    dates = [date(2025, 11, 25) - timedelta(days=i) for i in range(args.days)]
+    workdir = tempfile.mkdtemp()
+    try:
+        with serve_fixtures(handler=SlowFlakyHandler) as base:
+            # Bỏ nguồn mặc định (site thật), chỉ crawl server fixture
+            for source in list_sources():
+                unregister_source(source.name)
+            register_source("fixture_daily", base + "boxoffice.html?date={date:%Y-%m-%d}&latency=" + str(args.latency))
+            register_source("fixture_flaky", base + "boxoffice.html?fail=2&latency=" + str(args.latency))
+            sources = list_sources(["fixture_daily", "fixture_flaky"])
+
+            start = time.perf_counter()
+            failures = serial_fetch(sources, dates, os.path.join(workdir, "serial"))
+            serial_s = time.perf_counter() - start
+            print(f"serial        : {serial_s:6.2f}s for {args.days + 1} pages, {failures} failed (no retries)")
+
+            for concurrency in (int(c) for c in args.concurrency.split(",")):
+                SlowFlakyHandler.hits.clear()
+                SlowFlakyHandler.request_times.clear()
+                crawler = AsyncCrawler(parse, os.path.join(workdir, f"cache_{concurrency}"),
+                                       concurrency=concurrency, host_interval=args.host_interval,
+                                       retries=3, backoff=0.05)
+                raw_dir = os.path.join(workdir, f"raw_{concurrency}")
+                raw_files = extract.crawl_to_csv(["fixture_daily", "fixture_flaky"], dates, raw_dir, crawler)
+                stats = crawler.get_stats()
+
+                assert stats["failures"] == 0 and stats["retries"] == 2, stats
+                assert stats["pages"] == args.days + 1 and stats["rows"] == len(expected) * (args.days + 1), stats
+                gap = mean_gap(SlowFlakyHandler.request_times)
+                assert gap >= args.host_interval * 0.9, f"requests {gap:.4f}s apart, interval {args.host_interval}s"
+                assert set(raw_files) == set(dates) | {date.today()}
+
+                # File raw theo ngày: đúng các dòng của trang + cột nguồn là URL trang đó
+                for file_date, path in raw_files.items():
+                    df = pd.read_csv(path, encoding="utf-8-sig", dtype=str, keep_default_na=False)
+                    urls = {s.targets([file_date])[0][0] for s in sources
+                            if s.is_daily or file_date == date.today()}
+                    assert set(df[RAW_SOURCE_COLUMN]) <= urls
+                    assert df.drop(columns=RAW_SOURCE_COLUMN).to_dict("records")[:len(expected)] == expected
+                    rows = build_staging_rows(df, file_date, os.path.basename(path))
+                    assert {r[5] for r in rows} == set(df[RAW_SOURCE_COLUMN])
+
+                print(f"crawl c={concurrency:<3d}   : {stats['elapsed']:6.2f}s for {stats['pages']} pages "
+                      f"(x{serial_s / stats['elapsed']:.1f} vs serial), {stats['retries']} retries, "
+                      f"mean gap same host {gap * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
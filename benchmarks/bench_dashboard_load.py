@@ -0,0 +1,171 @@
+# benchmarks/bench_dashboard_load.py
+# Load test API dashboard (Flask test client, datamart SQLite qua benchmarks/sqlite_standin.py),
+# p50/p99 trước và sau khi có bảng rollup (utils/rollups.py):
+#   top movies  trước: GROUP BY movie_name trên toàn bộ dm_top_movies (mọi snapshot, không index movie_name)
+#               sau  : đọc dm_movie_leaderboard theo index ranking
+#   weekly/monthly trước: đọc dm_daily_revenue rồi cộng dồn theo tuần/tháng mỗi request
+#                  sau  : đọc dm_weekly_revenue / dm_monthly_revenue
+# Mỗi request đều bỏ cache response (đo đường truy vấn), thêm 1 dòng "cached" để so sánh.
+# Kết quả trước/sau phải giống nhau.
+# Chạy: python benchmarks/bench_dashboard_load.py --movies 200 --days 365 --snapshots 90 --requests 200
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Response
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlite_standin import sqlite_databases
+from bench_api_cache import make_aggregates
+from utils.db_pool import get_connection
+from utils.log_to_db import flush_db_logs
+from utils.api_payloads import serialize
+from utils.daily_revenue_query import bucket_start
+from utils.row_builders import iter_chunks
+
+LEGACY_TOP_SQL = """
+    SELECT movie_name, MAX(total_revenue), MAX(total_tickets), MAX(total_showtimes), MIN(ranking) AS rank
+    FROM dm_top_movies
+    GROUP BY movie_name
+    ORDER BY rank ASC
+"""
+
+
+def legacy_top():
+    with get_connection("datamart") as conn:
+        cur = conn.cursor()
+        cur.execute(LEGACY_TOP_SQL)
+        rows = cur.fetchall()
+        cur.close()
+    return Response(serialize([{"movie": r[0], "revenue": int(r[1]), "tickets": int(r[2]),
+                                "showtimes": int(r[3]), "rank": int(r[4])} for r in rows]),
+                    mimetype="application/json")
+
+
+def legacy_bucketed(bucket):
+    # Cộng dồn dm_daily_revenue theo tuần/tháng trong mỗi request
+    with get_connection("datamart") as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT movie_name, full_date, revenue_vnd, tickets_sold, showtimes
+            FROM dm_daily_revenue ORDER BY full_date ASC, movie_name ASC
+        """)
+        totals = {}
+        for movie, full_date, revenue, tickets, showtimes in cur.fetchall():
+            start = bucket_start(date.fromisoformat(str(full_date)), bucket)
+            acc = totals.setdefault((start, movie), [0, 0, 0])
+            acc[0] += revenue
+            acc[1] += tickets
+            acc[2] += showtimes
+        cur.close()
+    return Response(serialize([{"movie": movie, "date": str(start), "revenue": acc[0], "tickets": acc[1],
+                                "showtimes": acc[2]} for (start, movie), acc in sorted(totals.items())]),
+                    mimetype="application/json")
+
+
+def seed_snapshots(top, snapshots):
+    # Lịch sử snapshot dm_top_movies mà truy vấn cũ phải quét hết
+    rows = []
+    for i in range(1, snapshots):
+        snapshot = date.today() - timedelta(days=i)
+        for r in top.itertuples():
+            rows.append((snapshot, r.movie_name, int(r.revenue_vnd) - i, int(r.tickets_sold),
+                         int(r.showtimes), int(r.ranking)))
+    with get_connection("datamart") as conn:
+        cur = conn.cursor()
+        for chunk in iter_chunks(rows):
+            cur.executemany("""
+                INSERT INTO dm_top_movies (snapshot_date, movie_name, total_revenue, total_tickets,
+                                           total_showtimes, ranking)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, chunk)
+        conn.commit()
+        cur.close()
+
+
+def load_test(app, url, requests, threads, clear_cache=None):
+    """
+    Gửi requests request tới url từ threads thread (mỗi thread 1 test client), trả về p50/p99 (ms)
+    """
+    def worker(n):
+        client = app.test_client()
+        times = []
+        for _ in range(n):
+            if clear_cache:
+                clear_cache()
+            start = time.perf_counter()
+            resp = client.get(url)
+            times.append(time.perf_counter() - start)
+            assert resp.status_code == 200, resp.status_code
+        return times
+
+    per_thread = [requests // threads + (1 if i < requests % threads else 0) for i in range(threads)]
+    with ThreadPoolExecutor(threads) as executor:
+        times = sorted(t for chunk in executor.map(worker, per_thread) for t in chunk)
+    return {"p50_ms": round(statistics.median(times) * 1000, 2),
+            "p99_ms": round(times[min(len(times) - 1, int(len(times) * 0.99))] * 1000, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movies", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--snapshots", type=int, default=90, help="Số snapshot dm_top_movies (lịch sử)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    with sqlite_databases():
+        from etl.load_datamart import load_to_datamart
+        import app as dashboard
+
+        daily, top = make_aggregates(args.movies, args.days)
+        load_to_datamart(daily, top)
+        seed_snapshots(top, args.snapshots)
+
+        app = dashboard.app
+        app.add_url_rule("/legacy/top_movies", "legacy_top", legacy_top)
+        app.add_url_rule("/legacy/weekly", "legacy_weekly", lambda: legacy_bucketed("week"))
+        app.add_url_rule("/legacy/monthly", "legacy_monthly", lambda: legacy_bucketed("month"))
+        client = app.test_client()
+
+        scenarios = {
+            "top_movies": ("/legacy/top_movies", "/api/dm_top_movies"),
+            "weekly": ("/legacy/weekly", "/api/dm_daily_revenue?bucket=week"),
+            "monthly": ("/legacy/monthly", "/api/dm_daily_revenue?bucket=month"),
+        }
+        clear = dashboard.response_cache.clear
+        report = {"daily_rows": len(daily), "top_movies_rows": len(top) * args.snapshots}
+        for name, (before_url, after_url) in scenarios.items():
+            # Cùng nội dung; bảng cũ lấy MAX qua các snapshot nên so với snapshot hiện tại (lớn nhất)
+            assert client.get(before_url).get_json() == client.get(after_url).get_json(), name
+            report[name] = {
+                "before": load_test(app, before_url, args.requests, args.threads, clear),
+                "after": load_test(app, after_url, args.requests, args.threads, clear),
+                "after_cached": load_test(app, after_url, args.requests, args.threads),
+            }
+        flush_db_logs()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['daily_rows']:,} daily rows, {report['top_movies_rows']:,} dm_top_movies rows, "
+          f"{args.requests} requests x {args.threads} threads")
+    for name in scenarios:
+        res = report[name]
+        print(f"  {name:11s} before p50 {res['before']['p50_ms']:8.2f} p99 {res['before']['p99_ms']:8.2f} ms | "
+              f"after p50 {res['after']['p50_ms']:7.2f} p99 {res['after']['p99_ms']:7.2f} ms | "
+              f"cached p50 {res['after_cached']['p50_ms']:5.2f} p99 {res['after_cached']['p99_ms']:5.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
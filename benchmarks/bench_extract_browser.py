@@ -0,0 +1,85 @@
+# benchmarks/bench_extract_browser.py
+# So sánh cách extract cũ (mở Chrome mới + sleep(6) + quit mỗi lần) với BrowserPool
+# (browser ấm + chờ <table> render) trên trang fixture phục vụ từ benchmarks/fixtures.
+# Trang boxoffice_js.html chỉ render bảng sau ?delay=<ms>, giống trang dựng bằng JS.
+# Kết quả parse phải khớp file raw gốc của fixture (data/raw/boxoffice_25112025.csv).
+# Chạy: python benchmarks/bench_extract_browser.py --runs 5 --delay 1500
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import pandas as pd
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixture_server import serve_fixtures
+from utils.browser_pool import BrowserPool
+from etl.extract_data import get_driver, parse_table_rows
+
+EXPECTED_RAW = os.path.join(project_root, "data", "raw", "boxoffice_25112025.csv")
+
+def check_rows(html):
+    expected = pd.read_csv(EXPECTED_RAW, encoding="utf-8-sig", dtype=str).to_dict("records")
+    rows = parse_table_rows(html, "bs4")
+    if rows != expected:
+        raise AssertionError(f"Parsed {len(rows or [])} rows, expected {len(expected)} rows from {EXPECTED_RAW}")
+
+def legacy_fetch(url, sleep_s):
+    driver = get_driver()
+    driver.get(url)
+    time.sleep(sleep_s)
+    html = driver.page_source
+    driver.quit()
+    return html
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--delay", type=int, default=1500, help="Thời gian (ms) trang fixture chờ trước khi render bảng")
+    parser.add_argument("--legacy-sleep", type=float, default=6, help="sleep cố định của cách cũ")
+    args = parser.parse_args()
+
+    with serve_fixtures() as base:
+        url = f"{base}boxoffice_js.html?delay={args.delay}"
+
+        legacy = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            html = legacy_fetch(url, args.legacy_sleep)
+            legacy.append(time.perf_counter() - start)
+            check_rows(html)
+
+        pool = BrowserPool(get_driver, size=1)
+        pooled, navigation, render = [], [], []
+        try:
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                html, timings = pool.fetch(url)
+                pooled.append(time.perf_counter() - start)
+                navigation.append(timings["navigation"])
+                render.append(timings["render"])
+                check_rows(html)
+            stats = pool.get_stats()
+        finally:
+            pool.close()
+
+    print(json.dumps({
+        "runs": args.runs,
+        "render_delay_ms": args.delay,
+        "legacy": {"median_s": round(statistics.median(legacy), 3), "first_s": round(legacy[0], 3)},
+        "pooled": {
+            "median_s": round(statistics.median(pooled), 3),
+            "first_s": round(pooled[0], 3),
+            "median_navigation_s": round(statistics.median(navigation), 3),
+            "median_render_s": round(statistics.median(render), 3),
+            "browser_launches": stats["creations"],
+            "startup_s": round(stats["startup_time"], 3),
+        },
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_extract_http.py
+# So sánh các đường extract trên trang fixture phục vụ local (benchmarks/fixtures):
+#   http_cold   : GET đầy đủ + parse lxml (cache rỗng)
+#   http_304    : conditional GET (ETag/If-Modified-Since) -> 304, dùng lại trang đã lưu + parse lxml
+#   browser     : BrowserPool (browser ấm) + BeautifulSoup, bỏ qua nếu máy không có Chrome
+#   auto_js     : extract_rows(auto) trên trang render bằng JS -> HTTP không thấy bảng, fallback browser
+# Các đường đều phải ra đúng các dòng của file raw gốc của fixture.
+# Chạy: python benchmarks/bench_extract_http.py --runs 20
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import pandas as pd
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixture_server import serve_fixtures
+from utils.browser_pool import BrowserPool
+from utils.http_fetch import fetch_conditional
+import etl.extract_data as extract
+
+EXPECTED_RAW = os.path.join(project_root, "data", "raw", "boxoffice_25112025.csv")
+
+def check(rows, expected):
+    if rows != expected:
+        raise AssertionError(f"Got {len(rows or [])} rows, expected {len(expected)}")
+
+def timed_runs(fn, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"median_ms": round(statistics.median(times) * 1000, 2), "max_ms": round(max(times) * 1000, 2)}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--browser-runs", type=int, default=3)
+    args = parser.parse_args()
+
+    expected = pd.read_csv(EXPECTED_RAW, encoding="utf-8-sig", dtype=str).to_dict("records")
+    report = {}
+    cache_root = tempfile.mkdtemp()
+    try:
+        with serve_fixtures() as base:
+            url = base + "boxoffice.html"
+
+            def http_cold():
+                cache_dir = tempfile.mkdtemp(dir=cache_root)
+                html, info = fetch_conditional(url, cache_dir)
+                assert not info["not_modified"]
+                check(extract.parse_table_rows(html, "lxml"), expected)
+            report["http_cold"] = timed_runs(http_cold, args.runs)
+
+            warm_dir = os.path.join(cache_root, "warm")
+            fetch_conditional(url, warm_dir)
+            def http_304():
+                html, info = fetch_conditional(url, warm_dir)
+                assert info["not_modified"] and info["bytes"] == 0
+                check(extract.parse_table_rows(html, "lxml"), expected)
+            report["http_304"] = timed_runs(http_304, args.runs)
+
+            pool = BrowserPool(extract.get_driver, size=1)
+            try:
+                pool.fetch(url)   # khởi động browser, không tính vào thời gian
+
+                def browser():
+                    html, _ = pool.fetch(url)
+                    check(extract.parse_table_rows(html, "bs4"), expected)
+                report["browser"] = timed_runs(browser, args.browser_runs)
+
+                # Dùng pool vừa khởi động cho fallback của extract_rows, cache HTTP trong thư mục tạm
+                extract.get_browser_pool = lambda factory: pool
+                extract.get_etl_config_from_db = lambda key: {"http_cache_path": cache_root}.get(key)
+                def auto_js():
+                    rows, used = extract.extract_rows(base + "boxoffice_js.html?delay=500", "auto")
+                    assert used == "browser"
+                    check(rows, expected)
+                report["auto_js"] = timed_runs(auto_js, args.browser_runs)
+            except Exception as e:
+                report["browser"] = report["auto_js"] = f"unavailable: {type(e).__name__}: {str(e).splitlines()[0]}"
+            finally:
+                pool.close()
+    finally:
+        shutil.rmtree(cache_root, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
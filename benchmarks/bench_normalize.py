@@ -0,0 +1,96 @@
+# benchmarks/bench_normalize.py
+# Kiểm tra tương đương ngẫu nhiên + đo tốc độ các hàm normalize trong transform_data:
+# Series.apply (cũ) và bản vector hóa *_series (mới)
+# Chạy: python benchmarks/bench_normalize.py --rows 1000000 --cases 200000
+import os
+import sys
+import time
+import random
+import argparse
+import numpy as np
+import pandas as pd
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from etl.transform_data import (
+    normalize_revenue, normalize_tickets, normalize_showtimes,
+    normalize_revenue_series, normalize_tickets_series, normalize_showtimes_series,
+)
+
+PAIRS = [
+    ("revenue", normalize_revenue, normalize_revenue_series),
+    ("tickets", normalize_tickets, normalize_tickets_series),
+    ("showtimes", normalize_showtimes, normalize_showtimes_series),
+]
+
+def random_value(rng):
+    kind = rng.randrange(12)
+    n = rng.randrange(0, 10_000_000_000)
+    if kind == 0:
+        return None
+    if kind == 1:
+        return float("nan")
+    if kind == 2:
+        return f"{n:,}".replace(",", ".")          # 1.234.567
+    if kind == 3:
+        return f"{n:,}"                            # 1,234,567
+    if kind == 4:
+        return f"{rng.randrange(100000)}.0"        # 12.0
+    if kind == 5:
+        return float(rng.randrange(100000))        # 12.0 dạng float
+    if kind == 6:
+        return rng.randrange(100000)               # int
+    if kind == 7:
+        return f"{rng.randrange(1000)},{rng.randrange(100)}"  # 12,5
+    if kind == 8:
+        return f"  {n}  "
+    if kind == 9:
+        return rng.choice(["", "-", "N/A", "1e3", "-5", "+7", ".5", "1_000", "inf", "nan", "1.2.3", "12.00"])
+    if kind == 10:
+        return "".join(rng.choice("0123456789.,- ") for _ in range(rng.randrange(1, 10)))
+    return str(n)
+
+def check_equivalence(n_cases, seed):
+    rng = random.Random(seed)
+    values = pd.Series([random_value(rng) for _ in range(n_cases)], dtype=object)
+    for name, scalar, vectorized in PAIRS:
+        expected = values.apply(scalar).astype("int64")
+        actual = vectorized(values)
+        diff = expected != actual
+        if diff.any():
+            i = diff.idxmax()
+            raise AssertionError(f"{name}: {values[i]!r} -> {expected[i]} (apply) vs {actual[i]} (vectorized)")
+    # Cột kiểu số (pandas đọc CSV ra float/int) cũng phải giống
+    for col in (pd.Series(np.arange(1000, dtype=float)), pd.Series(np.arange(1000))):
+        for name, scalar, vectorized in PAIRS:
+            assert (col.apply(scalar) == vectorized(col)).all(), name
+    print(f"equivalence: {n_cases:,} random values OK")
+
+def make_staging_column(n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    n = rng.integers(0, 5_000_000_000, n_rows)
+    return pd.Series([f"{v:,}".replace(",", ".") for v in n], dtype=object)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--cases", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    check_equivalence(args.cases, args.seed)
+
+    col = make_staging_column(args.rows)
+    for name, scalar, vectorized in PAIRS:
+        start = time.perf_counter()
+        col.apply(scalar)
+        old_t = time.perf_counter() - start
+        start = time.perf_counter()
+        vectorized(col)
+        new_t = time.perf_counter() - start
+        print(f"{name:9s}: apply {args.rows / old_t:,.0f} rows/s | vectorized {args.rows / new_t:,.0f} rows/s | "
+              f"speedup x{old_t / new_t:.1f}")
+
+if __name__ == "__main__":
+    main()
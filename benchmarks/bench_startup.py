@@ -0,0 +1,137 @@
+# benchmarks/bench_startup.py
+# Thời gian khởi động các entry point ETL: import từng module trong process mới với
+# python -X importtime (lấy thời gian cumulative của chính module đó), cộng thời gian chạy
+# "python main.py --help". Mỗi lần import còn kiểm tra:
+#   - không nạp thư viện nặng mà module không cần lúc import (pandas/selenium/bs4 nạp theo từng bước)
+#   - không truy vấn etl_config / mở pool kết nối DB, không tạo file/thư mục log (chạy trong thư mục trống)
+# Vượt budget hoặc vi phạm các điều trên: --check thoát với mã 1 (dùng được như 1 test trong CI).
+# Budget đo trên máy 1 CPU, dư khoảng 3 lần; máy chậm hơn thì nới bằng --budget-scale.
+# Chạy: python benchmarks/bench_startup.py [--repeat 5] [--check] [--json]
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# module -> (budget ms cho cumulative import time, các module không được có trong sys.modules sau import)
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "selenium", "bs4", "requests")
+IMPORT_BUDGETS = {
+    "main": (120, HEAVY_MODULES),
+    "etl.extract_data": (250, ("pandas", "numpy", "pyarrow", "selenium", "bs4")),
+    "etl.load_staging": (700, ("selenium", "bs4")),
+    "etl.transform_data": (700, ("selenium", "bs4")),
+    "etl.load_datawarehouse": (700, ("selenium", "bs4")),
+    "etl.aggregate_data": (700, ("selenium", "bs4")),
+    "etl.load_datamart": (700, ("selenium", "bs4")),
+    "etl.backfill": (700, ("selenium", "bs4")),
+}
+# "python main.py --help": khởi động interpreter + import main + argparse
+CLI_HELP_BUDGET_MS = 300
+
+PROBE = """
+import os, sys, json
+sys.path.insert(0, {root!r})
+import {module}
+from utils.db_connection import get_config_stats
+from utils.db_pool import get_pool_stats
+print(json.dumps({{
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+    "etl_config_queries": get_config_stats()["db_queries"],
+    "pools": sorted(get_pool_stats()),
+    "files": sorted(os.listdir(".")),
+}}))
+"""
+
+
+def parse_importtime(stderr, module):
+    # Dòng "import time: self [us] | cumulative | <thụt lề>module"
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    raise ValueError(f"{module} not found in -X importtime output")
+
+
+def probe_import(module, forbidden, repeat):
+    times, probe = [], None
+    for _ in range(repeat):
+        # Thư mục trống cho mỗi lần chạy: file log tạo lúc import sẽ hiện ra trong "files"
+        with tempfile.TemporaryDirectory() as workdir:
+            code = PROBE.format(root=project_root, module=module, heavy=HEAVY_MODULES)
+            result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=workdir,
+                                    capture_output=True, text=True)
+        if result.returncode != 0:
+            # vd module truy vấn db_control lúc import mà DB không chạy
+            error = result.stderr.strip().splitlines()[-1]
+            return {"median_ms": None, "min_ms": None, "heavy_loaded": [], "problems": [f"import failed: {error}"]}
+        times.append(parse_importtime(result.stderr, module))
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+    problems = [f"loads {m} at import" for m in probe["loaded"] if m in forbidden]
+    if probe["etl_config_queries"]:
+        problems.append(f"{probe['etl_config_queries']} etl_config queries at import")
+    if probe["pools"]:
+        problems.append(f"opens DB pools at import: {', '.join(probe['pools'])}")
+    if probe["files"]:
+        problems.append(f"creates files at import: {', '.join(probe['files'])}")
+    return {"median_ms": round(statistics.median(times), 1), "min_ms": round(min(times), 1),
+            "heavy_loaded": probe["loaded"], "problems": problems}
+
+
+def probe_cli_help(repeat):
+    times = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as workdir:
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, os.path.join(project_root, "main.py"), "--help"],
+                                    cwd=workdir, capture_output=True, text=True)
+            times.append((time.perf_counter() - start) * 1000)
+            files = os.listdir(workdir)
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1]
+            return {"median_ms": None, "min_ms": None, "problems": [f"failed: {error}"]}
+    problems = [f"creates files: {', '.join(files)}"] if files else []
+    return {"median_ms": round(statistics.median(times), 1), "min_ms": round(min(times), 1), "problems": problems}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time budget of the ETL entry points")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="Nhân budget (máy chậm hơn máy đo)")
+    parser.add_argument("--check", action="store_true", help="Thoát mã 1 nếu vượt budget hoặc có side effect")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    report = {}
+    for module, (budget, forbidden) in IMPORT_BUDGETS.items():
+        report[module] = {**probe_import(module, forbidden, args.repeat), "budget_ms": budget * args.budget_scale}
+    report["main.py --help"] = {**probe_cli_help(args.repeat), "budget_ms": CLI_HELP_BUDGET_MS * args.budget_scale}
+    for res in report.values():
+        if res["median_ms"] is not None and res["median_ms"] > res["budget_ms"]:
+            res["problems"].append(f"{res['median_ms']} ms over budget {res['budget_ms']:.0f} ms")
+
+    failed = [name for name, res in report.items() if res["problems"]]
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for name, res in report.items():
+            status = "FAIL" if res["problems"] else "ok"
+            if res["median_ms"] is None:
+                print(f"  {name:24s} {'':34s}budget {res['budget_ms']:6.0f} ms  {status}")
+            else:
+                print(f"  {name:24s} median {res['median_ms']:7.1f} ms  min {res['min_ms']:7.1f} ms  "
+                      f"budget {res['budget_ms']:6.0f} ms  {status}")
+            for problem in res["problems"]:
+                print(f"      - {problem}")
+    if args.check and failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
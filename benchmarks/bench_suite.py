@@ -0,0 +1,279 @@
+# benchmarks/bench_suite.py
+# Benchmark toàn bộ các stage ETL trên dữ liệu giả lập (benchmarks/synthetic_data.py):
+#   generate -> (mỗi file raw) staging -> transform -> warehouse -> aggregate (từng engine)
+#   -> write_aggregates -> datamart
+# chạy trên SQLite (benchmarks/sqlite_standin.py, mặc định) hoặc MariaDB đang cấu hình trong
+# config/db_config.json (--backend mariadb: TRUNCATE/ghi thẳng vào các database đó, chỉ dùng cho DB benchmark).
+# Số đo mỗi stage lấy từ utils.stage_metrics (wall/CPU, rows, bytes, round-trip DB, đỉnh RSS),
+# kết quả là JSON; so với baseline đã lưu trong benchmarks/baselines/<backend>_<scale>.json.
+# Baseline phụ thuộc máy đo: lưu lại (--save-baseline) khi đổi máy.
+# Chạy: python benchmarks/bench_suite.py --scale small [--check] [--out report.json]
+#       python benchmarks/bench_suite.py --scale small --save-baseline
+import os
+import sys
+import json
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, project_root)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_data import SCALES, DEFAULT_START_DATE, write_raw_files
+from sqlite_standin import sqlite_databases
+from utils.db_pool import get_connection, close_all_pools
+
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+STAGES = ("generate", "staging", "transform", "warehouse", "aggregate", "write_aggregates", "datamart")
+AGGREGATE_ENGINES = ("pandas", "sql")
+# Chậm hơn / tốn bộ nhớ hơn baseline quá tỉ lệ này thì coi là regression
+DEFAULT_TOLERANCE = 0.25
+# Stage chạy ngắn hơn thế này (giây) thì nhiễu đo lớn hơn tolerance -> không so throughput
+MIN_COMPARE_WALL = 0.1
+
+
+@contextmanager
+def backend_databases(backend, workdir):
+    if backend == "sqlite":
+        with sqlite_databases(directory=workdir):
+            yield
+    else:
+        close_all_pools()
+        yield
+        close_all_pools()
+
+
+def summarize(metrics):
+    """
+    Gộp các lần chạy của 1 stage (StageMetrics) thành số đo của stage
+    """
+    wall = sum(m.wall_time for m in metrics)
+    rows = sum(m.rows_in for m in metrics)
+    return {
+        "calls": len(metrics),
+        "wall_s": round(wall, 4),
+        "cpu_s": round(sum(m.cpu_time for m in metrics), 4),
+        "rows_in": rows,
+        "rows_out": sum(m.rows_out for m in metrics),
+        "rows_per_s": round(rows / wall, 1) if wall else None,
+        "bytes_read": sum(m.bytes_read for m in metrics),
+        "bytes_written": sum(m.bytes_written for m in metrics),
+        "db_round_trips": sum(m.db_round_trips for m in metrics),
+        "peak_rss_mb": round(max((m.peak_rss_bytes or 0) for m in metrics) / 2 ** 20, 1),
+    }
+
+
+def run_generate(raw_dir, films, days, seed):
+    from utils.stage_metrics import track_stage
+
+    with track_stage("generate") as metrics:
+        data = write_raw_files(raw_dir, films, days, DEFAULT_START_DATE, seed)
+        metrics.add(rows_out=data["rows"], bytes_written=data["bytes"])
+    # generate không có đầu vào: throughput tính theo số dòng sinh ra
+    metrics.rows_in = data["rows"]
+    return data
+
+
+def reset_tables(backend):
+    # MariaDB: bắt đầu từ warehouse/datamart rỗng để số đo lần chạy nào cũng như nhau
+    if backend == "sqlite":
+        return
+    for db_key, tables in (("warehouse", ("fact_revenue", "dim_movie", "dim_date")),
+                           ("datamart", ("dm_daily_revenue", "dm_top_movies"))):
+        with get_connection(db_key) as conn:
+            cur = conn.cursor()
+            cur.execute("SET FOREIGN_KEY_CHECKS = 0")
+            for table in tables:
+                cur.execute(f"TRUNCATE TABLE {table}")
+            cur.execute("SET FOREIGN_KEY_CHECKS = 1")
+            conn.commit()
+            cur.close()
+
+
+def verify(data, daily_df):
+    # Tổng doanh thu / vé / suất chiếu sau toàn pipeline phải khớp dữ liệu đã sinh
+    expected = (data["revenue"], data["tickets"], data["showtimes"])
+    actual = tuple(int(daily_df[c].sum()) for c in ("revenue_vnd", "tickets_sold", "showtimes"))
+    if actual != expected:
+        raise AssertionError(f"Pipeline totals {actual} != generated totals {expected}")
+
+
+def run_suite(args, workdir):
+    films, days = SCALES[args.scale]
+    films, days = args.films or films, args.days or days
+    report = {
+        "meta": {
+            "scale": args.scale, "films": films, "days": days, "seed": args.seed, "backend": args.backend,
+            "engines": args.engines, "started_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "pandas": pd.__version__, "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "commit": git_commit(),
+        },
+        "stages": {},
+    }
+
+    with backend_databases(args.backend, workdir):
+        # Module ETL ghi log/artifact theo đường dẫn tương đối + đọc etl_config khi import
+        # -> chạy trong thư mục tạm, import sau khi đã trỏ DB sang backend
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            from utils.stage_metrics import new_run, get_run_metrics
+            from utils.log_to_db import flush_db_logs
+            from etl.load_staging import run_staging_load
+            from etl.transform_data import transform_latest_to_csv
+            from etl.load_datawarehouse import run_warehouse_load
+            from etl.aggregate_data import compute_aggregates, write_aggregates
+            from etl.load_datamart import load_to_datamart
+
+            # Bỏ log INFO (mỗi file raw vài dòng log ra console/file/etl_log) để không tính vào số đo
+            logging.disable(logging.INFO)
+            run_id = new_run("bench_suite")
+            reset_tables(args.backend)
+            data = run_generate(os.path.join(workdir, "raw"), films, days, args.seed)
+            report["meta"].update(raw_files=len(data["paths"]), raw_rows=data["rows"], raw_bytes=data["bytes"])
+
+            for path in data["paths"]:
+                run_staging_load(path)
+                run_warehouse_load(transform_latest_to_csv())
+
+            results = {}
+            for engine in args.engines:
+                start = len(get_run_metrics(run_id))
+                results[engine] = compute_aggregates(full_refresh=True, engine=engine)
+                report["stages"][f"aggregate[{engine}]"] = summarize(get_run_metrics(run_id)[start:])
+            daily_df, top_df, watermark = results[args.engines[0]]
+            verify(data, daily_df)
+            write_aggregates(daily_df, top_df, watermark)
+            load_to_datamart(daily_df, top_df)
+
+            by_stage = {}
+            for metrics in get_run_metrics(run_id):
+                if metrics.stage != "aggregate":
+                    by_stage.setdefault(metrics.stage, []).append(metrics)
+            for stage in STAGES:
+                if stage in by_stage:
+                    report["stages"][stage] = summarize(by_stage[stage])
+            flush_db_logs()
+        finally:
+            logging.disable(logging.NOTSET)
+            os.chdir(cwd)
+    report["stages"] = dict(sorted(report["stages"].items(), key=lambda kv: _stage_order(kv[0])))
+    return report
+
+
+def _stage_order(name):
+    return STAGES.index(name.split("[")[0])
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def baseline_path(args):
+    return args.baseline or os.path.join(BASELINE_DIR, f"{args.backend}_{args.scale}.json")
+
+
+def compare(report, baseline, tolerance):
+    """
+    So từng stage với baseline: throughput giảm hoặc đỉnh RSS tăng quá tolerance -> regression
+    """
+    result = {}
+    for stage, current in report["stages"].items():
+        base = baseline["stages"].get(stage)
+        if base is None:
+            continue
+        entry = {"throughput_ratio": None, "peak_rss_ratio": None, "regressions": []}
+        if current["rows_per_s"] and base["rows_per_s"]:
+            entry["throughput_ratio"] = round(current["rows_per_s"] / base["rows_per_s"], 3)
+            measurable = max(current["wall_s"], base["wall_s"]) >= MIN_COMPARE_WALL
+            if measurable and entry["throughput_ratio"] < 1 - tolerance:
+                entry["regressions"].append("throughput")
+        if current["peak_rss_mb"] and base["peak_rss_mb"]:
+            entry["peak_rss_ratio"] = round(current["peak_rss_mb"] / base["peak_rss_mb"], 3)
+            if entry["peak_rss_ratio"] > 1 + tolerance:
+                entry["regressions"].append("peak_rss")
+        result[stage] = entry
+    return result
+
+
+def print_report(report):
+    meta = report["meta"]
+    print(f"{meta['backend']} / {meta['scale']}: {meta['films']} films x {meta['days']} days, "
+          f"{meta['raw_rows']:,} raw rows in {meta['raw_files']} files ({meta['raw_bytes'] / 2 ** 20:.1f} MiB)")
+    for stage, s in report["stages"].items():
+        line = (f"  {stage:17s} {s['wall_s']:8.2f}s  cpu {s['cpu_s']:7.2f}s  {s['rows_per_s'] or 0:>11,.0f} rows/s  "
+                f"rss {s['peak_rss_mb']:7.1f} MiB  {s['db_round_trips']:>6} round-trips")
+        cmp = report.get("comparison", {}).get(stage)
+        if cmp:
+            line += f"  | vs baseline x{cmp['throughput_ratio']} throughput, x{cmp['peak_rss_ratio']} rss"
+            if cmp["regressions"]:
+                line += "  REGRESSION: " + ", ".join(cmp["regressions"])
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark các stage ETL trên dữ liệu giả lập")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--films", type=int, help="Ghi đè số phim của scale")
+    parser.add_argument("--days", type=int, help="Ghi đè số ngày của scale")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=("sqlite", "mariadb"), default="sqlite")
+    parser.add_argument("--engines", default=",".join(AGGREGATE_ENGINES),
+                        help="Engine aggregate cần đo, phân tách bằng dấu phẩy (engine đầu dùng cho các bước sau)")
+    parser.add_argument("--out", help="Ghi report JSON ra file (mặc định in ra stdout cùng bảng tóm tắt)")
+    parser.add_argument("--baseline", help="File baseline (mặc định benchmarks/baselines/<backend>_<scale>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Lưu report làm baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--check", action="store_true", help="Thoát với mã 1 nếu có regression so với baseline")
+    parser.add_argument("--keep", action="store_true", help="Giữ thư mục tạm (file raw, DB SQLite, log)")
+    args = parser.parse_args()
+    args.engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+
+    workdir = tempfile.mkdtemp(prefix="bench_suite_")
+    try:
+        report = run_suite(args, workdir)
+    finally:
+        if args.keep:
+            print(f"Work directory kept: {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    path = baseline_path(args)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline {path}", file=sys.stderr)
+    elif os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f), args.tolerance)
+        report["baseline"] = os.path.relpath(path, project_root)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    print_report(report)
+    regressed = [s for s, c in report.get("comparison", {}).items() if c["regressions"]]
+    if args.check and regressed:
+        print(f"Regressions: {', '.join(regressed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/bench_table_parsers.py
+# Kiểm tra tương đương ngẫu nhiên + đo tốc độ parse bảng: Bs4TableParser ("html.parser", bản gốc)
+# và LxmlTableParser (lxml + XPath). Trang ngẫu nhiên có entity, thẻ lồng, comment, script/style,
+# \r\n, bảng lồng và cả HTML lỗi (thiếu thẻ đóng, CDATA) -> lxml phải cho đúng các dòng như bs4.
+# Tốc độ đo trên trang fixture và trang lớn sinh từ fixture (--sizes số dòng).
+# Chạy: python benchmarks/bench_table_parsers.py --cases 5000 --sizes 1000,10000,100000
+import os
+import sys
+import time
+import random
+import argparse
+import warnings
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from bs4 import XMLParsedAsHTMLWarning
+from utils.table_parsers import Bs4TableParser, LxmlTableParser
+
+warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "boxoffice.html")
+
+PIECES = [
+    "Truy Tìm Long Diên Hương", "1.234.567", " 12 ", "\n  ", "\t", " ", "Ô", "a\r\nb", "\r\n",
+    "&amp;", "&nbsp;", "&#160;", "&lt;b&gt;", "&#7841;", "&#x1EA1;", "&quot;q&quot;", "&AMP;", "&Ccedil;",
+    "&copy", "&lt", "& ", "&foo;", "&copy1", "&amp1", "&#7841x", "&#x1EA1z", "&bogus", "&lang=vi",
+    "&apos;", "&hellip;", "&Tab;", "&not1", "&eacute;x", "&#0;", "&#128;", "&#xD800;", "\x00",
+    "<b>x</b>", "<span class=\"a>b\">y</span>", "<a href='?a=1&b=2'>link</a>", "<br>", "<br/>",
+    "<!-- note -->", "<script>var t='<td>';</script>", "<style>td{}</style>", "<i> it </i>",
+    "<p>para</p>", "<img src=x>", "<div><span>deep</span></div>", "<noscript>ns</noscript>",
+    "<textarea>ta</textarea>", "<sup>1</sup>", "<em>  </em>", "<small>a  b</small>",
+]
+TD_FORMATS = ["<td>{}</td>", "<TD class=x>{}</TD>", "<td >{}</td >", "<td\r\nclass=x>{}</td\r\n>"]
+
+def random_cell(rng):
+    return "".join(rng.choice(PIECES) for _ in range(rng.randrange(0, 5)))
+
+def random_table(rng, depth=0):
+    out = ["<table%s>" % rng.choice(["", " class='t'", " BORDER=1"])]
+    if rng.random() < 0.5:
+        out.append("<thead><tr>" + "".join(f"<th>{random_cell(rng)}</th>" for _ in range(4)) + "</tr></thead>")
+    for _ in range(rng.randrange(1, 3)):
+        out.append("<tbody>")
+        for _ in range(rng.randrange(0, 6)):
+            tds = []
+            for _ in range(rng.randrange(2, 7)):
+                cell = random_cell(rng)
+                if depth < 1 and rng.random() < 0.05:
+                    cell += random_table(rng, depth + 1)
+                tds.append(rng.choice(TD_FORMATS).format(cell))
+            out.append("<tr>" + "".join(tds) + "</tr>" + rng.choice(["", "\n", " "]))
+        out.append("</tbody>")
+    out.append("</table>")
+    return "".join(out)
+
+def random_page(rng, malformed=False):
+    head = rng.choice(["", "<!DOCTYPE html>", "<?xml version='1.0' encoding='utf-8'?>", "<!-- c -->", "<p>intro",
+                       "<html><head><meta charset='utf-8'><title>t</title></head><body>"])
+    body = "".join(random_table(rng) if rng.random() < 0.7 else random_cell(rng) for _ in range(rng.randrange(0, 3)))
+    if malformed:
+        for tag in ("</td>", "</tr>", "</tbody>", "</table>"):
+            if rng.random() < 0.3:
+                body = body.replace(tag, "", 1)
+        if rng.random() < 0.2:
+            body = body.replace("<td>", "<td><![CDATA[x]]>", 1)
+    return head + body + rng.choice(["", "</body></html>"])
+
+def check_equivalence(n_cases, seed):
+    rng = random.Random(seed)
+    bs4_parser, lxml_parser = Bs4TableParser(), LxmlTableParser()
+    fast = 0
+    for i in range(n_cases):
+        html = random_page(rng, malformed=i % 3 == 0)
+        expected, actual = bs4_parser.parse_rows(html), lxml_parser.parse_rows(html)
+        if expected != actual:
+            raise AssertionError(f"Mismatch on page {html!r}:\nbs4:  {expected}\nlxml: {actual}")
+        fast += lxml_parser.is_supported(html)
+    print(f"equivalence: {n_cases:,} random pages OK ({fast:,} parsed by lxml, the rest fell back to bs4)")
+
+def large_page(n_rows):
+    # Nhân tbody của fixture lên n_rows dòng
+    with open(FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+    start, end = html.index("<tbody>") + len("<tbody>"), html.index("</tbody>")
+    rows = [line for line in html[start:end].splitlines() if line.strip()]
+    body = "\n".join(rows[i % len(rows)] for i in range(n_rows))
+    return html[:start] + "\n" + body + "\n" + html[end:]
+
+def measure(parser, html, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = parser.parse_rows(html)
+        best = min(best, time.perf_counter() - start)
+    return best, len(rows)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Số dòng của các trang lớn")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    check_equivalence(args.cases, args.seed)
+
+    with open(FIXTURE, encoding="utf-8") as f:
+        pages = [("fixture", f.read())]
+    pages += [(f"{n:,} rows", large_page(n)) for n in (int(s) for s in args.sizes.split(","))]
+
+    bs4_parser, lxml_parser = Bs4TableParser(), LxmlTableParser()
+    for name, html in pages:
+        mb = len(html.encode("utf-8")) / 1024 / 1024
+        old_t, old_rows = measure(bs4_parser, html, args.repeat)
+        new_t, new_rows = measure(lxml_parser, html, args.repeat)
+        assert bs4_parser.parse_rows(html) == lxml_parser.parse_rows(html), name
+        print(f"{name:>13s} ({mb:7.2f} MB): bs4 {old_rows / old_t:>10,.0f} rows/s {mb / old_t:6.1f} MB/s | "
+              f"lxml {new_rows / new_t:>10,.0f} rows/s {mb / new_t:6.1f} MB/s | speedup x{old_t / new_t:.1f}")
+
+if __name__ == "__main__":
+    main()
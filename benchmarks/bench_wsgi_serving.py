@@ -0,0 +1,144 @@
+# benchmarks/bench_wsgi_serving.py
+# Nhiều người xem dashboard cùng lúc qua HTTP thật (datamart SQLite qua benchmarks/sqlite_standin.py):
+#   dev     : werkzeug dev server của app.run (1 thread / request, không warm-up)
+#   waitress: wsgi.py (thread pool cố định, warm-up cache trước khi nhận request)
+# Mỗi server: 1 đợt viewers người xem ngay khi server lên, load datamart lần nữa (version tăng,
+# cache bị bỏ) rồi 1 đợt nữa. Mỗi người xem tải trang + 4 API như dashboard.html.
+# In p50/p99, số request lỗi/timeout, số lần gọi loader bị gộp và kiểm tra /metrics đếm đủ request.
+# Chạy: python benchmarks/bench_wsgi_serving.py --movies 200 --days 365 --viewers 50
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlite_standin import sqlite_databases
+from bench_api_cache import make_aggregates, percentiles
+from utils.log_to_db import flush_db_logs
+
+PAGE_URLS = ["/", "/api/dm_daily_revenue", "/api/dm_top_movies",
+             "/api/dm_daily_revenue?bucket=week", "/api/dm_daily_revenue?bucket=month"]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_dev_server(app, port):
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+
+def start_waitress(app, port, threads):
+    from waitress.server import create_server
+    from app import warm_up
+
+    warm_up()
+    server = create_server(app, host="127.0.0.1", port=port, threads=threads)
+    threading.Thread(target=server.run, daemon=True).start()
+    return server.close
+
+
+def viewer_burst(base_url, viewers, timeout):
+    def view(_):
+        session = requests.Session()
+        times, errors = [], 0
+        for url in PAGE_URLS:
+            start = time.perf_counter()
+            try:
+                resp = session.get(base_url + url, timeout=timeout, headers={"Accept-Encoding": "gzip"})
+                resp.raise_for_status()
+            except requests.RequestException:
+                errors += 1
+            times.append(time.perf_counter() - start)
+        session.close()
+        return times, errors
+
+    with ThreadPoolExecutor(viewers) as executor:
+        results = list(executor.map(view, range(viewers)))
+    times = [t for r in results for t in r[0]]
+    return {**percentiles(times), "requests": len(times), "errors": sum(r[1] for r in results)}
+
+
+def run_server(name, start, args, dashboard, load_to_datamart):
+    dashboard.response_cache.clear()
+    before = dict(dashboard.response_cache.get_stats())
+    port = free_port()
+    stop = start(dashboard.app, port)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        result = {"startup": viewer_burst(base_url, args.viewers, args.timeout)}
+        load_to_datamart(*make_aggregates(args.movies, args.days, seed=len(name)))
+        time.sleep(dashboard.response_cache.version_check_interval + 0.1)
+        result["after_load"] = viewer_burst(base_url, args.viewers, args.timeout)
+        metrics_text = requests.get(base_url + "/metrics", timeout=args.timeout).text
+    finally:
+        stop()
+    stats = dashboard.response_cache.get_stats()
+    result["coalesced"] = stats["coalesced"] - before["coalesced"]
+    result["cache_misses"] = stats["misses"] - before["misses"]
+    return result, metrics_text
+
+
+def counted_requests(metrics_text):
+    return sum(float(line.rsplit(" ", 1)[1]) for line in metrics_text.splitlines()
+               if line.startswith("http_request_duration_seconds_count"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movies", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--viewers", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    with sqlite_databases():
+        from etl.load_datamart import load_to_datamart
+        import app as dashboard
+
+        dashboard.response_cache.version_check_interval = 0.5
+        load_to_datamart(*make_aggregates(args.movies, args.days))
+
+        report = {}
+        counted = 0
+        for name, start in (("dev", start_dev_server),
+                            ("waitress", lambda app, port: start_waitress(app, port, args.threads))):
+            report[name], metrics_text = run_server(name, start, args, dashboard, load_to_datamart)
+            # /metrics đếm mọi request đã xong (gồm các lần gọi /metrics trước đó, trừ lần đang chạy)
+            expected = counted + 2 * args.viewers * len(PAGE_URLS)
+            counted = counted_requests(metrics_text)
+            assert counted == expected, (counted, expected)
+            counted += 1
+        flush_db_logs()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{args.viewers} concurrent viewers x {len(PAGE_URLS)} requests, {args.movies * args.days:,} daily rows")
+    for name, res in report.items():
+        for phase in ("startup", "after_load"):
+            r = res[phase]
+            print(f"  {name:8s} {phase:10s} p50 {r['p50_ms']:8.2f} ms  p99 {r['p99_ms']:8.2f} ms  "
+                  f"errors {r['errors']}/{r['requests']}")
+        print(f"  {name:8s} cache misses {res['cache_misses']}, coalesced {res['coalesced']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# benchmarks/fixture_server.py
+# HTTP server tĩnh chạy nền phục vụ benchmarks/fixtures (trang boxoffice đã ghi lại) cho các benchmark extract
+import os
+import threading
+from contextlib import contextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """
+    Không in access log; thêm ETag (mtime + size) và trả 304 khi If-None-Match khớp.
+    If-Modified-Since/Last-Modified đã có sẵn trong SimpleHTTPRequestHandler
+    """
+    _etag = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            st = os.stat(path)
+            self._etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+            if self.headers.get("If-None-Match") == self._etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+        super().do_GET()
+
+    def end_headers(self):
+        if self._etag:
+            self.send_header("ETag", self._etag)
+        super().end_headers()
+
+
+@contextmanager
+def serve_fixtures(directory=FIXTURE_DIR, handler=QuietHandler):
+    """
+    Chạy server trên cổng ngẫu nhiên của 127.0.0.1, trả về base URL (vd http://127.0.0.1:54321/)
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(handler, directory=directory))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,223 @@
+# benchmarks/sqlite_standin.py
+# SQLite đứng thay MariaDB cho benchmark trên máy không có MySQL: thay mysql.connector.connect
+# (mà utils.db_pool gọi) bằng kết nối sqlite3, mỗi database logic là 1 file trong thư mục tạm.
+# Câu SQL của ETL/API được dịch tối thiểu: %s -> ?, ON DUPLICATE KEY UPDATE -> ON CONFLICT,
+# TRUNCATE -> DELETE, INSERT IGNORE, AUTO_INCREMENT, ON UPDATE CURRENT_TIMESTAMP.
+# Số đo trên SQLite chỉ để so sánh tương đối trước/sau, không phải số của MariaDB.
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import mysql.connector
+
+from utils.db_connection import load_config
+from utils.db_pool import close_all_pools
+
+# Bảng datamart (giống sql/db_datamart.sql, bỏ phần riêng của MySQL)
+DATAMART_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dm_daily_revenue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    movie_name TEXT,
+    full_date TEXT,
+    revenue_vnd INTEGER,
+    tickets_sold INTEGER,
+    showtimes INTEGER,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (movie_name, full_date)
+);
+CREATE INDEX IF NOT EXISTS idx_daily_date_movie ON dm_daily_revenue (full_date, movie_name);
+CREATE TABLE IF NOT EXISTS dm_top_movies (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    snapshot_date TEXT NOT NULL,
+    movie_name TEXT,
+    total_revenue INTEGER,
+    total_tickets INTEGER,
+    total_showtimes INTEGER,
+    ranking INTEGER,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (snapshot_date, movie_name)
+);
+CREATE INDEX IF NOT EXISTS idx_top_snapshot_ranking ON dm_top_movies (snapshot_date, ranking);
+"""
+
+# Bảng staging / warehouse (giống sql/db_staging.sql, sql/db_warehouse.sql)
+STAGING_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stg_boxoffice_raw (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    film_name TEXT,
+    revenue_raw TEXT,
+    tickets_raw TEXT,
+    showtimes_raw TEXT,
+    scraped_date TEXT,
+    source TEXT
+);
+"""
+
+WAREHOUSE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dim_date (
+    date_key INTEGER PRIMARY KEY,
+    full_date TEXT,
+    year INTEGER,
+    month INTEGER,
+    day INTEGER,
+    quarter INTEGER
+);
+CREATE TABLE IF NOT EXISTS dim_movie (
+    movie_key INTEGER PRIMARY KEY AUTOINCREMENT,
+    movie_name TEXT UNIQUE,
+    genre TEXT,
+    release_date TEXT,
+    country TEXT
+);
+CREATE TABLE IF NOT EXISTS fact_revenue (
+    revenue_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    movie_key INTEGER,
+    date_key INTEGER,
+    revenue_vnd INTEGER,
+    tickets_sold INTEGER,
+    showtimes INTEGER,
+    load_date TEXT
+);
+CREATE INDEX IF NOT EXISTS movie_key ON fact_revenue (movie_key);
+CREATE INDEX IF NOT EXISTS date_key ON fact_revenue (date_key);
+"""
+
+# Đủ cho get_etl_config_from_db (bảng rỗng -> giá trị mặc định) và DBLogHandler
+CONTROL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS etl_config (
+    config_key TEXT PRIMARY KEY,
+    config_value TEXT,
+    description TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS etl_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    log_time TEXT,
+    log_level TEXT,
+    message TEXT,
+    source_file TEXT
+);
+"""
+
+SCHEMAS = {
+    "control": CONTROL_SCHEMA,
+    "staging": STAGING_SCHEMA,
+    "warehouse": WAREHOUSE_SCHEMA,
+    "datamart": DATAMART_SCHEMA,
+}
+
+_AUTO_INCREMENT_RE = re.compile(r"\b(INT|INTEGER|BIGINT)\s+(NOT NULL\s+)?AUTO_INCREMENT\s+PRIMARY KEY", re.I)
+_VALUES_FN_RE = re.compile(r"VALUES\((\w+)\)", re.I)
+
+
+def translate(sql):
+    sql = sql.replace("%s", "?")
+    sql = re.sub(r"\bINSERT IGNORE\b", "INSERT OR IGNORE", sql, flags=re.I)
+    sql = re.sub(r"\bTRUNCATE TABLE\b", "DELETE FROM", sql, flags=re.I)
+    sql = re.sub(r"\bON UPDATE CURRENT_TIMESTAMP\b", "", sql, flags=re.I)
+    # SQLite so sánh chuỗi nhị phân sẵn (BINARY) như utf8mb4_bin
+    sql = re.sub(r"\bCHARACTER SET utf8mb4 COLLATE utf8mb4_bin\b", "COLLATE BINARY", sql, flags=re.I)
+    sql = _AUTO_INCREMENT_RE.sub("INTEGER PRIMARY KEY AUTOINCREMENT", sql)
+    if re.search(r"ON DUPLICATE KEY UPDATE", sql, re.I):
+        head, tail = re.split(r"ON DUPLICATE KEY UPDATE", sql, flags=re.I)
+        # "version = version + 1" của MySQL tham chiếu giá trị cũ -> giống nhau trong SQLite
+        sql = head + "ON CONFLICT DO UPDATE SET" + _VALUES_FN_RE.sub(r"excluded.\1", tail)
+    return sql
+
+
+def _param(value):
+    # Adapter date/datetime mặc định của sqlite3 đã deprecated từ Python 3.12 -> tự đổi sang chuỗi ISO
+    if isinstance(value, (date, datetime)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime) else value.isoformat()
+    return value
+
+
+class StandinCursor:
+    def __init__(self, conn):
+        self._cur = conn.cursor()
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def execute(self, sql, params=()):
+        self._cur.execute(translate(sql), [_param(p) for p in params])
+        self.rowcount, self.lastrowid = self._cur.rowcount, self._cur.lastrowid
+
+    def executemany(self, sql, rows):
+        self._cur.executemany(translate(sql), [[_param(p) for p in row] for row in rows])
+        self.rowcount = self._cur.rowcount
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def fetchmany(self, size=1):
+        return self._cur.fetchmany(size)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def close(self):
+        self._cur.close()
+
+
+class StandinConnection:
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+
+    def cursor(self, *args, **kwargs):
+        return StandinCursor(self._conn)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        self._conn.close()
+
+
+@contextmanager
+def sqlite_databases(schemas=SCHEMAS, directory=None):
+    """
+    Trong khối with, mọi get_connection(db_key) của utils.db_pool trỏ vào file SQLite
+    <directory>/<tên database>.sqlite (tạo bảng theo schemas[db_key]); trả về directory
+    """
+    workdir = directory or tempfile.mkdtemp(prefix="sqlite_standin_")
+    original_connect = mysql.connector.connect
+
+    def connect(**cfg):
+        return StandinConnection(os.path.join(workdir, f"{cfg['database']}.sqlite"))
+
+    databases = load_config()["databases"]
+    for db_key, schema in schemas.items():
+        conn = sqlite3.connect(os.path.join(workdir, f"{databases[db_key]}.sqlite"))
+        conn.executescript(schema)
+        conn.close()
+
+    close_all_pools()
+    mysql.connector.connect = connect
+    try:
+        yield workdir
+    finally:
+        close_all_pools()
+        mysql.connector.connect = original_connect
+        if directory is None:
+            shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,134 @@
+# benchmarks/synthetic_data.py
+# Sinh file raw giả lập cùng schema với etl/extract_data.py (boxoffice_DDMMYYYY.csv, UTF-8 BOM,
+# cột "Tên phim", "Doanh thu", "Vé", "Suất chiếu", "Nguồn", số có dấu chấm ngăn cách hàng nghìn).
+# Mỗi phim chiếu 2-13 tuần kể từ ngày ra rạp, doanh thu giảm dần theo ngày và tăng vào cuối tuần;
+# cùng seed + tham số luôn cho cùng nội dung file.
+# Chạy: python benchmarks/synthetic_data.py --scale medium --out /tmp/raw
+import os
+import sys
+import csv
+import json
+import random
+import argparse
+from datetime import date, timedelta
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils.table_parsers import RAW_COLUMNS, RAW_SOURCE_COLUMN
+
+# scale -> (số phim, số ngày scrape)
+SCALES = {
+    "tiny": (60, 14),
+    "small": (300, 90),
+    "medium": (2000, 365),
+    "large": (5000, 3 * 365),
+}
+DEFAULT_START_DATE = date(2023, 1, 1)
+SOURCE_URL = "https://boxofficevietnam.com/"
+
+_TITLE_WORDS = [
+    "Mắt", "Biếc", "Nhà", "Bà", "Nữ", "Lật", "Mặt", "Hai", "Phượng", "Cô", "Dâu", "Hào", "Môn", "Đất", "Rừng",
+    "Phương", "Nam", "Tiệc", "Trăng", "Máu", "Bố", "Già", "Mai", "Gái", "Già", "Lắm", "Chiêu", "Thiên", "Thần",
+    "Báo", "Thù", "Linh", "Miêu", "Quỷ", "Cẩu", "Kẻ", "Ăn", "Hồn", "Đào", "Phở", "Piano", "Ngày", "Xưa",
+    "Có", "Một", "Chuyện", "Tình", "Trạng", "Quỳnh", "Em", "Chưa", "Mười", "Tám", "Cua", "Lại", "Vợ", "Bầu",
+    "Siêu", "Lừa", "Gặp", "Hành", "Trình", "Đêm", "Săn", "Mồi", "Giải", "Cứu", "Người", "Gác", "Cổng",
+]
+
+
+def _title(rng, used):
+    # 2-5 từ ghép ngẫu nhiên; trùng thì thêm số phần như phim nhiều phần
+    title = " ".join(rng.choice(_TITLE_WORDS) for _ in range(rng.randint(2, 5)))
+    n = used.get(title, 0) + 1
+    used[title] = n
+    return title if n == 1 else f"{title} {n}"
+
+
+def make_films(films, days, seed=0):
+    """
+    Danh sách phim: (tên, ngày ra rạp tính từ ngày đầu, số ngày chiếu, doanh thu ngày đầu,
+    tỉ lệ giảm mỗi ngày, giá vé, số vé mỗi suất)
+    """
+    rng = random.Random(seed)
+    used = {}
+    result = []
+    for _ in range(films):
+        result.append((
+            _title(rng, used),
+            rng.randint(-30, max(days - 1, 0)),
+            rng.randint(14, 91),
+            int(rng.lognormvariate(20.5, 1.3)),
+            rng.uniform(0.90, 0.985),
+            rng.randrange(60_000, 120_000, 5_000),
+            rng.randint(15, 60),
+        ))
+    return result
+
+
+def format_number(n):
+    return f"{n:,}".replace(",", ".")
+
+
+def iter_daily_rows(films, days, start_date=DEFAULT_START_DATE, seed=0):
+    """
+    Sinh (ngày, [(tên, doanh thu, vé, suất chiếu)]) cho từng ngày, phim sắp theo doanh thu giảm dần như trang nguồn
+    """
+    rng = random.Random(seed + 1)
+    catalog = make_films(films, days, seed)
+    for day in range(days):
+        current = start_date + timedelta(days=day)
+        weekend = 1.6 if current.weekday() >= 5 else 1.0
+        rows = []
+        for name, release, run_days, opening, decay, price, per_show in catalog:
+            age = day - release
+            if not 0 <= age < run_days:
+                continue
+            revenue = int(opening * decay ** age * weekend * rng.uniform(0.85, 1.15))
+            tickets = max(revenue // price, 1)
+            showtimes = max(tickets // per_show, 1)
+            rows.append((name, revenue, tickets, showtimes))
+        rows.sort(key=lambda r: r[1], reverse=True)
+        yield current, rows
+
+
+def write_raw_files(out_dir, films, days, start_date=DEFAULT_START_DATE, seed=0):
+    """
+    Ghi 1 file raw mỗi ngày vào out_dir; trả về dict paths / số dòng / số byte / tổng doanh thu, vé, suất chiếu
+    (để kiểm tra kết quả sau khi chạy hết pipeline)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    summary = {"paths": [], "rows": 0, "bytes": 0, "revenue": 0, "tickets": 0, "showtimes": 0}
+    for current, rows in iter_daily_rows(films, days, start_date, seed):
+        path = os.path.join(out_dir, f"boxoffice_{current.strftime('%d%m%Y')}.csv")
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(RAW_COLUMNS + [RAW_SOURCE_COLUMN])
+            for name, revenue, tickets, showtimes in rows:
+                writer.writerow([name, format_number(revenue), format_number(tickets), format_number(showtimes),
+                                 SOURCE_URL])
+        summary["paths"].append(path)
+        summary["rows"] += len(rows)
+        summary["bytes"] += os.path.getsize(path)
+        summary["revenue"] += sum(r[1] for r in rows)
+        summary["tickets"] += sum(r[2] for r in rows)
+        summary["showtimes"] += sum(r[3] for r in rows)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sinh file raw box office giả lập")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--films", type=int, help="Ghi đè số phim của scale")
+    parser.add_argument("--days", type=int, help="Ghi đè số ngày của scale")
+    parser.add_argument("--start", type=date.fromisoformat, default=DEFAULT_START_DATE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="Thư mục ghi file raw")
+    args = parser.parse_args()
+    films, days = SCALES[args.scale]
+    summary = write_raw_files(args.out, args.films or films, args.days or days, args.start, args.seed)
+    summary["files"] = len(summary.pop("paths"))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,29 +3,67 @@ import os
 import sys
 import logging
 import pandas as pd
-import mysql.connector
 from datetime import datetime
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
-from utils.db_connection import get_db_config, get_etl_config_from_db
-from utils.log_to_db import push_log_file_to_db
+from utils.db_connection import get_etl_config_from_db
+from utils.db_pool import get_connection
+from utils.log_setup import configure_logging
+from utils.watermark import get_watermark, set_watermark
+from utils.artifact_store import latest_artifact_path, read_artifact, sibling_artifact_path, write_artifact
+from utils.stage_metrics import staged, record_stage, file_size
 
-# 1. Khởi tạo logging động
-log_dir = "logs/aggregate"
-os.makedirs(log_dir, exist_ok=True)
-log_file = f"{log_dir}/aggregate_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-logging.basicConfig(filename=log_file, level=logging.INFO,
-                    format="%(asctime)s - %(levelname)s - %(message)s", encoding="utf-8")
-logging.getLogger().addHandler(logging.StreamHandler())
+# 1. Khởi tạo logging động (file log tạo khi bước aggregate chạy, không phải lúc import)
+def setup_logging():
+    return configure_logging("aggregate", "logs/aggregate")
 
-def aggregate_for_datamart():
-    logging.info("Start aggregate_for_datamart")
-    
-    # 2. Kết nối data warehouse
-    cfg = get_db_config("warehouse")
-    conn = mysql.connector.connect(**cfg)
-    # 3. Truy vấn dữ liệu từ các bảng dim + fact
+# Tên high-water mark trong db_control.etl_watermark
+WATERMARK_NAME = "aggregate_fact_revenue"
+
+AGG_COLUMNS = {
+    'revenue_vnd': 'sum',
+    'tickets_sold': 'sum',
+    'showtimes': 'sum'
+}
+
+def aggregate_daily(df):
+    # Tổng hợp daily revenue theo (phim, ngày)
+    return df.groupby(['movie_name', 'full_date'], as_index=False).agg(AGG_COLUMNS)
+
+def aggregate_top(daily_df):
+    # Tổng hợp top movies theo phim, sắp xếp doanh thu và đánh ranking;
+    # bằng doanh thu thì theo tên phim để ranking cố định và giống sql_top
+    top_df = daily_df.groupby(['movie_name'], as_index=False).agg(AGG_COLUMNS) \
+        .sort_values(by=['revenue_vnd', 'movie_name'], ascending=[False, True], kind='mergesort') \
+        .reset_index(drop=True)
+    top_df['ranking'] = top_df.index + 1
+    return top_df
+
+def _revenue_id_filter(min_revenue_id, max_revenue_id):
+    # Điều kiện lọc fact theo khoảng (min_revenue_id, max_revenue_id]
+    conds, params = [], []
+    if min_revenue_id is not None:
+        conds.append("f.revenue_id > %s")
+        params.append(int(min_revenue_id))
+    if max_revenue_id is not None:
+        conds.append("f.revenue_id <= %s")
+        params.append(int(max_revenue_id))
+    where = (" WHERE " + " AND ".join(conds)) if conds else ""
+    return where, (tuple(params) or None)
+
+def get_max_revenue_id():
+    with get_connection("warehouse") as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT MAX(revenue_id) FROM fact_revenue")
+        row = cur.fetchone()
+        cur.close()
+    return row[0] if row else None
+
+def read_fact_rows(min_revenue_id=None, max_revenue_id=None):
+    """
+    Đọc fact_revenue ⋈ dim_movie ⋈ dim_date trong khoảng (min_revenue_id, max_revenue_id]
+    """
     sql = """
     SELECT 
         f.revenue_id,
@@ -38,53 +76,171 @@ def aggregate_for_datamart():
     JOIN dim_movie m ON f.movie_key = m.movie_key
     JOIN dim_date d ON f.date_key = d.date_key
     """
-    #4. Đưa kết quả vào dataFrame Pandas
-    df = pd.read_sql(sql, conn)
-    conn.close()
-    
-    if df.empty:
+    where, params = _revenue_id_filter(min_revenue_id, max_revenue_id)
+    with get_connection("warehouse") as conn:
+        df = pd.read_sql(sql + where, conn, params=params)
+    record_stage(rows_in=len(df))
+    return df
+
+# --- Engine "pandas": kéo fact rows về rồi group by trong pandas ---
+def pandas_daily(min_revenue_id=None, max_revenue_id=None):
+    df = read_fact_rows(min_revenue_id, max_revenue_id)
+    df['full_date'] = pd.to_datetime(df['full_date']).dt.date
+    return aggregate_daily(df)
+
+# --- Engine "sql": group by + ranking chạy trong MySQL/MariaDB, chỉ trả về dòng đã tổng hợp ---
+def sql_daily(min_revenue_id=None, max_revenue_id=None):
+    where, params = _revenue_id_filter(min_revenue_id, max_revenue_id)
+    sql = f"""
+    SELECT
+        m.movie_name,
+        d.full_date,
+        CAST(SUM(f.revenue_vnd) AS SIGNED) AS revenue_vnd,
+        CAST(SUM(f.tickets_sold) AS SIGNED) AS tickets_sold,
+        CAST(SUM(f.showtimes) AS SIGNED) AS showtimes
+    FROM fact_revenue f
+    JOIN dim_movie m ON f.movie_key = m.movie_key
+    JOIN dim_date d ON f.date_key = d.date_key
+    {where}
+    GROUP BY m.movie_name, d.full_date
+    """
+    with get_connection("warehouse") as conn:
+        df = pd.read_sql(sql, conn, params=params)
+    record_stage(rows_in=len(df))
+    df['full_date'] = pd.to_datetime(df['full_date']).dt.date
+    return df
+
+def sql_top(max_revenue_id=None):
+    where, params = _revenue_id_filter(None, max_revenue_id)
+    sql = f"""
+    SELECT
+        movie_name, revenue_vnd, tickets_sold, showtimes,
+        ROW_NUMBER() OVER (ORDER BY revenue_vnd DESC, movie_name ASC) AS ranking
+    FROM (
+        SELECT
+            m.movie_name,
+            CAST(SUM(f.revenue_vnd) AS SIGNED) AS revenue_vnd,
+            CAST(SUM(f.tickets_sold) AS SIGNED) AS tickets_sold,
+            CAST(SUM(f.showtimes) AS SIGNED) AS showtimes
+        FROM fact_revenue f
+        JOIN dim_movie m ON f.movie_key = m.movie_key
+        {where}
+        GROUP BY m.movie_name
+    ) t
+    ORDER BY ranking
+    """
+    with get_connection("warehouse") as conn:
+        return pd.read_sql(sql, conn, params=params)
+
+DAILY_ENGINES = {
+    "pandas": pandas_daily,
+    "sql": sql_daily,
+}
+
+def get_aggregate_engine(engine=None):
+    # Chọn engine theo tham số, nếu không có thì theo etl_config.aggregate_engine (mặc định pandas)
+    engine = engine or get_etl_config_from_db("aggregate_engine") or "pandas"
+    if engine not in DAILY_ENGINES:
+        raise ValueError(f"Unknown aggregate engine: {engine}")
+    return engine
+
+def load_previous_daily(state_path):
+    # Đọc kết quả daily lần trước làm nền để cộng dồn, không có thì trả None
+    if not state_path or not os.path.exists(state_path):
+        return None
+    return read_artifact(state_path, "daily")
+
+def read_latest_aggregates():
+    """
+    Đọc cặp file daily/top mới nhất trong thư mục aggregate (dùng khi chạy bước load độc lập)
+    """
+    daily_path = latest_artifact_path("daily")
+    if not daily_path:
+        return None, None
+    top_path = sibling_artifact_path(daily_path, "top")
+    if not os.path.exists(top_path):
+        return None, None
+    daily_df = read_artifact(daily_path, "daily")
+    top_df = read_artifact(top_path, "top")
+    logging.info(f"Loaded aggregates from disk: {daily_path}, {top_path}")
+    return daily_df, top_df
+
+@staged("aggregate")
+def compute_aggregates(full_refresh=False, engine=None):
+    """
+    Tính daily/top aggregate, trả về (daily_df, top_df, new_watermark); chưa ghi gì ra đĩa
+    """
+    engine = get_aggregate_engine(engine)
+
+    # 2. Xác định chế độ: incremental (theo high-water mark) hay full rebuild
+    full_refresh = full_refresh or get_etl_config_from_db("aggregate_mode") == "full"
+    watermark, state_path = (None, None) if full_refresh else get_watermark(WATERMARK_NAME)
+    prev_daily = load_previous_daily(state_path) if watermark is not None else None
+    incremental = prev_daily is not None
+    if not incremental and not full_refresh:
+        logging.info("No aggregate watermark/state found, running full rebuild")
+
+    # Chốt biên trên revenue_id để daily/top/watermark nhất quán với nhau
+    max_revenue_id = get_max_revenue_id()
+    if max_revenue_id is None:
         logging.warning("No data found in fact_revenue")
+        return None, None, None
+
+    # 3. Truy vấn + 4./5. Tổng hợp daily revenue bằng engine đã chọn
+    min_revenue_id = watermark if incremental else None
+    delta_daily = DAILY_ENGINES[engine](min_revenue_id, max_revenue_id)
+
+    if incremental:
+        logging.info(f"Incremental aggregate ({engine}): {len(delta_daily)} new daily rows "
+                     f"for revenue_id ({watermark}, {max_revenue_id}]")
+        if delta_daily.empty:
+            daily_df = prev_daily
+        else:
+            daily_df = aggregate_daily(pd.concat([prev_daily, delta_daily], ignore_index=True))
+    else:
+        logging.info(f"Full aggregate ({engine}): {len(delta_daily)} daily rows")
+        daily_df = delta_daily
+    new_watermark = max_revenue_id
+
+    # 6. Tổng hợp danh sách top movies, 7. Sắp xếp doanh thu
+    if engine == "sql" and not incremental:
+        top_df = sql_top(max_revenue_id)
+    else:
+        top_df = aggregate_top(daily_df)
+    record_stage(rows_out=len(daily_df) + len(top_df))
+    return daily_df, top_df, new_watermark
+
+@staged("write_aggregates")
+def write_aggregates(daily_df, top_df, new_watermark=None):
+    """
+    Ghi file aggregate cho data mart và lưu high-water mark (nếu có) trỏ tới file daily vừa ghi
+    """
+    # 8./9. Thư mục aggregate + format (etl_config.artifact_format) lấy động từ db_control
+    today = datetime.today()
+    daily_path = write_artifact("daily", daily_df, today)
+    top_path = write_artifact("top", top_df, today)
+
+    logging.info(f"Daily revenue saved: {daily_path}")
+    logging.info(f"Top movies saved: {top_path}")
+    record_stage(rows_in=len(daily_df) + len(top_df), rows_out=len(daily_df) + len(top_df),
+                 bytes_written=file_size(daily_path) + file_size(top_path))
+
+    # Lưu high-water mark + file daily làm nền cho lần chạy sau
+    if new_watermark is not None:
+        set_watermark(WATERMARK_NAME, new_watermark, daily_path)
+        logging.info(f"Aggregate watermark set to revenue_id {new_watermark}")
+
+    return daily_path, top_path
+
+def aggregate_for_datamart(full_refresh=False, engine=None):
+    logging.info("Start aggregate_for_datamart")
+    daily_df, top_df, new_watermark = compute_aggregates(full_refresh, engine)
+    if daily_df is None:
         return None, None
-    
-    # 5. Tổng hợp dữ liệu daily revenue
-    # Aggregate daily revenue
-    daily_df = df.groupby(['movie_name', 'full_date'], as_index=False).agg({
-        'revenue_vnd': 'sum',
-        'tickets_sold': 'sum',
-        'showtimes': 'sum'
-    })
-    
-    # 6. Tổng hợp danh sách top movies
-    # Aggregate top movies
-    top_df = df.groupby(['movie_name'], as_index=False).agg({
-        'revenue_vnd': 'sum',
-        'tickets_sold': 'sum',
-        'showtimes': 'sum'
-    }).sort_values(by='revenue_vnd', ascending=False).reset_index(drop=True) # 7. Sắp xếp doanh thu
-    top_df['ranking'] = top_df.index + 1
-    
-    # 8. Lấy đường dẫn aggregate động từ db_control
-    aggregate_dir = get_etl_config_from_db("aggregate_data_path") or "data/aggregate"
-    os.makedirs(aggregate_dir, exist_ok=True)
-    
-    # 9. Sinh output CSV cho data mart
-    today_str = datetime.today().strftime("%d%m%Y")
-    daily_path = os.path.join(aggregate_dir, f"dm_daily_revenue_{today_str}.csv")
-    top_path = os.path.join(aggregate_dir, f"dm_top_movies_{today_str}.csv")
-    
-    daily_df.to_csv(daily_path, index=False, encoding="utf-8-sig")
-    top_df.to_csv(top_path, index=False, encoding="utf-8-sig")
-    
-    logging.info(f"Daily revenue CSV saved: {daily_path}")
-    logging.info(f"Top movies CSV saved: {top_path}")
-    
-    # 10. Đẩy log vào db_control
-    try:
-        push_log_file_to_db(log_file, get_db_config("control"))
-    except Exception:
-        logging.exception("Push log failed")
-    
+    write_aggregates(daily_df, top_df, new_watermark)
     return daily_df, top_df
 
 if __name__ == "__main__":
-    aggregate_for_datamart()
\ No newline at end of file
+    setup_logging()
+    engine = sys.argv[sys.argv.index("--engine") + 1] if "--engine" in sys.argv else None
+    aggregate_for_datamart(full_refresh="--full" in sys.argv, engine=engine)
\ No newline at end of file
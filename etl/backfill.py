@@ -0,0 +1,105 @@
+# etl/backfill.py
+import os
+import sys
+import glob
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils.db_connection import get_etl_config_from_db
+from utils.file_manifest import file_checksum, get_manifest, record_file
+from utils.log_setup import configure_logging
+from utils.artifact_store import artifact_dir, get_artifact_formats
+from utils.watermark import reset_watermark
+from etl.load_staging import get_scraped_date
+from etl.transform_data import clean_raw_file
+from etl import load_datawarehouse
+from etl.load_datawarehouse import run_warehouse_load
+from etl.aggregate_data import WATERMARK_NAME
+from utils.stage_metrics import staged, record_stage, file_size
+
+# --- Logging setup ---
+logger = logging.getLogger("backfill")
+
+def setup_logging():
+    # File log tạo khi backfill chạy, không phải lúc import (worker process spawn import lại module này);
+    # fact được ghi qua run_warehouse_load nên tạo luôn log của warehouse
+    load_datawarehouse.setup_logging()
+    return configure_logging("backfill", "logs/backfill", logger_name="backfill")
+
+def find_unprocessed_files(raw_dir=None, force=False):
+    """
+    Trả về list (đường dẫn, checksum) các file raw chưa có trong manifest
+    hoặc đã đổi nội dung, sắp theo ngày trong tên file
+    """
+    raw_dir = raw_dir or get_etl_config_from_db("raw_data_path") or "data/raw"
+    files = sorted(glob.glob(os.path.join(raw_dir, "boxoffice_*.csv")), key=get_scraped_date)
+    manifest = {} if force else get_manifest()
+
+    pending = []
+    for path in files:
+        checksum = file_checksum(path)
+        if manifest.get(os.path.basename(path)) == checksum:
+            continue
+        pending.append((path, checksum))
+    logger.info(f"Found {len(files)} raw files, {len(files) - len(pending)} unchanged, {len(pending)} to load")
+    return pending
+
+@staged("backfill")
+def run_backfill(raw_dir=None, workers=None, force=False):
+    """
+    Nạp mọi file raw chưa xử lý vào warehouse
+
+    Đọc + chuẩn hóa từng file chạy song song trên các worker process; ghi warehouse
+    chạy tuần tự ở process chính. Mỗi file raw là dữ liệu của 1 ngày nên fact cũ của
+    ngày đó được thay thế, chạy lại nhiều lần không bị ghi trùng.
+    Trả về list file đã nạp
+    """
+    logger.info("Start backfill")
+    pending = find_unprocessed_files(raw_dir, force)
+    if not pending:
+        logger.info("Nothing to backfill")
+        return []
+
+    # Worker không truy vấn db_control: thư mục/format cleaned được truyền sẵn
+    cleaned_dir = artifact_dir("cleaned")
+    formats = get_artifact_formats()
+    loaded, failed = [], []
+    # spawn: worker không thừa hưởng connection pool / thread log của process chính
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = {executor.submit(clean_raw_file, path, cleaned_dir, formats): (path, checksum)
+                   for path, checksum in pending}
+        for future in as_completed(futures):
+            path, checksum = futures[future]
+            try:
+                df, cleaned_path = future.result()
+                inserted = run_warehouse_load(df, replace_dates=True)
+                record_file(path, checksum, inserted)
+                # Đọc + chuẩn hóa chạy ở worker process: chỉ tính được kích thước file raw
+                record_stage(bytes_read=file_size(path))
+                loaded.append(path)
+                logger.info(f"Backfilled {path}: {inserted} fact rows ({cleaned_path})")
+            except Exception:
+                failed.append(path)
+                logger.exception(f"Backfill failed for {path}")
+
+    if loaded:
+        # Fact của các ngày cũ đã bị thay thế -> lần aggregate sau phải tính lại toàn bộ
+        reset_watermark(WATERMARK_NAME)
+        logger.info("Reset aggregate watermark, next aggregate run is a full refresh")
+    logger.info(f"Backfill finished: {len(loaded)} loaded, {len(failed)} failed")
+    return loaded
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nạp lại các file raw chưa xử lý vào warehouse")
+    parser.add_argument("--raw-dir", help="Thư mục file raw (mặc định: raw_data_path trong etl_config)")
+    parser.add_argument("--workers", type=int, help="Số worker process (mặc định: số CPU)")
+    parser.add_argument("--force", action="store_true", help="Nạp lại cả các file không đổi checksum")
+    args = parser.parse_args()
+    setup_logging()
+    run_backfill(raw_dir=args.raw_dir, workers=args.workers, force=args.force)
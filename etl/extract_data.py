@@ -2,33 +2,42 @@
 import os
 import re
 import logging
-import time
-import pandas as pd
-from datetime import datetime, date
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+import argparse
+from datetime import date
+import requests
 
 import sys
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
-from utils.db_connection import get_db_config, get_etl_config_from_db
-from utils.log_to_db import push_log_file_to_db
+from utils.db_connection import get_etl_config_from_db
+from utils.log_to_db import flush_db_logs
+from utils.log_setup import configure_logging
+from utils.browser_pool import get_browser_pool
+from utils.http_fetch import fetch_conditional
+from utils.table_parsers import get_table_parser, RAW_SOURCE_COLUMN
+from utils.source_registry import register_source, list_sources
+from utils.async_crawler import AsyncCrawler, crawler_settings
+from utils.stage_metrics import staged, record_stage, file_size
 
-# 1. Khởi tạo logging + Tạo file log
-log_dir = "logs/extract"
-os.makedirs(log_dir, exist_ok=True)
-log_file = f"{log_dir}/extract_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-logging.basicConfig(filename=log_file, level=logging.INFO,
-                    format="%(asctime)s - %(levelname)s - %(message)s", encoding="utf-8")
-logging.getLogger().addHandler(logging.StreamHandler())
+# 1. Khởi tạo logging + Tạo file log (khi bước extract chạy, không phải lúc import)
+def setup_logging():
+    return configure_logging("extract", "logs/extract")
 
 URL = "https://boxofficevietnam.com/"
+# Nguồn mặc định của crawler; trang lịch sử theo ngày / trang chi tiết đăng ký thêm bằng register_source
+register_source("boxofficevietnam", URL, description="Bảng doanh thu trang chủ")
+
+# auto: thử HTTP thường trước, không thấy bảng (trang render bằng JS) thì dùng browser
+# crawl: tải song song mọi nguồn đã đăng ký (chỉ HTTP, không chạy JS)
+EXTRACT_STRATEGIES = ("auto", "http", "browser", "crawl")
 
   # 2. Khởi tạo Chrome Driver (headless)
 def get_driver():
-  
+    # selenium chỉ được import khi thật sự cần browser (strategy http/crawl không cần)
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
     options = Options()
     options.add_argument("--headless=new")
     options.add_argument("--disable-gpu")
@@ -37,70 +46,153 @@ def get_driver():
     driver = webdriver.Chrome(options=options)
     return driver
 
-def scrape_to_csv():
+def fetch_page(url=URL):
+    """
+    Tải trang bằng browser ấm trong pool, chờ bảng render xong thay vì sleep cố định
+    """
+    html, timings = get_browser_pool(get_driver).fetch(url)
+    logging.info(f"Browser navigation {timings['navigation']:.2f}s, render {timings['render']:.2f}s"
+                 + ("" if timings["table_found"] else " (table not rendered before timeout)"))
+    record_stage(bytes_read=len(html.encode("utf-8")))
+    return html
+
+def fetch_page_http(url=URL):
+    """
+    Tải trang bằng HTTP thường (có If-None-Match/If-Modified-Since), không chạy JS
+    """
+    cache_dir = get_etl_config_from_db("http_cache_path") or "data/http_cache"
+    html, info = fetch_conditional(url, cache_dir)
+    logging.info(f"HTTP {info['status']} in {info['elapsed']:.2f}s, {info['bytes']} bytes"
+                 + (" (not modified, using cached page)" if info["not_modified"] else ""))
+    record_stage(bytes_read=info["bytes"])
+    return html
+
+def extract_rows(url=URL, strategy=None):
+    """
+    Lấy các dòng của bảng theo strategy (etl_config.extract_strategy, mặc định auto),
+    trả về (rows, strategy thực sự đã dùng)
+    """
+    strategy = strategy or get_etl_config_from_db("extract_strategy") or "auto"
+    if strategy not in EXTRACT_STRATEGIES:
+        raise ValueError(f"Unknown extract strategy: {strategy}")
+    if strategy == "crawl":
+        raise ValueError("extract_rows fetches a single page, use crawl_to_csv for the crawl strategy")
+
+    if strategy in ("auto", "http"):
+        try:
+            rows = parse_table_rows(fetch_page_http(url))
+            if rows or strategy == "http":
+                return rows, "http"
+            logging.info("No table rows in HTTP response (rendered client-side?), falling back to browser")
+        except requests.RequestException as e:
+            if strategy == "http":
+                raise
+            logging.warning(f"HTTP fetch failed ({e}), falling back to browser")
+
+    return parse_table_rows(fetch_page(url)), "browser"
+
+def parse_table_rows(html, parser=None):
+    """
+    4.-6. Tìm table đầu tiên, trích xuất các <td> của từng <tr> trong tbody thành dòng raw;
+    parser theo etl_config.html_parser: lxml (mặc định) hoặc bs4, cả 2 cho cùng kết quả
+    """
+    parser = parser or get_etl_config_from_db("html_parser") or "lxml"
+    return get_table_parser(parser).parse_rows(html)
+
+def write_raw_csv(rows, file_date, raw_dir=None):
+    import pandas as pd
+
+    # 7. Lấy config lưu raw từ db_control → nếu không có thì dùng mặc định
+    raw_dir = raw_dir or get_etl_config_from_db("raw_data_path") or "data/raw"
+    os.makedirs(raw_dir, exist_ok=True)
+
+    # 8. Tạo file boxoffice_DDMMYYYY.csv, Ghi DataFrame → CSV
+    raw_path = os.path.join(raw_dir, f"boxoffice_{file_date.strftime('%d%m%Y')}.csv")
+    pd.DataFrame(rows).to_csv(raw_path, index=False, encoding="utf-8-sig")
+    logging.info(f"Wrote raw CSV: {raw_path} ({len(rows)} rows)")
+    record_stage(rows_out=len(rows), bytes_written=file_size(raw_path))
+    return raw_path
+
+@staged("crawl")
+def crawl_to_csv(source_names=None, dates=None, raw_dir=None, crawler=None):
+    """
+    Tải song song các nguồn đã đăng ký (mặc định tất cả), trang theo ngày lấy cho từng ngày trong dates.
+    Dòng được gom theo ngày của dữ liệu, mỗi ngày 1 file raw; trả về {ngày: đường dẫn file raw}
+    """
+    sources = list_sources(source_names)
+    if crawler is None:
+        parser = get_etl_config_from_db("html_parser") or "lxml"
+        cache_dir = get_etl_config_from_db("http_cache_path") or "data/http_cache"
+        crawler = AsyncCrawler(lambda html, name: parse_table_rows(html, name or parser), cache_dir,
+                               **crawler_settings())
+    logging.info(f"Crawling {len(sources)} sources: {', '.join(s.name for s in sources)}")
+    before = crawler.get_stats()
+
+    rows_by_date = {}
+    for result in crawler.run(sources, dates):
+        if result["error"] is not None:
+            logging.error(f"Crawl failed for {result['source']} {result['url']}: {result['error']}")
+            continue
+        if not result["rows"]:
+            logging.warning(f"No table rows at {result['source']} {result['url']}")
+            continue
+        rows_by_date.setdefault(result["date"], []).extend(
+            {**row, RAW_SOURCE_COLUMN: result["url"]} for row in result["rows"])
+
+    stats = crawler.get_stats()
+    # Trang được tải trên thread của crawler -> lấy số đo từ stats của crawler
+    record_stage(rows_in=stats["rows"] - before["rows"], bytes_read=stats["bytes"] - before["bytes"])
+    logging.info(f"Crawl finished in {stats['elapsed']:.2f}s: {stats['pages']} pages "
+                 f"({stats['not_modified']} not modified), {stats['rows']} rows, "
+                 f"{stats['retries']} retries, {stats['failures']} failures")
+    return {file_date: write_raw_csv(rows, file_date, raw_dir) for file_date, rows in sorted(rows_by_date.items())}
+
+@staged("extract")
+def scrape_to_csv(url=URL):
     logging.info("Start extract")
-    
+
+    if (get_etl_config_from_db("extract_strategy") or "auto") == "crawl":
+        # Pipeline chỉ nạp file của hôm nay, file các ngày khác để backfill nạp
+        raw_files = crawl_to_csv()
+        if date.today() not in raw_files:
+            logging.error("No rows extracted for today")
+            raise SystemExit("No rows")
+        return raw_files[date.today()]
+
     try:
         # 3. Lấy URL nguồn dữ liệu
-        driver = get_driver()                                 
-        logging.info("Đang lấy dữ liệu từ URL nguồn: https://boxofficevietnam.com/")
-        driver.get(URL)
-        time.sleep(6)                                       
-        html = driver.page_source
-        driver.quit()
+        logging.info(f"Đang lấy dữ liệu từ URL nguồn: {url}")
+        rows, strategy = extract_rows(url)
     except Exception as e:
-        logging.exception("Failed to load page")                
+        logging.exception("Failed to load page")
         raise
 
-    # 4. Parse HTML bằng BeautifulSoup
-    soup = BeautifulSoup(html, "html.parser")
-    
-    # 5. Tìm table trong trang
-    table = soup.find("table")
-    if not table:
-        logging.error("No table found on page")                  
+    logging.info(f"Extracted {len(rows or [])} rows via {strategy}")
+    record_stage(rows_in=len(rows or []))
+    if rows is None:
+        logging.error("No table found on page")
         raise SystemExit("No table found")
 
-    # 6. Duyệt từng <tr> trong tbody → trích xuất dữ liệu
-    rows = []
-    for tr in table.select("tbody tr"):
-        cols = [td.get_text(strip=True) for td in tr.find_all("td")]
-        if len(cols) >= 4:
-            rows.append({
-                "Tên phim": cols[0],
-                "Doanh thu": cols[1],
-                "Vé": cols[2],
-                "Suất chiếu": cols[3]
-            })
-    
     if not rows:
         logging.error("No rows extracted")                       
         raise SystemExit("No rows")
 
-    # 7. Lấy config lưu raw từ db_control → nếu không có thì dùng mặc định
-    raw_dir = get_etl_config_from_db("raw_data_path") or "data/raw"
-    os.makedirs(raw_dir, exist_ok=True)
-    today_str = date.today().strftime("%d%m%Y")
-   
-    
-    # 8. Tạo file boxoffice_DDMMYYYY.csv, Ghi DataFrame → CSV 
-    raw_path = os.path.join(raw_dir, f"boxoffice_{today_str}.csv")
-    pd.DataFrame(rows).to_csv(raw_path, index=False, encoding="utf-8-sig")
-    logging.info(f"Wrote raw CSV: {raw_path}")                  
-    return raw_path
+    return write_raw_csv([{**row, RAW_SOURCE_COLUMN: url} for row in rows], date.today())
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract bảng doanh thu phim ra file raw CSV")
+    parser.add_argument("--crawl", action="store_true", help="Tải song song các nguồn đã đăng ký")
+    parser.add_argument("--sources", help="Tên các nguồn cần crawl, phân tách bằng dấu phẩy (mặc định: tất cả)")
+    parser.add_argument("--dates", help="Các ngày cho trang theo ngày, dạng YYYY-MM-DD phân tách bằng dấu phẩy")
+    args = parser.parse_args()
+    setup_logging()
     try:
-        scrape_to_csv()
+        if args.crawl:
+            crawl_to_csv(args.sources.split(",") if args.sources else None,
+                         [date.fromisoformat(d) for d in args.dates.split(",")] if args.dates else None)
+        else:
+            scrape_to_csv()
     finally:
-        # 9. Push log file lên DB control
-        try:
-            logging.info("Bắt đầu đẩy log file lên DB control...")
-            control_cfg = get_db_config("control")              # Lấy config DB control
-            push_log_file_to_db(log_file, control_cfg)          # Thực hiện đẩy log
-            print("Đã ghi log vào db_control.")
-            logging.info("Đã đẩy log thành công lên DB control")
-        except Exception:
-            logging.exception("Failed to push log to db_control")  
-            print("Lỗi ghi log vào db_control.")
\ No newline at end of file
+        # 9. Chờ thread nền ghi nốt log vào DB control
+        flush_db_logs()
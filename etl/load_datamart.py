@@ -2,92 +2,107 @@
 import os
 import sys
 import logging
-import mysql.connector
-from datetime import datetime
+from datetime import date
 
 # 1. Thiết lập đường dẫn project root
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
-from utils.db_connection import get_db_config, get_etl_config_from_db
-from utils.log_to_db import push_log_file_to_db
-from etl.aggregate_data import aggregate_for_datamart
+from utils.db_pool import get_connection
+from utils.log_setup import configure_logging
+from utils.row_builders import iter_chunks
+from utils.api_payloads import publish_payloads
+from utils.rollups import ensure_rollup_tables, refresh_rollups, refresh_leaderboard
+from utils.stage_metrics import staged, record_stage
+from etl import aggregate_data
+from etl.aggregate_data import aggregate_for_datamart, read_latest_aggregates
 
-# 2. Lấy đường dẫn log từ config DB Control ---
-log_dir = get_etl_config_from_db("datamart_log_path") or "logs/datamart"
-os.makedirs(log_dir, exist_ok=True)
-# 3. Tạo file log
-log_file = os.path.join(log_dir, f"load_datamart_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-
-# 4. Thiết lập logger
+# 2. Logger của bước datamart
 logger = logging.getLogger("load_datamart")
-logger.setLevel(logging.INFO)
-logger.handlers = []  # Xóa handler cũ
 
-file_handler = logging.FileHandler(log_file, encoding="utf-8")
-formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-logger.addHandler(logging.StreamHandler())  # Console
+def setup_logging():
+    # 3. Đường dẫn log lấy từ config DB Control, 4. tạo file log: khi bước datamart chạy, không phải
+    #    lúc import. Chưa có CSV aggregate thì bước này tự chạy aggregate -> tạo luôn log của aggregate
+    aggregate_data.setup_logging()
+    return configure_logging("load_datamart", "logs/datamart", config_key="datamart_log_path",
+                             logger_name="load_datamart")
 
-def load_to_datamart():
+@staged("datamart")
+def load_to_datamart(daily_df=None, top_df=None):
     logger.info("Start load_to_datamart")
     
-    # 5. Lấy dữ liệu tổng hợp 
-    aggregate_path = get_etl_config_from_db("aggregate_data_path") or "data/aggregate"
-    daily_df, top_df = aggregate_for_datamart()
+    # 5. Lấy dữ liệu tổng hợp: nhận từ bước aggregate nếu có,
+    #    chạy độc lập thì đọc CSV aggregate mới nhất, chưa có CSV mới tự tổng hợp
+    if daily_df is None or top_df is None:
+        daily_df, top_df = read_latest_aggregates()
+    if daily_df is None or top_df is None:
+        logger.info("No aggregate CSV on disk, running aggregate_for_datamart")
+        daily_df, top_df = aggregate_for_datamart()
     
     if daily_df is None or top_df is None:
         logger.warning("No aggregate data to load")
         return
+    record_stage(rows_in=len(daily_df) + len(top_df))
 
-    # 6. Kết nối đến database data mart
-    dm_cfg = get_db_config("datamart")
-    conn = mysql.connector.connect(**dm_cfg)
-    cur = conn.cursor()
+    # 6. Kết nối đến database data mart (qua pool)
+    with get_connection("datamart") as conn:
+        cur = conn.cursor()
 
-    # 7. Chuẩn hóa dữ liệu để load
-    # 8. Load vào bảng dm_daily_revenue
-    data_daily = daily_df[['movie_name', 'full_date', 'revenue_vnd', 'tickets_sold', 'showtimes']].values.tolist()
-    if data_daily:
-        cur.executemany("""
-            INSERT INTO dm_daily_revenue (movie_name, full_date, revenue_vnd, tickets_sold, showtimes)
-            VALUES (%s, %s, %s, %s, %s)
-        """, data_daily)
-        conn.commit()
-        logger.info(f"Inserted {len(data_daily)} rows into dm_daily_revenue")
-    else:
-        logger.warning("No rows to insert into dm_daily_revenue")
+        # 7. Chuẩn hóa dữ liệu để load
+        # 8. Upsert vào bảng dm_daily_revenue theo khóa tự nhiên (movie_name, full_date)
+        data_daily = daily_df[['movie_name', 'full_date', 'revenue_vnd', 'tickets_sold', 'showtimes']].values.tolist()
+        if data_daily:
+            for chunk in iter_chunks(data_daily):
+                cur.executemany("""
+                    INSERT INTO dm_daily_revenue (movie_name, full_date, revenue_vnd, tickets_sold, showtimes)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        revenue_vnd = VALUES(revenue_vnd),
+                        tickets_sold = VALUES(tickets_sold),
+                        showtimes = VALUES(showtimes)
+                """, chunk)
+            conn.commit()
+            logger.info(f"Upserted {len(data_daily)} rows into dm_daily_revenue")
+        else:
+            logger.warning("No rows to insert into dm_daily_revenue")
+
+        # 7. Chuẩn hóa dữ liệu để load
+        # 9. Upsert vào bảng dm_top_movies theo (snapshot_date, movie_name)
+        snapshot_date = date.today()
+        data_top = [[snapshot_date] + row for row in
+                    top_df[['movie_name', 'revenue_vnd', 'tickets_sold', 'showtimes', 'ranking']].values.tolist()]
+        if data_top:
+            for chunk in iter_chunks(data_top):
+                cur.executemany("""
+                    INSERT INTO dm_top_movies (snapshot_date, movie_name, total_revenue, total_tickets, total_showtimes, ranking)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        total_revenue = VALUES(total_revenue),
+                        total_tickets = VALUES(total_tickets),
+                        total_showtimes = VALUES(total_showtimes),
+                        ranking = VALUES(ranking)
+                """, chunk)
+            conn.commit()
+            logger.info(f"Upserted {len(data_top)} rows into dm_top_movies (snapshot {snapshot_date})")
+        else:
+            logger.warning("No rows to insert into dm_top_movies")
 
-    # 7. Chuẩn hóa dữ liệu để load
-    # 9. Load vào bảng dm_top_movies
-    data_top = top_df[['movie_name', 'revenue_vnd', 'tickets_sold', 'showtimes', 'ranking']].values.tolist()
-    if data_top:
-        cur.executemany("""
-            INSERT INTO dm_top_movies (movie_name, total_revenue, total_tickets, total_showtimes, ranking)
-            VALUES (%s, %s, %s, %s, %s)
-        """, data_top)
+        # 10. Bảng tổng hợp sẵn cho API: doanh thu tuần/tháng theo phim + bảng xếp hạng hiện tại
+        ensure_rollup_tables(conn)
+        rollup_counts = refresh_rollups(cur, daily_df)
+        leaderboard_rows = refresh_leaderboard(cur, top_df, snapshot_date)
         conn.commit()
-        logger.info(f"Inserted {len(data_top)} rows into dm_top_movies")
-    else:
-        logger.warning("No rows to insert into dm_top_movies")
+        logger.info(f"Refreshed rollups: {rollup_counts['week']} weekly, {rollup_counts['month']} monthly rows, "
+                    f"{leaderboard_rows} leaderboard rows")
+        record_stage(rows_out=len(data_daily) + len(data_top) + sum(rollup_counts.values()) + leaderboard_rows)
 
-    # 10. Đóng cursor và connection
-    cur.close()
-    conn.close()
+        # 11. Đóng cursor, kết nối tự trả về pool
+        cur.close()
 
-    # 11. Đẩy log vào db_control
-    try:
-        for handler in logger.handlers:
-            if isinstance(handler, logging.FileHandler):
-                handler.flush()
-        if os.path.exists(log_file):
-            push_log_file_to_db(log_file, get_db_config("control"))
-            logger.info("Pushed log to db_control successfully")
-        else:
-            logger.warning(f"Log file not found for push: {log_file}")
-    except Exception:
-        logger.exception("Push log to db_control failed")
+        # 12. Tăng datamart version + dựng sẵn JSON cho API (API bỏ cache cũ khi thấy version mới)
+        version = publish_payloads(conn)
+        logger.info(f"Published API payloads for datamart version {version}")
 
 if __name__ == "__main__":
+    setup_logging()
     load_to_datamart()
\ No newline at end of file
@@ -3,111 +3,172 @@ import os
 import sys
 import logging
 import pandas as pd
-import mysql.connector
 from datetime import datetime
 
 # Thiết lập project root
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
-from utils.db_connection import get_db_config, get_etl_config_from_db
-from utils.log_to_db import push_log_file_to_db
+from utils.db_pool import get_connection
+from utils.log_setup import configure_logging
+from utils.row_builders import build_fact_rows, iter_chunks
+from utils.artifact_store import latest_artifact_path, read_artifact
+from utils.stage_metrics import staged, record_stage
 
 # --- Logging setup ---
-# 1. Lấy cấu hình đường dẫn log
-log_dir = get_etl_config_from_db("etl_log_path") or "logs/warehouse"
-os.makedirs(log_dir, exist_ok=True)
-# 2. Tạo file log
-log_file = os.path.join(log_dir, f"load_warehouse_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-
 logger = logging.getLogger("load_warehouse")
-logger.setLevel(logging.INFO)
-logger.handlers = []
-
-file_handler = logging.FileHandler(log_file, encoding="utf-8")
-formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-logger.addHandler(logging.StreamHandler())
 
-# 3. Xác định file clean.csv mới nhất
-def get_latest_cleaned_csv():
-    files = sorted([f for f in os.listdir("data/cleaned") if f.startswith("boxoffice_cleaned_")])
-    return os.path.join("data/cleaned", files[-1]) if files else None
+def setup_logging():
+    # 1. Đường dẫn log lấy từ etl_config, 2. Tạo file log: khi bước warehouse chạy, không phải lúc import
+    return configure_logging("load_warehouse", "logs/warehouse", config_key="etl_log_path",
+                             logger_name="load_warehouse")
+
+# Số dòng tối đa trong 1 câu INSERT nhiều dòng khi nạp dimension
+DIM_BATCH_SIZE = 1000
+# Số dòng mỗi lần executemany khi nạp fact_revenue
+FACT_CHUNK_SIZE = 5000
+
+# 3. Xác định file cleaned mới nhất (theo thời điểm ghi: tên file DDMMYYYY không sắp xếp được theo ngày)
+def get_latest_cleaned_file():
+    return latest_artifact_path("cleaned")
+
+def read_latest_cleaned():
+    # Đọc file cleaned mới nhất (dùng khi chạy bước warehouse độc lập), không có thì trả None
+    cleaned_file = get_latest_cleaned_file()
+    if not cleaned_file or not os.path.exists(cleaned_file):
+        return None
+    return read_artifact(cleaned_file)
+
+def bulk_insert(conn, cur, insert_prefix, rows, batch_size=DIM_BATCH_SIZE):
+    """
+    Ghi rows bằng câu INSERT nhiều dòng (VALUES (...),(...)), commit 1 lần mỗi batch
+    """
+    if not rows:
+        return 0
+    placeholder = "(" + ",".join(["%s"] * len(rows[0])) + ")"
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        sql = insert_prefix + " VALUES " + ",".join([placeholder] * len(batch))
+        cur.execute(sql, [v for row in batch for v in row])
+        conn.commit()
+    return len(rows)
 
-def run_warehouse_load():   
-    logger.info("Start load_warehouse")
-    # 4. Đọc dữ liệu đã chuẩn hóa
-    csv_file = get_latest_cleaned_csv()
-    if not csv_file or not os.path.exists(csv_file):
-        logger.error("No cleaned CSV found")
-        return
+def upsert_dim_movie(conn, cur, movie_names):
+    """
+    Thêm các tên phim chưa có vào dim_movie, trả về dict movie_name -> movie_key
+    """
+    cur.execute("SELECT movie_key, movie_name FROM dim_movie")
+    existing = {name: key for key, name in cur.fetchall()}
 
-    df = pd.read_csv(csv_file, encoding="utf-8-sig")
-    if df.empty:
-        logger.warning("Cleaned CSV empty")
-        return
+    # Tính tập phim mới bằng phép hiệu tập hợp thay vì duyệt từng dòng
+    missing = pd.Index(pd.unique(movie_names)).dropna().difference(pd.Index(list(existing)))
+    if len(missing) == 0:
+        return existing
 
-    # 5. Kết nối data warehouse
-    wh_cfg = get_db_config("warehouse")
-    conn = mysql.connector.connect(**wh_cfg)
-    cur = conn.cursor()
+    bulk_insert(conn, cur, "INSERT IGNORE INTO dim_movie (movie_name)", [(m,) for m in missing])
 
-    # 6. Load dữ liệu vào dim_movie
+    # Đọc lại surrogate key của toàn bộ dimension bằng 1 truy vấn
     cur.execute("SELECT movie_key, movie_name FROM dim_movie")
     existing = {name: key for key, name in cur.fetchall()}
 
-    movies_to_insert = [name for name in df["film_name"].unique() if name not in existing]
-    for m in movies_to_insert:
-        cur.execute("INSERT INTO dim_movie (movie_name) VALUES (%s)", (m,))
-        conn.commit()
-        existing[m] = cur.lastrowid
-    logger.info(f"dim_movie updated, total movies now: {len(existing)}")
-
-    # 7. Load dữ liệu vào dim_date
+    # movie_name so sánh nhị phân (utf8mb4_bin) nên mọi tên mới phải có key; thiếu nghĩa là
+    # INSERT IGNORE đã gộp tên với 1 tên khác (vd cột còn collation _ci) -> dừng thay vì ghi fact movie_key NULL
+    unmapped = [m for m in missing if m not in existing]
+    if unmapped:
+        raise ValueError(f"dim_movie has no key for {len(unmapped)} movie names (e.g. {unmapped[:5]}); "
+                         f"run sql/migrate_warehouse_dim_movie.sql")
+    return existing
+
+def upsert_dim_date(conn, cur, dates):
+    """
+    Thêm các ngày chưa có vào dim_date, trả về set date_key đang tồn tại
+    """
     cur.execute("SELECT date_key FROM dim_date")
-    existing_dates = set([r[0] for r in cur.fetchall()])
-
-    fact_rows = []
-    for _, r in df.iterrows():
-        try:
-            dd = pd.to_datetime(r["scraped_date"]).date()
-            date_key = int(dd.strftime("%Y%m%d"))
-        except:
-            continue
-
-        if date_key not in existing_dates:
-            cur.execute("""
-                INSERT INTO dim_date (date_key, full_date, year, month, day, quarter)
-                VALUES (%s,%s,%s,%s,%s,%s)
-            """, (date_key, dd, dd.year, dd.month, dd.day, (dd.month-1)//3+1))
-            conn.commit()
-            existing_dates.add(date_key)
-
-        movie_key = existing.get(r["film_name"])
-        revenue = int(r.get("revenue_clean", 0))
-        tickets = int(r.get("tickets_clean", 0))
-        showtimes = int(r.get("showtimes_clean", 0))
-
-        fact_rows.append((movie_key, date_key, revenue, tickets, showtimes, datetime.now()))
-
-    # 8. Load dữ liệu vào fact_revenue
-    if fact_rows:
-        cur.executemany("""
-            INSERT INTO fact_revenue (movie_key, date_key, revenue_vnd, tickets_sold, showtimes, load_date)
-            VALUES (%s,%s,%s,%s,%s,%s)
-        """, fact_rows)
-        conn.commit()
-        logger.info(f"Inserted {cur.rowcount} rows into fact_revenue")
+    existing_dates = set(r[0] for r in cur.fetchall())
+
+    parsed = pd.Series(pd.to_datetime(pd.unique(dates), errors="coerce")).dropna()
+    keys = parsed.dt.strftime("%Y%m%d").astype(int)
+    new = parsed[~keys.isin(existing_dates)]
+    if new.empty:
+        return existing_dates
+
+    rows = list(zip(
+        new.dt.strftime("%Y%m%d").astype(int).tolist(),
+        new.dt.date.tolist(),
+        new.dt.year.tolist(),
+        new.dt.month.tolist(),
+        new.dt.day.tolist(),
+        new.dt.quarter.tolist(),
+    ))
+    bulk_insert(conn, cur, "INSERT IGNORE INTO dim_date (date_key, full_date, year, month, day, quarter)", rows)
+    existing_dates.update(r[0] for r in rows)
+    return existing_dates
+
+def delete_facts_for_dates(cur, keys):
+    """
+    Xóa fact_revenue của các date_key (nạp lại file raw đã thay đổi), trả về số dòng đã xóa
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return 0
+    cur.execute("DELETE FROM fact_revenue WHERE date_key IN (" + ",".join(["%s"] * len(keys)) + ")", keys)
+    return cur.rowcount
+
+@staged("warehouse")
+def run_warehouse_load(cleaned_df=None, replace_dates=False):
+    """
+    Nạp dữ liệu đã chuẩn hóa vào warehouse, trả về số dòng fact đã ghi
+
+    replace_dates=True: xóa fact cũ của các ngày có trong dữ liệu trước khi ghi
+    (cùng transaction), dùng khi nạp lại 1 file raw đã được nạp trước đó
+    """
+    logger.info("Start load_warehouse")
+    # 4. Đọc dữ liệu đã chuẩn hóa: dùng DataFrame từ bước transform nếu có,
+    #    chạy độc lập thì đọc file clean.csv mới nhất
+    df = cleaned_df if cleaned_df is not None else read_latest_cleaned()
+    if df is None:
+        logger.error("No cleaned data found")
+        return 0
 
-    cur.close()
-    conn.close()
+    if df.empty:
+        logger.warning("Cleaned data empty")
+        return 0
+    record_stage(rows_in=len(df))
+
+    # 5. Kết nối data warehouse (qua pool)
+    with get_connection("warehouse") as conn:
+        cur = conn.cursor()
+
+        # 6. Load dữ liệu vào dim_movie (bulk)
+        existing = upsert_dim_movie(conn, cur, df["film_name"])
+        logger.info(f"dim_movie updated, total movies now: {len(existing)}")
+
+        # 7. Load dữ liệu vào dim_date (bulk)
+        existing_dates = upsert_dim_date(conn, cur, df["scraped_date"])
+        logger.info(f"dim_date updated, total dates now: {len(existing_dates)}")
+
+        # Dựng fact rows theo cột, 1 load_date cho cả batch
+        fact_rows = build_fact_rows(df, existing, datetime.now())
+
+        # 8. Load dữ liệu vào fact_revenue theo từng chunk
+        inserted = 0
+        if replace_dates:
+            deleted = delete_facts_for_dates(cur, [row[1] for row in fact_rows])
+            logger.info(f"Deleted {deleted} existing fact_revenue rows for reloaded dates")
+        if fact_rows:
+            for chunk in iter_chunks(fact_rows, FACT_CHUNK_SIZE):
+                cur.executemany("""
+                    INSERT INTO fact_revenue (movie_key, date_key, revenue_vnd, tickets_sold, showtimes, load_date)
+                    VALUES (%s,%s,%s,%s,%s,%s)
+                """, chunk)
+                inserted += len(chunk)
+            logger.info(f"Inserted {inserted} rows into fact_revenue")
+        conn.commit()
 
-    # 9. Đẩy log vào db_control
-    try:
-        push_log_file_to_db(log_file, get_db_config("control"))
-    except Exception:
-        logging.exception("Push log failed")
+        cur.close()
+    record_stage(rows_out=inserted)
+    return inserted
 
 if __name__ == "__main__":
+    setup_logging()
     run_warehouse_load()
\ No newline at end of file
@@ -4,21 +4,20 @@ import os
 import glob
 import logging
 import pandas as pd
-import mysql.connector
 from datetime import datetime
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
 from utils.db_connection import get_db_config, get_etl_config_from_db
-from utils.log_to_db import push_log_file_to_db
+from utils.db_pool import get_connection
+from utils.log_setup import configure_logging
+from utils.row_builders import build_staging_rows, iter_chunks
+from utils.table_parsers import RAW_SOURCE_COLUMN
+from utils.stage_metrics import staged, record_stage, file_size
 
-# Logging
-log_dir = "logs/staging"
-os.makedirs(log_dir, exist_ok=True)
-log_file = f"{log_dir}/load_staging_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-logging.basicConfig(filename=log_file, level=logging.INFO,
-                    format="%(asctime)s - %(levelname)s - %(message)s", encoding="utf-8")
-logging.getLogger().addHandler(logging.StreamHandler())
+# Logging (file log tạo khi bước staging chạy, không phải lúc import)
+def setup_logging():
+    return configure_logging("load_staging", "logs/staging")
 
 def get_latest_raw_file():
     # Lấy thư mục raw từ DB
@@ -26,49 +25,126 @@ def get_latest_raw_file():
     files = glob.glob(os.path.join(raw_dir, "boxoffice_*.csv"))
     return max(files, key=os.path.getctime) if files else None
 
-def run_staging_load():
-    logging.info("Start load_staging")
-    raw = get_latest_raw_file()
-    if not raw:
-        logging.error("No raw CSV found")
-        return
+# Số dòng CSV đọc mỗi lần / mỗi batch INSERT + commit
+STAGING_CHUNK_SIZE = 5000
 
-    logging.info(f"Loading raw file: {raw}")
-    df = pd.read_csv(raw, encoding="utf-8-sig")
+INSERT_SQL = """
+    INSERT INTO stg_boxoffice_raw (film_name, revenue_raw, tickets_raw, showtimes_raw, scraped_date, source)
+    VALUES (%s,%s,%s,%s,%s,%s)
+"""
 
+def get_scraped_date(raw):
     # extract date from filename if present
     try:
         base = os.path.basename(raw)
         date_part = base.split("_")[1].split(".")[0]
-        scraped_date = datetime.strptime(date_part, "%d%m%Y").date()
+        return datetime.strptime(date_part, "%d%m%Y").date()
     except Exception:
-        scraped_date = datetime.today().date()
+        return datetime.today().date()
 
-    cfg = get_db_config("staging")
-    conn = mysql.connector.connect(**cfg)
-    cur = conn.cursor()
-
-    # TRUNCATE then insert
-    cur.execute("TRUNCATE TABLE stg_boxoffice_raw")
-    insert_sql = """
-        INSERT INTO stg_boxoffice_raw (film_name, revenue_raw, tickets_raw, showtimes_raw, scraped_date)
-        VALUES (%s,%s,%s,%s,%s)
+def iter_raw_chunks(raw, chunk_size=STAGING_CHUNK_SIZE):
+    """
+    Đọc CSV raw theo từng đoạn, giữ nguyên chuỗi gốc (dtype=str) giống LOAD DATA:
+    không để pandas suy kiểu "4.190" thành số thực 4.19
     """
-    data = [(r.get("Tên phim"), r.get("Doanh thu"), r.get("Vé"), r.get("Suất chiếu"), scraped_date)
-            for _, r in df.iterrows()]
-    if data:
-        cur.executemany(insert_sql, data)
+    return pd.read_csv(raw, encoding="utf-8-sig", dtype=str, keep_default_na=False, chunksize=chunk_size)
+
+def load_chunked(conn, cur, raw, scraped_date, chunk_size=STAGING_CHUNK_SIZE):
+    # Bộ nhớ chỉ giữ 1 chunk tại 1 thời điểm, commit sau mỗi batch
+    total = 0
+    for df in iter_raw_chunks(raw, chunk_size):
+        data = build_staging_rows(df, scraped_date, os.path.basename(raw))
+        for chunk in iter_chunks(data, chunk_size):
+            cur.executemany(INSERT_SQL, chunk)
         conn.commit()
-        logging.info(f"Inserted {cur.rowcount} rows into stg_boxoffice_raw")
+        total += len(data)
+    return total
+
+def _line_terminator(raw):
+    with open(raw, "rb") as f:
+        first = f.readline()
+    return "\\r\\n" if first.endswith(b"\r\n") else "\\n"
 
-    cur.close()
-    conn.close()
+def _has_source_column(raw):
+    # File raw cũ (trước khi có crawler) chỉ có 4 cột, không có cột nguồn
+    with open(raw, "r", encoding="utf-8-sig") as f:
+        return RAW_SOURCE_COLUMN in f.readline()
+
+def local_infile_connection(raw):
+    """
+    Kết nối staging riêng (ngoài pool) cho fast path LOAD DATA LOCAL INFILE. Với local infile,
+    server có thể yêu cầu client gửi bất kỳ file nào client đọc được nên không bật trên các kết nối
+    thường: kết nối này chỉ mở khi staging_load_method=load_data và chỉ cho đọc thư mục chứa file raw
+    """
+    import mysql.connector
+
+    cfg = get_db_config("staging")
+    cfg["allow_local_infile"] = False
+    cfg["allow_local_infile_in_path"] = os.path.dirname(os.path.abspath(raw))
+    return mysql.connector.connect(**cfg)
 
-    # push logs vào db_control
+def load_data_infile(raw, scraped_date):
+    """
+    Fast path (opt-in, etl_config.staging_load_method=load_data): TRUNCATE + LOAD DATA LOCAL INFILE
+    trên kết nối của local_infile_connection, cần local_infile=ON trên server
+    """
+    if _has_source_column(raw):
+        columns, source_sql, params = "showtimes_raw, source", "", ()
+    else:
+        columns, source_sql, params = "showtimes_raw", ", source = %s", (os.path.basename(raw),)
+    conn = local_infile_connection(raw)
     try:
-        push_log_file_to_db(log_file, get_db_config("control"))
-    except Exception:
-        logging.exception("Failed to push logs to DB control")
+        cur = conn.cursor()
+        cur.execute("TRUNCATE TABLE stg_boxoffice_raw")
+        cur.execute(f"""
+            LOAD DATA LOCAL INFILE %s
+            INTO TABLE stg_boxoffice_raw
+            CHARACTER SET utf8mb4
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+            LINES TERMINATED BY '{_line_terminator(raw)}'
+            IGNORE 1 LINES
+            (film_name, revenue_raw, tickets_raw, {columns})
+            SET scraped_date = %s{source_sql}
+        """, (os.path.abspath(raw), scraped_date) + params)
+        conn.commit()
+        inserted = cur.rowcount
+        cur.close()
+        return inserted
+    finally:
+        conn.close()
+
+@staged("staging")
+def run_staging_load(raw_file=None):
+    logging.info("Start load_staging")
+    # Nhận file từ bước extract, chạy độc lập thì lấy file raw mới nhất trên đĩa
+    raw = raw_file or get_latest_raw_file()
+    if not raw:
+        logging.error("No raw CSV found")
+        return
+
+    logging.info(f"Loading raw file: {raw}")
+    scraped_date = get_scraped_date(raw)
+    method = get_etl_config_from_db("staging_load_method") or "chunked"
+
+    inserted = None
+    if method == "load_data":
+        try:
+            inserted = load_data_infile(raw, scraped_date)
+            logging.info(f"LOAD DATA LOCAL INFILE loaded {inserted} rows into stg_boxoffice_raw")
+        except Exception as e:
+            # Server/driver không cho phép local infile -> quay về cách INSERT theo chunk
+            logging.warning(f"LOAD DATA LOCAL INFILE not available ({e}), falling back to chunked insert")
+
+    if inserted is None:
+        with get_connection("staging") as conn:
+            cur = conn.cursor()
+            # TRUNCATE then insert
+            cur.execute("TRUNCATE TABLE stg_boxoffice_raw")
+            inserted = load_chunked(conn, cur, raw, scraped_date)
+            logging.info(f"Inserted {inserted} rows into stg_boxoffice_raw")
+            cur.close()
+    record_stage(rows_in=inserted, rows_out=inserted, bytes_read=file_size(raw))
 
 if __name__ == "__main__":
-    run_staging_load()
\ No newline at end of file
+    setup_logging()
+    run_staging_load()
@@ -4,21 +4,20 @@ import sys
 import re
 import logging
 import pandas as pd
-import mysql.connector
-from datetime import datetime, date
+from datetime import date
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
-from utils.db_connection import get_db_config, get_etl_config_from_db
-from utils.log_to_db import push_log_file_to_db
+from utils.db_pool import get_connection
+from utils.log_setup import configure_logging
+from utils.artifact_store import write_artifact
+from utils.table_parsers import RAW_SOURCE_COLUMN
+from utils.stage_metrics import staged, record_stage, file_size
+from etl.load_staging import get_scraped_date
 
-# Logging
-log_dir = "logs/transform"
-os.makedirs(log_dir, exist_ok=True)
-log_file = f"{log_dir}/transform_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-logging.basicConfig(filename=log_file, level=logging.INFO,
-                    format="%(asctime)s - %(levelname)s - %(message)s", encoding="utf-8")
-logging.getLogger().addHandler(logging.StreamHandler())
+# Logging (file log tạo khi bước transform chạy, không phải lúc import)
+def setup_logging():
+    return configure_logging("transform", "logs/transform")
 
 def normalize_revenue(v):
     if pd.isna(v):
@@ -48,38 +47,101 @@ def normalize_showtimes(v):
     except:
         return 0
 
+# --- Bản vector hóa (chạy trên cả cột), kết quả giống hệt các hàm ở trên ---
+FLOAT_ZERO_RE = re.compile(r'^\d+\.0$')
+THOUSANDS_RE = re.compile(r'^\d{1,3}(\.\d{3})+$')
+
+def _clean_str_series(series):
+    # Giống str(v).strip(); trả thêm mask NaN/None để các bước sau gán 0
+    na = series.isna()
+    return series.astype(str).str.strip(), na
+
+def _normalize_int_series(series):
+    s, na = _clean_str_series(series)
+    digits = s.str.replace(",", "", regex=False).str.replace(".", "", regex=False)
+    ok = digits.str.isdigit() & ~na
+    out = pd.Series(0, index=series.index, dtype="int64")
+    out[ok] = digits[ok].astype("int64")
+    return out
+
+def normalize_revenue_series(series):
+    return _normalize_int_series(series)
+
+def normalize_tickets_series(series):
+    return _normalize_int_series(series)
+
+def _float_to_int(s):
+    try:
+        return int(float(s))
+    except:
+        return 0
+
+def normalize_showtimes_series(series):
+    s, na = _clean_str_series(series)
+    out = pd.Series(0, index=series.index, dtype="int64")
+
+    # Áp dụng các mẫu theo đúng thứ tự ưu tiên của normalize_showtimes
+    float_zero = s.str.match(FLOAT_ZERO_RE) & ~na
+    thousands = s.str.match(THOUSANDS_RE) & ~na & ~float_zero
+    plain = s.str.isdigit() & ~na & ~float_zero & ~thousands
+    rest = ~na & ~float_zero & ~thousands & ~plain
+
+    out[float_zero] = s[float_zero].astype(float).astype("int64")
+    out[thousands] = s[thousands].str.replace(".", "", regex=False).astype("int64")
+    out[plain] = s[plain].astype("int64")
+    # Phần còn lại (hiếm: "12,5", "1e3"...) dùng float() giống bản gốc
+    if rest.any():
+        out[rest] = s[rest].str.replace(",", ".", regex=False).map(_float_to_int).astype("int64")
+    return out
+
+def clean_staging_frame(df):
+    """
+    Chuẩn hóa DataFrame có các cột của stg_boxoffice_raw, thêm cột *_clean
+    """
+    df["film_name"] = df["film_name"].astype(str).str.strip()
+    df["revenue_clean"] = normalize_revenue_series(df["revenue_raw"])
+    df["tickets_clean"] = normalize_tickets_series(df["tickets_raw"])
+    df["showtimes_clean"] = normalize_showtimes_series(df["showtimes_raw"])
+    df["scraped_date"] = pd.to_datetime(df["scraped_date"]).dt.date
+    return df
+
+def clean_raw_file(raw, cleaned_dir=None, formats=None):
+    """
+    Chuẩn hóa thẳng 1 file raw (không qua bảng staging) và ghi artifact cleaned theo ngày của file,
+    trả về (DataFrame, đường dẫn file cleaned); chạy trong worker process của backfill
+    """
+    scraped_date = get_scraped_date(raw)
+    raw_df = pd.read_csv(raw, encoding="utf-8-sig", dtype=str, keep_default_na=False)
+    df = pd.DataFrame({
+        "film_name": raw_df["Tên phim"],
+        "revenue_raw": raw_df["Doanh thu"],
+        "tickets_raw": raw_df["Vé"],
+        "showtimes_raw": raw_df["Suất chiếu"],
+        "scraped_date": scraped_date,
+        "source": raw_df[RAW_SOURCE_COLUMN] if RAW_SOURCE_COLUMN in raw_df else os.path.basename(raw),
+    })
+    df = clean_staging_frame(df)
+    return df, write_artifact("cleaned", df, scraped_date, cleaned_dir, formats)
+
+@staged("transform")
 def transform_latest_to_csv():
     logging.info("Start transform")
-    cfg = get_db_config("staging")
-    conn = mysql.connector.connect(**cfg)
-    df = pd.read_sql("SELECT * FROM stg_boxoffice_raw ORDER BY id DESC", conn)
-    conn.close()
+    with get_connection("staging") as conn:
+        df = pd.read_sql("SELECT * FROM stg_boxoffice_raw ORDER BY id DESC", conn)
+    record_stage(rows_in=len(df))
 
     if df.empty:
         logging.warning("No data in staging")
         return None
 
-    df["film_name"] = df["film_name"].astype(str).str.strip()
-    df["revenue_clean"] = df["revenue_raw"].apply(normalize_revenue)
-    df["tickets_clean"] = df["tickets_raw"].apply(normalize_tickets)
-    df["showtimes_clean"] = df["showtimes_raw"].apply(normalize_showtimes)
-    df["scraped_date"] = pd.to_datetime(df["scraped_date"]).dt.date
-
-    # --- Lấy thư mục lưu trữ cleaned data từ DB ---
-    cleaned_dir = get_etl_config_from_db("cleaned_data_path") or "data/cleaned"
-    os.makedirs(cleaned_dir, exist_ok=True)
-    today_str = date.today().strftime("%d%m%Y")
-    out_path = os.path.join(cleaned_dir, f"boxoffice_cleaned_{today_str}.csv")
-    df.to_csv(out_path, index=False, encoding="utf-8-sig")
-    logging.info(f"Wrote cleaned CSV: {out_path}")
-
-    # push logs vào db_control
-    try:
-        push_log_file_to_db(log_file, get_db_config("control"))
-    except Exception:
-        logging.exception("Push log failed")
+    df = clean_staging_frame(df)
+    # --- Thư mục + format lưu trữ cleaned data lấy từ db_control ---
+    out_path = write_artifact("cleaned", df, date.today())
+    logging.info(f"Wrote cleaned data: {out_path}")
+    record_stage(rows_out=len(df), bytes_written=file_size(out_path))
 
     return df
 
 if __name__ == "__main__":
+    setup_logging()
     transform_latest_to_csv()
\ No newline at end of file
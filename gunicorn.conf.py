@@ -0,0 +1,10 @@
+# gunicorn.conf.py
+# gunicorn tự nạp file này khi chạy trong thư mục dự án: gunicorn -w 4 --threads 8 wsgi:application
+# Các tham số bind / workers / threads vẫn truyền qua dòng lệnh như bình thường
+
+
+def post_worker_init(worker):
+    # Chạy trong từng worker sau khi fork và nạp wsgi:application: pool và cache là của riêng worker
+    from utils.db_connection import load_config
+    from wsgi import prepare_worker
+    prepare_worker(worker.cfg.threads, load_config().get("server", {}).get("warm_up", True))
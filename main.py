@@ -2,93 +2,168 @@
 import sys
 import os
 import logging
-from datetime import datetime
+import argparse
+import importlib
+from functools import lru_cache
 
 # --- Thiết lập project root ---
 project_root = os.path.abspath(os.path.dirname(__file__))
 sys.path.insert(0, project_root)
 
 # Utils
-from utils.db_connection import get_db_config, get_etl_config_from_db
-from utils.log_to_db import push_log_file_to_db
-
-# ETL Steps
-from etl.extract_data import scrape_to_csv
-from etl.load_staging import run_staging_load
-from etl.transform_data import transform_latest_to_csv
-from etl.load_datawarehouse import run_warehouse_load
-from etl.aggregate_data import aggregate_for_datamart
-from etl.load_datamart import load_to_datamart
-
-# --- Logger chung cho main ---
-log_dir = get_etl_config_from_db("etl_log_path") or "logs/main"
-os.makedirs(log_dir, exist_ok=True)
-log_file = os.path.join(log_dir, f"etl_pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-
+from utils.db_connection import get_config_stats
+from utils.db_pool import get_pool_stats
+from utils.browser_pool import get_browser_stats
+from utils.http_fetch import get_http_stats
+from utils.log_to_db import flush_db_logs
+from utils.log_setup import configure_logging
+from utils.dag import Stage, Pipeline
+from utils.file_manifest import record_file
+from utils.stage_metrics import new_run, get_run_metrics, set_profile_stages
+
+# --- Logger chung cho main (file log tạo trong setup_logging khi pipeline chạy) ---
 logger = logging.getLogger("ETL_Pipeline")
-logger.setLevel(logging.INFO)
-logger.handlers = []
-
-file_handler = logging.FileHandler(log_file, encoding="utf-8")
-formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-logger.addHandler(logging.StreamHandler())
 
-def run_full_etl():
-    logger.info("Starting full ETL pipeline")
+def setup_logging():
+    return configure_logging("etl_pipeline", "logs/main", config_key="etl_log_path", logger_name="ETL_Pipeline")
+
+# --- ETL Steps: module của mỗi bước chỉ được import khi bước đó chạy ---
+# (pandas / selenium / bs4 không bị nạp khi chỉ chạy --help, --only 1 bước hay bỏ qua extract)
+def etl_module(name):
+    """
+    Import etl.<name> và tạo file log của bước đó (lần đầu)
+    """
+    module = importlib.import_module(f"etl.{name}")
+    module.setup_logging()
+    return module
+
+# --- Các bước của pipeline dưới dạng DAG ---
+def stage_extract():
+    return etl_module("extract_data").scrape_to_csv()
+
+def stage_staging(raw_file):
+    etl_module("load_staging").run_staging_load(raw_file)
+    return True
+
+def stage_transform(staged):
+    return etl_module("transform_data").transform_latest_to_csv()
+
+def stage_warehouse(cleaned_df, raw_file):
+    if cleaned_df is None:
+        logger.warning("No cleaned data, skip warehouse load")
+        return False
+    inserted = etl_module("load_datawarehouse").run_warehouse_load(cleaned_df)
+    # Đánh dấu file raw đã nạp để backfill bỏ qua nếu nội dung không đổi
+    if raw_file:
+        record_file(raw_file, row_count=inserted)
+    return True
+
+def stage_aggregate(warehouse_loaded):
+    daily_df, top_df, watermark = etl_module("aggregate_data").compute_aggregates()
+    logger.info(f"Aggregate finished: {len(daily_df) if daily_df is not None else 0} daily rows, "
+                f"{len(top_df) if top_df is not None else 0} top movie rows")
+    return daily_df, top_df, watermark
+
+def stage_write_aggregates(daily_df, top_df, watermark):
+    if daily_df is None or top_df is None:
+        logger.warning("No aggregate data, skip writing aggregate CSV")
+        return None
+    return etl_module("aggregate_data").write_aggregates(daily_df, top_df, watermark)
+
+def stage_datamart(daily_df, top_df):
+    if daily_df is None or top_df is None:
+        logger.warning("No aggregate data, skip datamart load")
+        return False
+    etl_module("load_datamart").load_to_datamart(daily_df, top_df)
+    return True
+
+@lru_cache(maxsize=1)
+def _latest_aggregates():
+    return etl_module("aggregate_data").read_latest_aggregates()
+
+# Ghi CSV aggregate và load datamart chỉ phụ thuộc kết quả aggregate nên chạy song song
+STAGES = [
+    Stage("extract", stage_extract, outputs=["raw_file"], retries=2, retry_delay=10),
+    Stage("staging", stage_staging, inputs=["raw_file"], outputs=["staged"]),
+    Stage("transform", stage_transform, inputs=["staged"], outputs=["cleaned_df"]),
+    Stage("warehouse", stage_warehouse, inputs=["cleaned_df", "raw_file"], outputs=["warehouse_loaded"]),
+    Stage("aggregate", stage_aggregate, inputs=["warehouse_loaded"],
+          outputs=["daily_df", "top_df", "aggregate_watermark"]),
+    Stage("write_aggregates", stage_write_aggregates, inputs=["daily_df", "top_df", "aggregate_watermark"],
+          outputs=["aggregate_files"]),
+    Stage("datamart", stage_datamart, inputs=["daily_df", "top_df"], outputs=["datamart_loaded"]),
+]
+
+# Khi resume (--from-step/--only), artifact của bước trước được lấy lại từ đĩa/DB
+DISK_LOADERS = {
+    "raw_file": lambda: etl_module("load_staging").get_latest_raw_file(),
+    "staged": lambda: True,
+    "cleaned_df": lambda: etl_module("load_datawarehouse").read_latest_cleaned(),
+    "warehouse_loaded": lambda: True,
+    "daily_df": lambda: _latest_aggregates()[0],
+    "top_df": lambda: _latest_aggregates()[1],
+    "aggregate_watermark": lambda: None,
+}
+
+def run_full_etl(from_step=None, only=None, max_workers=4):
+    setup_logging()
+    run_id = new_run("main")
+    logger.info(f"Starting full ETL pipeline (run {run_id})")
+    pipeline = Pipeline(STAGES, DISK_LOADERS, max_workers=max_workers, logger=logger)
 
     try:
-        # 1. Extract
-        logger.info("Step 1: Extract data")
-        raw_file = scrape_to_csv()
-        logger.info(f"Extract finished: {raw_file}")
-
-        # 2️. Load staging
-        logger.info("Step 2: Load staging")
-        run_staging_load()
-        logger.info("Staging load finished")
-
-        # 3️. Transform
-        logger.info("Step 3: Transform data")
-        cleaned_df = transform_latest_to_csv()
-        logger.info(f"Transform finished, {len(cleaned_df) if cleaned_df is not None else 0} rows processed")
-
-        # 4️. Load warehouse
-        logger.info("Step 4: Load warehouse")
-        run_warehouse_load()
-        logger.info("Warehouse load finished")
-
-        # 5️. Aggregate data
-        logger.info("Step 5: Aggregate data")
-        daily_df, top_df = aggregate_for_datamart()
-        logger.info(f"Aggregate finished: {len(daily_df) if daily_df is not None else 0} daily rows, "
-                    f"{len(top_df) if top_df is not None else 0} top movie rows")
-
-        # 6️. Load datamart
-        logger.info("Step 6: Load datamart")
-        load_to_datamart()
-        logger.info("Datamart load finished")
+        pipeline.run(from_step=from_step, only=only)
 
     except Exception as e:
         logger.exception(f"ETL pipeline failed: {e}")
 
     finally:
-        # Push log vào db_control
-        try:
-            for handler in logger.handlers:
-                if isinstance(handler, logging.FileHandler):
-                    handler.flush()
-            if os.path.exists(log_file):
-                push_log_file_to_db(log_file, get_db_config("control"))
-                logger.info("Pushed main ETL log to db_control successfully")
-            else:
-                logger.warning(f"Log file not found for push: {log_file}")
-        except Exception:
-            logger.exception("Push main ETL log to db_control failed")
-
+        for name, elapsed in pipeline.timings.items():
+            logger.info(f"Timing {name}: {elapsed:.2f}s")
+        # Số đo chi tiết từng stage (đã lưu vào db_control.etl_run_metrics)
+        for metrics in get_run_metrics(run_id):
+            logger.info(metrics.summary())
+
+    stats = get_config_stats()
+    logger.info(f"Config stats: {stats['json_loads']} json loads, "
+                f"{stats['db_queries']} etl_config queries, {stats['cache_hits']} cache hits")
+    for db_key, pool_stats in get_pool_stats().items():
+        logger.info(f"Pool {db_key}: {pool_stats['borrows']} borrows, {pool_stats['hits']} hits, "
+                    f"{pool_stats['creations']} creations, {pool_stats['waits']} waits "
+                    f"({pool_stats['wait_time']:.3f}s)")
+    browser_stats = get_browser_stats()
+    if browser_stats:
+        logger.info(f"Browser pool: {browser_stats['pages']} pages, {browser_stats['creations']} launches "
+                    f"({browser_stats['startup_time']:.2f}s), navigation {browser_stats['navigation_time']:.2f}s, "
+                    f"render {browser_stats['render_time']:.2f}s, {browser_stats['render_timeouts']} render timeouts")
+    http_stats = get_http_stats()
+    if http_stats["requests"]:
+        logger.info(f"HTTP fetch: {http_stats['requests']} requests, {http_stats['not_modified']} not modified, "
+                    f"{http_stats['bytes_downloaded']} bytes in {http_stats['fetch_time']:.2f}s")
     logger.info("=== ETL pipeline finished ===")
 
+    # Log đã được ghi dần vào db_control trong lúc chạy, chỉ chờ thread nền ghi nốt phần cuối
+    flush_db_logs()
+
 
 if __name__ == "__main__":
-    run_full_etl()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="BoxOffice VN ETL pipeline")
+    parser.add_argument("--from-step", choices=[s.name for s in STAGES],
+                        help="Chạy từ bước này trở đi, dùng lại artifact trên đĩa của các bước trước")
+    parser.add_argument("--only", help="Chỉ chạy các bước liệt kê (phân tách bằng dấu phẩy)")
+    parser.add_argument("--workers", type=int, default=4, help="Số thread chạy các bước độc lập")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Nạp mọi file raw chưa xử lý (song song) rồi chạy aggregate + datamart")
+    parser.add_argument("--profile", help="Chạy các stage liệt kê (phân tách bằng dấu phẩy, hoặc all) dưới "
+                                          "profiler, ghi đè etl_config.profile_stages")
+    args = parser.parse_args()
+    setup_logging()
+    if args.profile:
+        set_profile_stages(s.strip() for s in args.profile.split(","))
+    if args.backfill:
+        etl_module("backfill").run_backfill()
+        run_full_etl(from_step="aggregate", max_workers=args.workers)
+        sys.exit(0)
+    run_full_etl(from_step=args.from_step,
+                 only=args.only.split(",") if args.only else None,
+                 max_workers=args.workers)
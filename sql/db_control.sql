@@ -33,8 +33,32 @@ CREATE TABLE `etl_config`  (
 -- Records of etl_config
 -- ----------------------------
 INSERT INTO `etl_config` VALUES ('aggregate_data_path', 'data/aggregate', 'Thư mục lưu trữ dữ liệu tổng hợp', '2025-11-22 20:14:42');
+INSERT INTO `etl_config` VALUES ('aggregate_engine', 'pandas', 'Engine tổng hợp datamart: pandas hoặc sql (group by trong MySQL)', '2025-11-22 20:14:42');
+INSERT INTO `etl_config` VALUES ('aggregate_mode', 'incremental', 'Chế độ tổng hợp datamart: incremental hoặc full', '2025-11-22 20:14:42');
+INSERT INTO `etl_config` VALUES ('artifact_format', 'csv', 'Format file trung gian cleaned/aggregate: csv, parquet, arrow; nhiều format cách nhau dấu phẩy, format đầu dùng khi đọc', '2025-11-22 20:14:42');
 INSERT INTO `etl_config` VALUES ('cleaned_data_path', 'data/cleaned', 'Thư mục lưu trữ dữ liệu đã làm sạch', '2025-11-22 20:14:42');
+INSERT INTO `etl_config` VALUES ('extract_strategy', 'auto', 'Cách extract: auto (HTTP + lxml, không có bảng thì dùng browser), http, browser hoặc crawl (tải song song mọi nguồn đã đăng ký)', '2025-11-22 20:14:42');
+INSERT INTO `etl_config` VALUES ('http_cache_path', 'data/http_cache', 'Thư mục lưu trang đã tải + ETag/Last-Modified cho conditional request', '2025-11-22 20:14:42');
+INSERT INTO `etl_config` VALUES ('html_parser', 'lxml', 'Parser bảng HTML khi extract: lxml (XPath, nhanh) hoặc bs4 (BeautifulSoup html.parser)', '2025-11-22 20:14:42');
+INSERT INTO `etl_config` VALUES ('profile_backend', 'cprofile', 'Profiler cho các stage trong profile_stages: cprofile (file .prof, xem bằng python -m pstats) hoặc pyinstrument (file .html)', '2025-11-22 20:14:42');
+INSERT INTO `etl_config` VALUES ('profile_path', 'logs/profile', 'Thư mục ghi file profile của từng stage', '2025-11-22 20:14:42');
+INSERT INTO `etl_config` VALUES ('profile_stages', '', 'Các stage chạy dưới profiler (phân tách bằng dấu phẩy, all = mọi stage, rỗng = tắt)', '2025-11-22 20:14:42');
 INSERT INTO `etl_config` VALUES ('raw_data_path', 'data/raw', 'Thư mục lưu trữ dữ liệu thô', '2025-11-22 20:14:42');
+INSERT INTO `etl_config` VALUES ('staging_load_method', 'chunked', 'Cách nạp staging: chunked (INSERT theo batch, mặc định) hoặc load_data (opt-in: LOAD DATA LOCAL INFILE trên 1 kết nối riêng chỉ được đọc thư mục file raw, cần local_infile=ON trên server)', '2025-11-22 20:14:42');
+
+-- ----------------------------
+-- Table structure for etl_file_manifest
+-- ----------------------------
+DROP TABLE IF EXISTS `etl_file_manifest`;
+CREATE TABLE `etl_file_manifest`  (
+  `file_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `file_path` varchar(500) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NULL DEFAULT NULL,
+  `checksum` char(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `file_size` bigint NULL DEFAULT NULL,
+  `row_count` int NULL DEFAULT NULL,
+  `processed_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  PRIMARY KEY (`file_name`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
 
 -- ----------------------------
 -- Table structure for etl_log
@@ -54,4 +78,60 @@ CREATE TABLE `etl_log`  (
 -- Records of etl_log
 -- ----------------------------
 
+-- ----------------------------
+-- Table structure for etl_log_offset
+-- ----------------------------
+DROP TABLE IF EXISTS `etl_log_offset`;
+CREATE TABLE `etl_log_offset`  (
+  `source_file` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL,
+  `byte_offset` bigint NOT NULL DEFAULT 0,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`source_file`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_general_ci ROW_FORMAT = DYNAMIC;
+
+-- ----------------------------
+-- Table structure for etl_run_metrics
+-- ----------------------------
+DROP TABLE IF EXISTS `etl_run_metrics`;
+CREATE TABLE `etl_run_metrics`  (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `run_id` varchar(40) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `entry_point` varchar(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `stage` varchar(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `parent_stage` varchar(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NULL DEFAULT NULL,
+  `status` varchar(20) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `started_at` datetime NOT NULL,
+  `finished_at` datetime NOT NULL,
+  `wall_time` double NOT NULL,
+  `cpu_time` double NOT NULL,
+  `rows_in` bigint NOT NULL DEFAULT 0,
+  `rows_out` bigint NOT NULL DEFAULT 0,
+  `bytes_read` bigint NOT NULL DEFAULT 0,
+  `bytes_written` bigint NOT NULL DEFAULT 0,
+  `db_round_trips` int NOT NULL DEFAULT 0,
+  `peak_rss_bytes` bigint NULL DEFAULT NULL,
+  `profile_path` varchar(500) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NULL DEFAULT NULL,
+  `error` text CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NULL,
+  `created_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  PRIMARY KEY (`id`) USING BTREE,
+  INDEX `idx_run_metrics_run`(`run_id` ASC) USING BTREE,
+  INDEX `idx_run_metrics_stage`(`stage` ASC, `started_at` ASC) USING BTREE
+) ENGINE = InnoDB AUTO_INCREMENT = 1 CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
+
+-- ----------------------------
+-- Records of etl_run_metrics
+-- ----------------------------
+
+-- ----------------------------
+-- Table structure for etl_watermark
+-- ----------------------------
+DROP TABLE IF EXISTS `etl_watermark`;
+CREATE TABLE `etl_watermark`  (
+  `name` varchar(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `value` bigint NULL DEFAULT NULL,
+  `state_path` varchar(500) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NULL DEFAULT NULL,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`name`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
+
 SET FOREIGN_KEY_CHECKS = 1;
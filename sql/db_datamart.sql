@@ -17,42 +17,138 @@
 SET NAMES utf8mb4;
 SET FOREIGN_KEY_CHECKS = 0;
 
+-- ----------------------------
+-- Table structure for dm_api_payload
+-- ----------------------------
+DROP TABLE IF EXISTS `dm_api_payload`;
+CREATE TABLE `dm_api_payload`  (
+  `payload_key` varchar(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `version` bigint NOT NULL,
+  `etag` varchar(40) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `body` longblob NOT NULL,
+  `body_gzip` longblob NULL,
+  `created_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  PRIMARY KEY (`payload_key`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
+
+-- ----------------------------
+-- Records of dm_api_payload
+-- ----------------------------
+
 -- ----------------------------
 -- Table structure for dm_daily_revenue
 -- ----------------------------
 DROP TABLE IF EXISTS `dm_daily_revenue`;
 CREATE TABLE `dm_daily_revenue`  (
   `id` int NOT NULL AUTO_INCREMENT,
-  `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NULL DEFAULT NULL,
+  `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NULL DEFAULT NULL,
   `full_date` date NULL DEFAULT NULL,
   `revenue_vnd` bigint NULL DEFAULT NULL,
   `tickets_sold` int NULL DEFAULT NULL,
   `showtimes` int NULL DEFAULT NULL,
   `created_at` timestamp NOT NULL DEFAULT current_timestamp(),
-  PRIMARY KEY (`id`) USING BTREE
+  PRIMARY KEY (`id`) USING BTREE,
+  UNIQUE INDEX `uq_daily_movie_date`(`movie_name` ASC, `full_date` ASC) USING BTREE,
+  INDEX `idx_daily_date_movie`(`full_date` ASC, `movie_name` ASC) USING BTREE
 ) ENGINE = InnoDB AUTO_INCREMENT = 1 CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
 
 -- ----------------------------
 -- Records of dm_daily_revenue
 -- ----------------------------
 
+-- ----------------------------
+-- Table structure for dm_movie_leaderboard
+-- ----------------------------
+DROP TABLE IF EXISTS `dm_movie_leaderboard`;
+CREATE TABLE `dm_movie_leaderboard`  (
+  `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+  `total_revenue` bigint NOT NULL,
+  `total_tickets` bigint NOT NULL,
+  `total_showtimes` int NOT NULL,
+  `ranking` int NOT NULL,
+  `snapshot_date` date NOT NULL,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`movie_name`) USING BTREE,
+  INDEX `idx_leaderboard_ranking`(`ranking` ASC) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
+
+-- ----------------------------
+-- Records of dm_movie_leaderboard
+-- ----------------------------
+
+-- ----------------------------
+-- Table structure for dm_monthly_revenue
+-- ----------------------------
+DROP TABLE IF EXISTS `dm_monthly_revenue`;
+CREATE TABLE `dm_monthly_revenue`  (
+  `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+  `month_start` date NOT NULL,
+  `revenue_vnd` bigint NOT NULL,
+  `tickets_sold` bigint NOT NULL,
+  `showtimes` int NOT NULL,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`movie_name`, `month_start`) USING BTREE,
+  INDEX `idx_monthly_start_movie`(`month_start` ASC, `movie_name` ASC) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
+
+-- ----------------------------
+-- Records of dm_monthly_revenue
+-- ----------------------------
+
 -- ----------------------------
 -- Table structure for dm_top_movies
 -- ----------------------------
 DROP TABLE IF EXISTS `dm_top_movies`;
 CREATE TABLE `dm_top_movies`  (
   `id` int NOT NULL AUTO_INCREMENT,
-  `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NULL DEFAULT NULL,
+  `snapshot_date` date NOT NULL,
+  `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NULL DEFAULT NULL,
   `total_revenue` bigint NULL DEFAULT NULL,
   `total_tickets` int NULL DEFAULT NULL,
   `total_showtimes` int NULL DEFAULT NULL,
   `ranking` int NULL DEFAULT NULL,
   `created_at` timestamp NOT NULL DEFAULT current_timestamp(),
-  PRIMARY KEY (`id`) USING BTREE
+  PRIMARY KEY (`id`) USING BTREE,
+  UNIQUE INDEX `uq_top_snapshot_movie`(`snapshot_date` ASC, `movie_name` ASC) USING BTREE,
+  INDEX `idx_top_snapshot_ranking`(`snapshot_date` ASC, `ranking` ASC) USING BTREE
 ) ENGINE = InnoDB AUTO_INCREMENT = 1 CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
 
 -- ----------------------------
 -- Records of dm_top_movies
 -- ----------------------------
 
+-- ----------------------------
+-- Table structure for dm_weekly_revenue
+-- ----------------------------
+DROP TABLE IF EXISTS `dm_weekly_revenue`;
+CREATE TABLE `dm_weekly_revenue`  (
+  `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+  `week_start` date NOT NULL,
+  `revenue_vnd` bigint NOT NULL,
+  `tickets_sold` bigint NOT NULL,
+  `showtimes` int NOT NULL,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`movie_name`, `week_start`) USING BTREE,
+  INDEX `idx_weekly_start_movie`(`week_start` ASC, `movie_name` ASC) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
+
+-- ----------------------------
+-- Records of dm_weekly_revenue
+-- ----------------------------
+
+-- ----------------------------
+-- Table structure for dm_version
+-- ----------------------------
+DROP TABLE IF EXISTS `dm_version`;
+CREATE TABLE `dm_version`  (
+  `id` tinyint NOT NULL,
+  `version` bigint NOT NULL,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
+
+-- ----------------------------
+-- Records of dm_version
+-- ----------------------------
+
 SET FOREIGN_KEY_CHECKS = 1;
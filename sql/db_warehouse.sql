@@ -41,11 +41,12 @@ CREATE TABLE `dim_date`  (
 DROP TABLE IF EXISTS `dim_movie`;
 CREATE TABLE `dim_movie`  (
   `movie_key` int NOT NULL AUTO_INCREMENT,
-  `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NULL DEFAULT NULL,
+  `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NULL DEFAULT NULL,
   `genre` varchar(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NULL DEFAULT NULL,
   `release_date` date NULL DEFAULT NULL,
   `country` varchar(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NULL DEFAULT NULL,
-  PRIMARY KEY (`movie_key`) USING BTREE
+  PRIMARY KEY (`movie_key`) USING BTREE,
+  UNIQUE INDEX `uq_movie_name`(`movie_name` ASC) USING BTREE
 ) ENGINE = InnoDB AUTO_INCREMENT = 1 CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
 
 -- ----------------------------
@@ -0,0 +1,62 @@
+/*
+ Migration cho db_datamart đã có dữ liệu (tạo trước khi có API đọc payload / rollup)
+ - Tạo dm_version, dm_api_payload và các bảng rollup / leaderboard mà API đọc: web process chỉ đọc,
+   không tự chạy DDL (user dashboard không có quyền CREATE)
+ - Thêm index (full_date, movie_name) cho truy vấn theo khoảng ngày / phân trang keyset của API
+ Chạy được nhiều lần (IF NOT EXISTS). Sau migration chạy 1 lần load datamart để ghi version, payload và rollup
+*/
+
+USE db_datamart;
+
+CREATE TABLE IF NOT EXISTS `dm_version`  (
+  `id` tinyint NOT NULL,
+  `version` bigint NOT NULL,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
+
+CREATE TABLE IF NOT EXISTS `dm_api_payload`  (
+  `payload_key` varchar(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `version` bigint NOT NULL,
+  `etag` varchar(40) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `body` longblob NOT NULL,
+  `body_gzip` longblob NULL,
+  `created_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  PRIMARY KEY (`payload_key`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
+
+CREATE TABLE IF NOT EXISTS `dm_weekly_revenue`  (
+  `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+  `week_start` date NOT NULL,
+  `revenue_vnd` bigint NOT NULL,
+  `tickets_sold` bigint NOT NULL,
+  `showtimes` int NOT NULL,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`movie_name`, `week_start`) USING BTREE,
+  INDEX `idx_weekly_start_movie`(`week_start` ASC, `movie_name` ASC) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
+
+CREATE TABLE IF NOT EXISTS `dm_monthly_revenue`  (
+  `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+  `month_start` date NOT NULL,
+  `revenue_vnd` bigint NOT NULL,
+  `tickets_sold` bigint NOT NULL,
+  `showtimes` int NOT NULL,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`movie_name`, `month_start`) USING BTREE,
+  INDEX `idx_monthly_start_movie`(`month_start` ASC, `movie_name` ASC) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
+
+CREATE TABLE IF NOT EXISTS `dm_movie_leaderboard`  (
+  `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+  `total_revenue` bigint NOT NULL,
+  `total_tickets` bigint NOT NULL,
+  `total_showtimes` int NOT NULL,
+  `ranking` int NOT NULL,
+  `snapshot_date` date NOT NULL,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`movie_name`) USING BTREE,
+  INDEX `idx_leaderboard_ranking`(`ranking` ASC) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_unicode_ci ROW_FORMAT = Dynamic;
+
+CREATE INDEX IF NOT EXISTS `idx_daily_date_movie` ON dm_daily_revenue (`full_date`, `movie_name`);
@@ -0,0 +1,17 @@
+/*
+ Migration cho db_datamart đã có bảng rollup / leaderboard (do ensure_rollup_tables tạo với collation mặc định)
+ - movie_name của khóa chính chuyển sang utf8mb4_bin: với utf8mb4_unicode_ci 2 phim chỉ khác dấu / hoa thường
+   ("Ma" / "Mà") dùng chung 1 dòng và upsert ghi đè doanh thu của nhau
+ - Bảng rollup được tính lại toàn bộ ở mỗi lần load datamart: lần load sau migration ghi lại đúng từng phim
+*/
+
+USE db_datamart;
+
+ALTER TABLE dm_weekly_revenue
+  MODIFY COLUMN `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL;
+
+ALTER TABLE dm_monthly_revenue
+  MODIFY COLUMN `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL;
+
+ALTER TABLE dm_movie_leaderboard
+  MODIFY COLUMN `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL;
@@ -0,0 +1,38 @@
+/*
+ Migration cho db_datamart đã có dữ liệu (trước khi load_to_datamart chuyển sang upsert)
+ - Xóa dòng trùng trong dm_daily_revenue, giữ dòng mới nhất theo (movie_name, full_date)
+ - Thêm snapshot_date cho dm_top_movies (dòng cũ lấy theo ngày created_at), giữ dòng mới nhất mỗi (snapshot_date, movie_name)
+ - Tạo unique index cho khóa tự nhiên
+ movie_name được chuyển sang utf8mb4_bin trước khi xóa dòng trùng: với utf8mb4_unicode_ci 2 phim chỉ khác dấu /
+ hoa thường ("Ma" / "Mà") bị coi là trùng (bị xóa) và upsert ghi đè doanh thu của nhau.
+ DB đã chạy bản trước của file này: chỉ cần chạy 2 câu MODIFY COLUMN ngay dưới đây
+*/
+
+USE db_datamart;
+
+ALTER TABLE dm_daily_revenue
+  MODIFY COLUMN `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NULL DEFAULT NULL;
+
+ALTER TABLE dm_top_movies
+  MODIFY COLUMN `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NULL DEFAULT NULL;
+
+DELETE d1 FROM dm_daily_revenue d1
+JOIN dm_daily_revenue d2
+  ON d1.movie_name = d2.movie_name AND d1.full_date = d2.full_date AND d1.id < d2.id;
+
+ALTER TABLE dm_daily_revenue
+  ADD UNIQUE INDEX `uq_daily_movie_date`(`movie_name` ASC, `full_date` ASC) USING BTREE;
+
+ALTER TABLE dm_top_movies
+  ADD COLUMN `snapshot_date` date NULL DEFAULT NULL AFTER `id`;
+
+UPDATE dm_top_movies SET snapshot_date = DATE(created_at) WHERE snapshot_date IS NULL;
+
+DELETE t1 FROM dm_top_movies t1
+JOIN dm_top_movies t2
+  ON t1.snapshot_date = t2.snapshot_date AND t1.movie_name = t2.movie_name AND t1.id < t2.id;
+
+ALTER TABLE dm_top_movies
+  MODIFY COLUMN `snapshot_date` date NOT NULL,
+  ADD UNIQUE INDEX `uq_top_snapshot_movie`(`snapshot_date` ASC, `movie_name` ASC) USING BTREE,
+  ADD INDEX `idx_top_snapshot_ranking`(`snapshot_date` ASC, `ranking` ASC) USING BTREE;
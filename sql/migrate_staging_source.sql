@@ -0,0 +1,10 @@
+/*
+ Migration cho db_staging đã có sẵn (bắt buộc trước khi chạy crawler)
+ - Cột source lưu URL trang chứa dòng dữ liệu (trước đây là tên file raw): nới từ varchar(100) lên varchar(255),
+   không thì URL dài bị cắt (hoặc INSERT bị từ chối ở strict mode)
+*/
+
+USE db_staging;
+
+ALTER TABLE stg_boxoffice_raw
+  MODIFY COLUMN `source` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NULL DEFAULT NULL;
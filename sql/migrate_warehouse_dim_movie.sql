@@ -0,0 +1,26 @@
+/*
+ Migration cho db_warehouse đã có dữ liệu (bắt buộc trước khi chạy run_warehouse_load bản nạp dim_movie hàng loạt)
+ - movie_name so sánh nhị phân (utf8mb4_bin): với utf8mb4_unicode_ci "Ma" / "Mà" hay "Mai" / "MAI" là cùng 1 khóa
+   nên INSERT IGNORE bỏ mất tên sau
+ - Gộp các dòng trùng đúng từng byte tên phim: fact_revenue trỏ về movie_key nhỏ nhất, xóa các dòng còn lại
+ - Tạo unique index cho movie_name (DB tạo từ db_warehouse.sql mới đã có index: câu cuối không làm gì)
+*/
+
+USE db_warehouse;
+
+ALTER TABLE dim_movie
+  MODIFY COLUMN `movie_name` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NULL DEFAULT NULL;
+
+UPDATE fact_revenue f
+JOIN dim_movie m ON f.movie_key = m.movie_key
+JOIN (SELECT movie_name, MIN(movie_key) AS keep_key FROM dim_movie
+      WHERE movie_name IS NOT NULL GROUP BY movie_name) k ON k.movie_name = m.movie_name
+SET f.movie_key = k.keep_key
+WHERE f.movie_key <> k.keep_key;
+
+DELETE m1 FROM dim_movie m1
+JOIN dim_movie m2
+  ON m1.movie_name = m2.movie_name AND m1.movie_key > m2.movie_key;
+
+ALTER TABLE dim_movie
+  ADD UNIQUE INDEX IF NOT EXISTS `uq_movie_name`(`movie_name` ASC) USING BTREE;
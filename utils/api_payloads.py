@@ -0,0 +1,136 @@
+# utils/api_payloads.py
+import gzip
+import json
+import hashlib
+
+# Body nhỏ hơn ngưỡng này gzip không lợi gì
+GZIP_MIN_SIZE = 512
+
+# JSON trả về cho dashboard: câu truy vấn + cách đổi 1 dòng thành object.
+# Dùng chung cho API (khi chưa có payload dựng sẵn) và bước load datamart (dựng sẵn payload)
+PAYLOAD_QUERIES = {
+    "dm_daily_revenue": (
+        """
+        SELECT movie_name, full_date, revenue_vnd, tickets_sold, showtimes
+        FROM dm_daily_revenue
+        ORDER BY full_date ASC, movie_name ASC
+        """,
+        lambda r: {
+            "movie": r[0],
+            "date": str(r[1]),
+            "revenue": int(r[2]),
+            "tickets": int(r[3]),
+            "showtimes": int(r[4]),
+        },
+    ),
+    # Bảng xếp hạng hiện tại do bước load datamart dựng sẵn (utils/rollups.py), đọc theo index ranking
+    "dm_top_movies": (
+        """
+        SELECT movie_name, total_revenue, total_tickets, total_showtimes, ranking
+        FROM dm_movie_leaderboard
+        ORDER BY ranking ASC
+        """,
+        lambda r: {
+            "movie": r[0],
+            "revenue": int(r[1]),
+            "tickets": int(r[2]),
+            "showtimes": int(r[3]),
+            "rank": int(r[4]),
+        },
+    ),
+}
+
+
+def ensure_api_payload_tables(conn):
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS dm_version (
+            id TINYINT PRIMARY KEY,
+            version BIGINT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS dm_api_payload (
+            payload_key VARCHAR(100) PRIMARY KEY,
+            version BIGINT NOT NULL,
+            etag VARCHAR(40) NOT NULL,
+            body LONGBLOB NOT NULL,
+            body_gzip LONGBLOB NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Truy vấn theo khoảng ngày / phân trang keyset của API (MariaDB có IF NOT EXISTS cho index)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_daily_date_movie ON dm_daily_revenue (full_date, movie_name)")
+    cur.close()
+    conn.commit()
+
+
+def serialize(rows):
+    # JSON gọn (không khoảng trắng), giữ nguyên tiếng Việt thay vì \uXXXX
+    return json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def compute_etag(body):
+    # Theo nội dung: data không đổi qua nhiều lần load thì client vẫn nhận 304
+    return hashlib.sha1(body).hexdigest()[:20]
+
+
+def compress(body):
+    return gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_SIZE else None
+
+
+def query_payload(conn, key):
+    sql, to_obj = PAYLOAD_QUERIES[key]
+    cur = conn.cursor()
+    cur.execute(sql)
+    rows = cur.fetchall()
+    cur.close()
+    return serialize([to_obj(r) for r in rows])
+
+
+def get_datamart_version(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT version FROM dm_version WHERE id = 1")
+    row = cur.fetchone()
+    cur.close()
+    return row[0] if row else 0
+
+
+def publish_payloads(conn):
+    """
+    Tăng datamart version và ghi sẵn JSON của mọi payload cho version mới,
+    cùng 1 transaction: API không bao giờ thấy version mới mà thiếu payload.
+    Gọi sau khi đã load xong dữ liệu datamart; trả về version mới
+    """
+    ensure_api_payload_tables(conn)
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO dm_version (id, version) VALUES (1, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1
+    """)
+    version = get_datamart_version(conn)
+    for key in PAYLOAD_QUERIES:
+        body = query_payload(conn, key)
+        cur.execute("""
+            INSERT INTO dm_api_payload (payload_key, version, etag, body, body_gzip)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE version=VALUES(version), etag=VALUES(etag),
+                body=VALUES(body), body_gzip=VALUES(body_gzip)
+        """, (key, version, compute_etag(body), body, compress(body)))
+    conn.commit()
+    cur.close()
+    return version
+
+
+def read_payload(conn, key):
+    """
+    Payload dựng sẵn: trả về (version, etag, body, body_gzip) hoặc None nếu chưa có
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT version, etag, body, body_gzip FROM dm_api_payload WHERE payload_key = %s", (key,))
+    row = cur.fetchone()
+    cur.close()
+    if not row:
+        return None
+    return row[0], row[1], bytes(row[2]), bytes(row[3]) if row[3] is not None else None
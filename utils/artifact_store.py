@@ -0,0 +1,196 @@
+# utils/artifact_store.py
+import os
+import glob
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from utils.db_connection import get_etl_config_from_db
+
+# Schema cố định của artifact mỗi bước: đọc/ghi ở format nào cũng ra cùng kiểu cột
+SCHEMAS = {
+    "cleaned": pa.schema([
+        ("id", pa.int64()),
+        ("film_name", pa.string()),
+        ("revenue_raw", pa.string()),
+        ("tickets_raw", pa.string()),
+        ("showtimes_raw", pa.string()),
+        ("scraped_date", pa.date32()),
+        ("source", pa.string()),
+        ("revenue_clean", pa.int64()),
+        ("tickets_clean", pa.int64()),
+        ("showtimes_clean", pa.int64()),
+    ]),
+    "daily": pa.schema([
+        ("movie_name", pa.string()),
+        ("full_date", pa.date32()),
+        ("revenue_vnd", pa.int64()),
+        ("tickets_sold", pa.int64()),
+        ("showtimes", pa.int64()),
+    ]),
+    "top": pa.schema([
+        ("movie_name", pa.string()),
+        ("revenue_vnd", pa.int64()),
+        ("tickets_sold", pa.int64()),
+        ("showtimes", pa.int64()),
+        ("ranking", pa.int64()),
+    ]),
+}
+
+# stage -> (key thư mục trong etl_config, thư mục mặc định, tiền tố tên file)
+LOCATIONS = {
+    "cleaned": ("cleaned_data_path", "data/cleaned", "boxoffice_cleaned_"),
+    "daily": ("aggregate_data_path", "data/aggregate", "dm_daily_revenue_"),
+    "top": ("aggregate_data_path", "data/aggregate", "dm_top_movies_"),
+}
+
+
+def to_table(df, schema):
+    """
+    Ép DataFrame về đúng schema (thiếu cột -> null, thừa cột -> bỏ)
+    """
+    arrays = []
+    for field in schema:
+        if field.name not in df.columns:
+            arrays.append(pa.nulls(len(df), field.type))
+            continue
+        col = df[field.name]
+        if pa.types.is_date(field.type):
+            parsed = pd.to_datetime(col, errors="coerce")
+            col = parsed.dt.date.astype(object).where(parsed.notna(), None)
+        elif pa.types.is_integer(field.type):
+            col = pd.to_numeric(col, errors="coerce").astype("Int64")
+        elif not pd.api.types.is_string_dtype(col):
+            col = col.astype(object)
+            col = col.where(col.isna(), col.map(str))
+        arrays.append(pa.array(col, type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+class CsvFormat:
+    """CSV utf-8-sig như trước, đọc lại thì ép về schema của stage"""
+    extension = ".csv"
+
+    def write(self, df, path, schema):
+        df.reindex(columns=schema.names).to_csv(path, index=False, encoding="utf-8-sig")
+
+    def read(self, path, schema):
+        strings = {f.name: str for f in schema if pa.types.is_string(f.type)}
+        df = pd.read_csv(path, encoding="utf-8-sig", dtype=strings)
+        return to_table(df, schema)
+
+
+class ParquetFormat:
+    """Parquet nén zstd: nhỏ nhất trên đĩa, đọc nhanh hơn CSV nhiều lần"""
+    extension = ".parquet"
+
+    def __init__(self, compression="zstd"):
+        self.compression = compression
+
+    def write(self, df, path, schema):
+        pq.write_table(to_table(df, schema), path, compression=self.compression)
+
+    def read(self, path, schema):
+        return pq.read_table(path, schema=schema)
+
+
+class ArrowFormat:
+    """
+    Arrow IPC (file format) không nén: đọc bằng memory map, buffer dùng thẳng
+    trên page cache thay vì giải nén/parse
+    """
+    extension = ".arrow"
+
+    def write(self, df, path, schema):
+        table = to_table(df, schema)
+        with pa.OSFile(path, "wb") as sink, ipc.new_file(sink, schema) as writer:
+            writer.write_table(table)
+
+    def read(self, path, schema):
+        with pa.memory_map(path, "r") as source:
+            return ipc.open_file(source).read_all()
+
+
+FORMATS = {
+    "csv": CsvFormat(),
+    "parquet": ParquetFormat(),
+    "arrow": ArrowFormat(),
+}
+
+
+def get_artifact_formats(formats=None):
+    """
+    Danh sách format ghi artifact theo etl_config.artifact_format (vd "csv" hoặc "parquet,csv");
+    format đầu tiên là format chính, dùng khi đọc
+    """
+    formats = formats or get_etl_config_from_db("artifact_format") or "csv"
+    if isinstance(formats, str):
+        formats = [f.strip() for f in formats.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown artifact format(s): {', '.join(unknown)}")
+    return formats
+
+def artifact_dir(stage):
+    config_key, default, _ = LOCATIONS[stage]
+    return get_etl_config_from_db(config_key) or default
+
+def _format_of(path):
+    ext = os.path.splitext(path)[1]
+    for fmt in FORMATS.values():
+        if fmt.extension == ext:
+            return fmt
+    raise ValueError(f"Unknown artifact file type: {path}")
+
+def _stage_of(path):
+    base = os.path.basename(path)
+    for stage, (_, _, prefix) in LOCATIONS.items():
+        if base.startswith(prefix):
+            return stage
+    raise ValueError(f"Unknown artifact stage for file: {path}")
+
+def write_artifact(stage, df, file_date, directory=None, formats=None):
+    """
+    Ghi artifact của stage cho ngày file_date ở mọi format đã cấu hình,
+    trả về đường dẫn file của format chính
+    """
+    directory = directory or artifact_dir(stage)
+    os.makedirs(directory, exist_ok=True)
+    prefix = LOCATIONS[stage][2]
+    paths = []
+    for name in get_artifact_formats(formats):
+        fmt = FORMATS[name]
+        path = os.path.join(directory, f"{prefix}{file_date.strftime('%d%m%Y')}{fmt.extension}")
+        fmt.write(df, path, SCHEMAS[stage])
+        paths.append(path)
+    return paths[0]
+
+def read_artifact(path, stage=None):
+    """
+    Đọc 1 file artifact (format theo đuôi file) thành DataFrame đúng schema của stage
+    """
+    stage = stage or _stage_of(path)
+    return _format_of(path).read(path, SCHEMAS[stage]).to_pandas()
+
+def latest_artifact_path(stage, directory=None, formats=None):
+    """
+    File mới nhất (theo mtime) của stage, ưu tiên format chính rồi tới các format còn lại
+    """
+    directory = directory or artifact_dir(stage)
+    prefix = LOCATIONS[stage][2]
+    order = list(get_artifact_formats(formats))
+    order += [name for name in FORMATS if name not in order]
+    for name in order:
+        files = glob.glob(os.path.join(directory, f"{prefix}*{FORMATS[name].extension}"))
+        if files:
+            return max(files, key=os.path.getmtime)
+    return None
+
+def sibling_artifact_path(path, stage):
+    """
+    File cùng ngày, cùng format của stage khác (vd top movies đi kèm daily revenue)
+    """
+    base = os.path.basename(path)
+    suffix = base[len(LOCATIONS[_stage_of(path)][2]):]
+    return os.path.join(os.path.dirname(path), LOCATIONS[stage][2] + suffix)
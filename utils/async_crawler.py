@@ -0,0 +1,152 @@
+# utils/async_crawler.py
+import time
+import random
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+from utils.db_connection import load_config
+from utils.http_fetch import fetch_conditional, DEFAULT_HTTP_TIMEOUT
+
+# Giá trị mặc định nếu db_config.json không có mục "crawler"
+DEFAULT_CONCURRENCY = 8
+# Khoảng cách tối thiểu (giây) giữa 2 request tới cùng 1 host
+DEFAULT_HOST_INTERVAL = 0.2
+DEFAULT_RETRIES = 3
+# Lần thử lại thứ n chờ backoff * 2^(n-1) giây (+ jitter)
+DEFAULT_BACKOFF = 0.5
+# Lỗi HTTP tạm thời -> thử lại; các mã khác (404...) báo lỗi ngay
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class HostRateLimiter:
+    """
+    Giãn các request tới cùng host cách nhau ít nhất interval giây,
+    các host khác nhau không chờ nhau
+    """
+
+    def __init__(self, interval=DEFAULT_HOST_INTERVAL):
+        self.interval = interval
+        self._next_slot = {}
+
+    async def wait(self, host):
+        # Giữ chỗ trước rồi mới ngủ: không có await giữa đọc và ghi nên không cần lock
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def _retry_after(error):
+    # 429/503 kèm Retry-After (số giây) thì chờ ít nhất chừng đó
+    response = getattr(error, "response", None)
+    if response is None:
+        return 0.0
+    try:
+        return float(response.headers.get("Retry-After", 0))
+    except ValueError:
+        return 0.0
+
+
+def _is_retryable(error):
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in RETRY_STATUS
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+class AsyncCrawler:
+    """
+    Tải nhiều trang đồng thời bằng asyncio: tối đa concurrency request cùng lúc,
+    giới hạn tốc độ theo host, thử lại lỗi tạm thời với backoff tăng dần.
+    Mỗi request (requests + conditional cache của http_fetch) và việc parse chạy trong thread pool
+    riêng cỡ concurrency (executor mặc định của asyncio chỉ có cpu + 4 thread) nên không chặn nhau
+    """
+
+    def __init__(self, parse, cache_dir, concurrency=DEFAULT_CONCURRENCY, host_interval=DEFAULT_HOST_INTERVAL,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, timeout=DEFAULT_HTTP_TIMEOUT):
+        # parse(html, parser_name) -> list dòng hoặc None (không có bảng)
+        self.parse = parse
+        self.cache_dir = cache_dir
+        self.concurrency = concurrency
+        self.host_interval = host_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._executor = None
+        self.stats = {
+            "pages": 0,
+            "not_modified": 0,
+            "retries": 0,
+            "failures": 0,
+            "rows": 0,
+            "bytes": 0,
+            "elapsed": 0.0,
+        }
+
+    async def _in_thread(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _fetch(self, url, limiter):
+        attempt = 0
+        while True:
+            await limiter.wait(urlsplit(url).netloc)
+            try:
+                return await self._in_thread(fetch_conditional, url, self.cache_dir, self.timeout)
+            except requests.RequestException as e:
+                if attempt >= self.retries or not _is_retryable(e):
+                    raise
+                attempt += 1
+                self.stats["retries"] += 1
+                delay = self.backoff * 2 ** (attempt - 1)
+                await asyncio.sleep(max(delay + random.uniform(0, delay / 2), _retry_after(e)))
+
+    async def _crawl_one(self, source, url, file_date, semaphore, limiter):
+        result = {"source": source.name, "url": url, "date": file_date, "rows": None, "error": None}
+        async with semaphore:
+            try:
+                html, info = await self._fetch(url, limiter)
+                result["rows"] = await self._in_thread(self.parse, html, source.parser)
+                self.stats["pages"] += 1
+                self.stats["not_modified"] += int(info["not_modified"])
+                self.stats["bytes"] += info["bytes"]
+                self.stats["rows"] += len(result["rows"] or [])
+            except Exception as e:
+                # 1 trang lỗi không làm hỏng cả lần crawl, bên gọi quyết định xử lý
+                self.stats["failures"] += 1
+                result["error"] = e
+        return result
+
+    async def crawl(self, sources, dates=None):
+        """
+        Tải mọi trang của các nguồn, trả về list kết quả {source, url, date, rows, error}
+        theo thứ tự nguồn/ngày (không theo thứ tự tải xong)
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiter = HostRateLimiter(self.host_interval)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="crawler") as self._executor:
+            results = await asyncio.gather(*(
+                self._crawl_one(source, url, file_date, semaphore, limiter)
+                for source in sources for url, file_date in source.targets(dates)))
+        self._executor = None
+        self.stats["elapsed"] += time.perf_counter() - start
+        return results
+
+    def run(self, sources, dates=None):
+        return asyncio.run(self.crawl(sources, dates))
+
+    def get_stats(self):
+        return dict(self.stats)
+
+
+def crawler_settings():
+    cfg = load_config().get("crawler", {})
+    return {
+        "concurrency": cfg.get("concurrency", DEFAULT_CONCURRENCY),
+        "host_interval": cfg.get("host_interval", DEFAULT_HOST_INTERVAL),
+        "retries": cfg.get("retries", DEFAULT_RETRIES),
+        "backoff": cfg.get("backoff", DEFAULT_BACKOFF),
+    }
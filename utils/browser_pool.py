@@ -0,0 +1,229 @@
+# utils/browser_pool.py
+import time
+import queue
+import atexit
+import threading
+from contextlib import contextmanager
+
+from utils.db_connection import load_config
+
+# Giá trị mặc định nếu db_config.json không có mục "browser"
+DEFAULT_BROWSER_POOL_SIZE = 1
+DEFAULT_BROWSER_TIMEOUT = 60
+# Số trang tối đa 1 browser tải trước khi được khởi động lại (tránh rò bộ nhớ của Chrome)
+DEFAULT_MAX_USES = 50
+DEFAULT_PAGE_LOAD_TIMEOUT = 30
+DEFAULT_RENDER_TIMEOUT = 20
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class BrowserPool:
+    """
+    Pool WebDriver giữ browser ấm giữa các lần extract trong cùng process,
+    thay vì mở/đóng Chrome mỗi lần
+    """
+
+    def __init__(self, factory, size=DEFAULT_BROWSER_POOL_SIZE, timeout=DEFAULT_BROWSER_TIMEOUT,
+                 max_uses=DEFAULT_MAX_USES, page_load_timeout=DEFAULT_PAGE_LOAD_TIMEOUT,
+                 render_timeout=DEFAULT_RENDER_TIMEOUT):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.max_uses = max_uses
+        self.page_load_timeout = page_load_timeout
+        self.render_timeout = render_timeout
+        self._idle = queue.LifoQueue()
+        self._uses = {}
+        self._lock = threading.Lock()
+        self._created = 0
+        self.stats = {
+            "borrows": 0,
+            "hits": 0,
+            "creations": 0,
+            "recycles": 0,
+            "health_failures": 0,
+            "startup_time": 0.0,
+            "pages": 0,
+            "navigation_time": 0.0,
+            "render_time": 0.0,
+            "render_timeouts": 0,
+        }
+
+    def _create(self):
+        start = time.perf_counter()
+        driver = self.factory()
+        driver.set_page_load_timeout(self.page_load_timeout)
+        with self._lock:
+            self.stats["creations"] += 1
+            self.stats["startup_time"] += time.perf_counter() - start
+            self._uses[id(driver)] = 0
+        return driver
+
+    def _is_healthy(self, driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._uses.pop(id(driver), None)
+            self._created -= 1
+
+    def acquire(self):
+        while True:
+            # 1. Ưu tiên browser đang rảnh
+            try:
+                driver = self._idle.get_nowait()
+                hit = True
+            except queue.Empty:
+                driver, hit = None, False
+
+            # 2. Chưa đủ size thì khởi động browser mới
+            if driver is None:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        driver = self._create()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                else:
+                    # 3. Pool đầy -> chờ browser được trả về
+                    try:
+                        driver = self._idle.get(timeout=self.timeout)
+                    except queue.Empty:
+                        raise TimeoutError("Timeout waiting for a browser from the pool")
+                    hit = True
+
+            # 4. Browser bị crash/đóng thì bỏ và lấy cái khác
+            if hit and not self._is_healthy(driver):
+                with self._lock:
+                    self.stats["health_failures"] += 1
+                self._discard(driver)
+                continue
+
+            with self._lock:
+                self.stats["borrows"] += 1
+                if hit:
+                    self.stats["hits"] += 1
+            return driver
+
+    def release(self, driver):
+        with self._lock:
+            self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+            worn_out = self._uses[id(driver)] >= self.max_uses
+            if worn_out:
+                self.stats["recycles"] += 1
+        if worn_out or not self._is_healthy(driver):
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+
+    def fetch(self, url, wait_css="table tbody tr"):
+        """
+        Tải url và chờ tới khi phần tử wait_css xuất hiện (thay cho sleep cố định),
+        trả về (html, timings) với timings = {navigation, render, table_found}
+        """
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        with self.driver() as driver:
+            start = time.perf_counter()
+            driver.get(url)
+            navigation = time.perf_counter() - start
+
+            start = time.perf_counter()
+            found = True
+            try:
+                WebDriverWait(driver, self.render_timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, wait_css)))
+            except TimeoutException:
+                found = False
+            render = time.perf_counter() - start
+            html = driver.page_source
+
+        with self._lock:
+            self.stats["pages"] += 1
+            self.stats["navigation_time"] += navigation
+            self.stats["render_time"] += render
+            if not found:
+                self.stats["render_timeouts"] += 1
+        return html, {"navigation": navigation, "render": render, "table_found": found}
+
+    @contextmanager
+    def driver(self):
+        driver = self.acquire()
+        try:
+            yield driver
+        except Exception:
+            # Lỗi giữa chừng (timeout, trang treo...) -> không trả browser ở trạng thái lạ về pool
+            self._discard(driver)
+            raise
+        else:
+            self.release(driver)
+
+    def close(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["open"] = self._created
+        stats["idle"] = self._idle.qsize()
+        stats["size"] = self.size
+        return stats
+
+
+def _browser_settings():
+    cfg = load_config().get("browser", {})
+    return {
+        "size": cfg.get("size", DEFAULT_BROWSER_POOL_SIZE),
+        "timeout": cfg.get("timeout", DEFAULT_BROWSER_TIMEOUT),
+        "max_uses": cfg.get("max_uses", DEFAULT_MAX_USES),
+        "page_load_timeout": cfg.get("page_load_timeout", DEFAULT_PAGE_LOAD_TIMEOUT),
+        "render_timeout": cfg.get("render_timeout", DEFAULT_RENDER_TIMEOUT),
+    }
+
+
+def get_browser_pool(factory):
+    """
+    Pool browser dùng chung cả process; factory (vd extract_data.get_driver) chỉ dùng lần tạo đầu
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(factory, **_browser_settings())
+            atexit.register(close_browser_pool)
+        return _pool
+
+
+def get_browser_stats():
+    with _pool_lock:
+        return _pool.get_stats() if _pool is not None else None
+
+
+def close_browser_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,149 @@
+# utils/dag.py
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class Stage:
+    """
+    1 bước trong pipeline: khai báo artifact đầu vào (inputs) và đầu ra (outputs)
+
+    func nhận các input theo thứ tự inputs, trả về 1 giá trị (1 output)
+    hoặc tuple cùng số phần tử với outputs
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), retries=0, retry_delay=5):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+
+class StageFailed(Exception):
+    pass
+
+
+class Pipeline:
+    """
+    Chạy các Stage theo đồ thị phụ thuộc artifact, các stage độc lập chạy song song trên thread pool
+
+    disk_loaders: {artifact: hàm không tham số} dùng để lấy artifact từ đĩa/DB
+    khi stage sinh ra nó không nằm trong lần chạy (resume --from-step / --only)
+    """
+
+    def __init__(self, stages, disk_loaders=None, max_workers=4, logger=None):
+        self.stages = {s.name: s for s in stages}
+        self.order = [s.name for s in stages]
+        self.disk_loaders = disk_loaders or {}
+        self.max_workers = max_workers
+        self.logger = logger or logging.getLogger(__name__)
+        self.producer = {}
+        for s in stages:
+            for out in s.outputs:
+                if out in self.producer:
+                    raise ValueError(f"Artifact '{out}' produced by both {self.producer[out]} and {s.name}")
+                self.producer[out] = s.name
+        self.timings = {}
+
+    def upstream(self, name):
+        return {self.producer[i] for i in self.stages[name].inputs if i in self.producer}
+
+    def downstream_closure(self, name):
+        selected = {name}
+        changed = True
+        while changed:
+            changed = False
+            for s in self.order:
+                if s not in selected and self.upstream(s) & selected:
+                    selected.add(s)
+                    changed = True
+        return selected
+
+    def select(self, from_step=None, only=None):
+        if only:
+            names = set(only)
+        elif from_step:
+            names = self.downstream_closure(from_step)
+        else:
+            names = set(self.order)
+        unknown = names - set(self.order)
+        if unknown:
+            raise KeyError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+        return [n for n in self.order if n in names]
+
+    def _run_stage(self, stage, args):
+        attempt = 0
+        while True:
+            attempt += 1
+            start = time.perf_counter()
+            try:
+                result = stage.func(*args)
+                elapsed = time.perf_counter() - start
+                self.timings[stage.name] = elapsed
+                self.logger.info(f"Stage {stage.name} finished in {elapsed:.2f}s (attempt {attempt})")
+                return result
+            except Exception:
+                elapsed = time.perf_counter() - start
+                if attempt > stage.retries:
+                    self.timings[stage.name] = elapsed
+                    self.logger.exception(f"Stage {stage.name} failed after {attempt} attempt(s)")
+                    raise
+                self.logger.warning(f"Stage {stage.name} failed (attempt {attempt}), retrying in {stage.retry_delay}s",
+                                    exc_info=True)
+                time.sleep(stage.retry_delay)
+
+    def _store(self, stage, result, artifacts):
+        if len(stage.outputs) == 1:
+            artifacts[stage.outputs[0]] = result
+        elif stage.outputs:
+            for key, value in zip(stage.outputs, result):
+                artifacts[key] = value
+
+    def run(self, from_step=None, only=None):
+        selected = self.select(from_step, only)
+        artifacts = {}
+
+        # Artifact do stage ngoài phạm vi chạy sinh ra -> nạp lại từ đĩa
+        for name in selected:
+            for inp in self.stages[name].inputs:
+                if inp in artifacts or self.producer.get(inp) in selected:
+                    continue
+                loader = self.disk_loaders.get(inp)
+                if loader is None:
+                    raise KeyError(f"Stage {name} needs artifact '{inp}' but no disk loader is registered")
+                artifacts[inp] = loader()
+                self.logger.info(f"Loaded artifact '{inp}' from disk for stage {name}")
+
+        pending = list(selected)
+        running = {}
+        done = set()
+        self.logger.info(f"Running stages: {', '.join(selected)}")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                # Đưa vào pool mọi stage đã đủ input
+                for name in list(pending):
+                    if all(u in done for u in self.upstream(name) if u in selected):
+                        stage = self.stages[name]
+                        args = [artifacts.get(i) for i in stage.inputs]
+                        self.logger.info(f"Stage {name} started")
+                        running[executor.submit(self._run_stage, stage, args)] = name
+                        pending.remove(name)
+
+                if not running:
+                    raise ValueError(f"Stages blocked by a dependency cycle: {', '.join(pending)}")
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # Không chạy thêm stage mới, chờ các stage đang chạy xong rồi báo lỗi
+                        wait(list(running))
+                        raise StageFailed(f"Stage {name} failed: {e}") from e
+                    self._store(self.stages[name], result, artifacts)
+                    done.add(name)
+
+        return artifacts
@@ -0,0 +1,173 @@
+# utils/daily_revenue_query.py
+import json
+import base64
+from datetime import date, timedelta
+
+from utils.api_payloads import serialize
+from utils.rollups import ROLLUP_TABLES
+
+# Theo ngày (dm_daily_revenue) hoặc theo tuần / tháng (bảng rollup dựng sẵn khi load datamart)
+BUCKETS = ("day",) + tuple(ROLLUP_TABLES)
+# bucket -> (bảng, cột ngày)
+BUCKET_TABLES = {"day": ("dm_daily_revenue", "full_date"), **ROLLUP_TABLES}
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+# Số dòng đọc từ cursor DB mỗi lần khi stream
+FETCH_CHUNK_SIZE = 2000
+
+
+def _parse_date(value, name):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value!r}, expected YYYY-MM-DD")
+
+
+def encode_cursor(item_date, movie):
+    return base64.urlsafe_b64encode(json.dumps([item_date, movie]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        item_date, movie = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return date.fromisoformat(item_date), movie
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def parse_filters(args):
+    """
+    Đọc tham số query (request.args): from, to, movie (lặp lại được), bucket, limit, cursor.
+    Trả về dict filters; tham số sai -> ValueError
+    """
+    filters = {
+        "date_from": _parse_date(args["from"], "from") if args.get("from") else None,
+        "date_to": _parse_date(args["to"], "to") if args.get("to") else None,
+        "movies": sorted(set(args.getlist("movie"))),
+        "bucket": args.get("bucket", "day"),
+        "limit": None,
+        "cursor": decode_cursor(args["cursor"]) if args.get("cursor") else None,
+    }
+    if filters["bucket"] not in BUCKETS:
+        raise ValueError(f"Invalid bucket: {filters['bucket']!r}, expected one of {', '.join(BUCKETS)}")
+    if "limit" in args or "cursor" in args:
+        try:
+            limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            raise ValueError(f"Invalid limit: {args['limit']!r}")
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        filters["limit"] = limit
+    return filters
+
+
+def bucket_start(day, bucket):
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def build_query(filters):
+    """
+    SELECT theo thứ tự (ngày, movie_name) trên bảng của bucket -> chạy theo index (ngày, movie_name);
+    cursor là keyset (ngày, movie_name) của dòng cuối trang trước.
+    Với tuần/tháng, from/to chọn các bucket giao với khoảng ngày (mỗi bucket là tổng cả tuần/tháng)
+    """
+    table, date_col = BUCKET_TABLES[filters["bucket"]]
+    where, params = [], []
+    if filters["date_from"]:
+        where.append(f"{date_col} >= %s")
+        params.append(bucket_start(filters["date_from"], filters["bucket"]))
+    if filters["date_to"]:
+        where.append(f"{date_col} <= %s")
+        params.append(filters["date_to"])
+    if filters["movies"]:
+        where.append(f"movie_name IN ({', '.join(['%s'] * len(filters['movies']))})")
+        params.extend(filters["movies"])
+    if filters["cursor"]:
+        cursor_date, cursor_movie = filters["cursor"]
+        where.append(f"({date_col} > %s OR ({date_col} = %s AND movie_name > %s))")
+        params.extend([cursor_date, cursor_date, cursor_movie])
+
+    sql = f"SELECT movie_name, {date_col}, revenue_vnd, tickets_sold, showtimes FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {date_col} ASC, movie_name ASC"
+    if filters["limit"]:
+        # +1 dòng để biết còn trang sau
+        sql += f" LIMIT {filters['limit'] + 1}"
+    return sql, params
+
+
+def _iter_rows(conn, sql, params, chunk_size):
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    try:
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        # Bên gọi dừng giữa chừng: cursor không buffer phải đọc hết kết quả mới đóng được
+        while cur.fetchmany(chunk_size):
+            pass
+        cur.close()
+
+
+def iter_daily_revenue(conn, filters, chunk_size=FETCH_CHUNK_SIZE):
+    """
+    Sinh lần lượt các object {movie, date, revenue, tickets, showtimes} theo filters,
+    đọc DB theo từng lô, không giữ toàn bộ kết quả trong bộ nhớ
+    """
+    sql, params = build_query(filters)
+    rows = _iter_rows(conn, sql, params, chunk_size)
+    try:
+        for movie, item_date, revenue, tickets, showtimes in rows:
+            yield {
+                "movie": movie,
+                "date": str(item_date),
+                "revenue": int(revenue),
+                "tickets": int(tickets),
+                "showtimes": int(showtimes),
+            }
+    finally:
+        # Bên gọi dừng sớm -> đóng cursor DB ngay, trước khi kết nối được trả về pool
+        rows.close()
+
+
+def query_page(conn, filters):
+    """
+    JSON của 1 lần gọi API: không có limit/cursor -> mảng mọi dòng khớp filters,
+    có -> {"data": [...], "next_cursor": ...} (next_cursor None ở trang cuối)
+    """
+    items = iter_daily_revenue(conn, filters)
+    if filters["limit"] is None:
+        return serialize(list(items))
+    page = []
+    for item in items:
+        page.append(item)
+        if len(page) > filters["limit"]:
+            break
+    items.close()
+    next_cursor = None
+    if len(page) > filters["limit"]:
+        page.pop()
+        next_cursor = encode_cursor(page[-1]["date"], page[-1]["movie"])
+    return serialize({"data": page, "next_cursor": next_cursor})
+
+
+def iter_ndjson(conn, filters, batch_size=FETCH_CHUNK_SIZE):
+    """
+    NDJSON (1 object mỗi dòng), ghép theo lô để mỗi lần ghi ra socket không quá nhỏ
+    """
+    batch = []
+    for item in iter_daily_revenue(conn, filters):
+        batch.append(json.dumps(item, ensure_ascii=False, separators=(",", ":")))
+        if len(batch) >= batch_size:
+            yield ("\n".join(batch) + "\n").encode("utf-8")
+            batch = []
+    if batch:
+        yield ("\n".join(batch) + "\n").encode("utf-8")
@@ -1,40 +1,95 @@
 # utils/db_connection.py
 import json
 import os
-import mysql.connector
+import time
+import threading
 
 # Lấy đường dẫn gốc dự án
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 CONFIG_PATH = os.path.join(BASE_DIR, "config", "db_config.json")
 
-# load config từ JSON
+# Thời gian sống mặc định (giây) của cache etl_config nếu db_config.json không khai báo
+DEFAULT_ETL_CONFIG_TTL = 300
+
+# Cache dùng chung cho cả process
+_lock = threading.RLock()
+_file_config = None
+_etl_config = None
+_etl_config_loaded_at = 0.0
+
+# Bộ đếm để kiểm tra số lần đọc file / truy vấn db_control trong 1 lần chạy
+config_stats = {
+    "json_loads": 0,
+    "db_queries": 0,
+    "cache_hits": 0,
+}
+
+# load config từ JSON (chỉ đọc file 1 lần, các lần sau lấy từ cache)
 def load_config():
-    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-        cfg = json.load(f)
-    return cfg
+    global _file_config
+    with _lock:
+        if _file_config is None:
+            with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+                _file_config = json.load(f)
+            config_stats["json_loads"] += 1
+        return _file_config
 
 def get_db_config(db_key):
     cfg = load_config()
     mysql_cfg = cfg["mysql"].copy()
     db_map = cfg["databases"]
-    
+
     if db_key not in db_map:
         raise KeyError(f"Unknown db_key: {db_key}")
-    
+
     mysql_cfg["database"] = db_map[db_key]
     return mysql_cfg
 
+def _etl_config_ttl():
+    return load_config().get("cache", {}).get("etl_config_ttl", DEFAULT_ETL_CONFIG_TTL)
+
+def _fetch_all_etl_config():
+    from utils.db_pool import get_connection
+    with get_connection("control") as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT config_key, config_value FROM etl_config")
+        rows = cur.fetchall()
+        cur.close()
+    config_stats["db_queries"] += 1
+    return {k: v for k, v in rows}
+
+def get_all_etl_config():
+    """
+    Lấy toàn bộ bảng etl_config trong db_control bằng 1 truy vấn duy nhất,
+    giữ trong bộ nhớ theo TTL (cache.etl_config_ttl trong db_config.json)
+    """
+    global _etl_config, _etl_config_loaded_at
+    with _lock:
+        expired = time.monotonic() - _etl_config_loaded_at > _etl_config_ttl()
+        if _etl_config is None or expired:
+            _etl_config = _fetch_all_etl_config()
+            _etl_config_loaded_at = time.monotonic()
+        else:
+            config_stats["cache_hits"] += 1
+        return dict(_etl_config)
+
 # lấy ETL config từ db_control
 def get_etl_config_from_db(key):
     """
-    Lấy giá trị config từ bảng etl_config trong db_control
+    Lấy giá trị config từ bảng etl_config trong db_control (qua cache)
     """
-    control_cfg = get_db_config("control")
-    conn = mysql.connector.connect(**control_cfg)
-    cur = conn.cursor()
-    cur.execute("SELECT config_value FROM etl_config WHERE config_key=%s", (key,))
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
-    return row[0] if row else None
\ No newline at end of file
+    return get_all_etl_config().get(key)
+
+def invalidate_config_cache():
+    """
+    Xóa cache để lần gọi tiếp theo đọc lại db_config.json và etl_config
+    """
+    global _file_config, _etl_config, _etl_config_loaded_at
+    with _lock:
+        _file_config = None
+        _etl_config = None
+        _etl_config_loaded_at = 0.0
+
+def get_config_stats():
+    return dict(config_stats)
@@ -0,0 +1,268 @@
+# utils/db_pool.py
+import os
+import time
+import threading
+from contextlib import contextmanager
+import mysql.connector
+
+from utils.db_connection import get_db_config, load_config
+
+# Giá trị mặc định nếu db_config.json không có mục "pool"
+DEFAULT_POOL_SIZE = 5
+DEFAULT_POOL_TIMEOUT = 30
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Process sở hữu _pools: server pre-fork (gunicorn -w N) fork sau khi import -> worker tạo pool riêng
+_pools_pid = os.getpid()
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+# Số lần gửi lệnh tới DB (execute/executemany/commit/rollback) của từng thread,
+# utils.stage_metrics lấy hiệu trước/sau để tính số round-trip của 1 stage
+_round_trips = threading.local()
+
+
+def _count_round_trip():
+    _round_trips.count = getattr(_round_trips, "count", 0) + 1
+
+
+def get_thread_round_trips():
+    return getattr(_round_trips, "count", 0)
+
+
+class _CountingCursor:
+    def __init__(self, cur):
+        self._cur = cur
+
+    def execute(self, *args, **kwargs):
+        _count_round_trip()
+        return self._cur.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        # mysql-connector gộp INSERT nhiều dòng thành 1 câu -> tính 1 round-trip
+        _count_round_trip()
+        return self._cur.executemany(*args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+class _CountingConnection:
+    """
+    Bọc kết nối mysql-connector để đếm round-trip, mọi thuộc tính khác đi thẳng tới kết nối gốc
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return _CountingCursor(self._conn.cursor(*args, **kwargs))
+
+    def commit(self):
+        _count_round_trip()
+        return self._conn.commit()
+
+    def rollback(self):
+        _count_round_trip()
+        return self._conn.rollback()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class ConnectionPool:
+    """
+    Pool kết nối MySQL cho 1 database logic (staging/warehouse/datamart/control)
+    """
+
+    def __init__(self, db_key, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_POOL_TIMEOUT):
+        self.db_key = db_key
+        self.size = size
+        self.timeout = timeout
+        # Kết nối rảnh (LIFO: kết nối vừa trả còn "ấm"); _available báo cho thread đang chờ khi có
+        # kết nối được trả về hoặc 1 slot được giải phóng (kết nối hỏng bị bỏ)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._created = 0
+        self.stats = {
+            "borrows": 0,
+            "hits": 0,
+            "creations": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "health_failures": 0,
+        }
+
+    def _create(self):
+        conn = mysql.connector.connect(**get_db_config(self.db_key))
+        with self._lock:
+            self.stats["creations"] += 1
+        return _CountingConnection(conn)
+
+    def _is_healthy(self, conn):
+        try:
+            return conn.is_connected()
+        except Exception:
+            return False
+
+    def _free_slot(self):
+        with self._available:
+            self._created -= 1
+            self._available.notify()
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._free_slot()
+
+    def _take(self, deadline):
+        """
+        Lấy 1 kết nối rảnh (trả về (conn, True)) hoặc giữ chỗ để tạo kết nối mới (trả về (None, False));
+        pool đầy thì chờ tới deadline
+        """
+        with self._available:
+            wait_start = None
+            while True:
+                # 1. Ưu tiên lấy kết nối đang rảnh, 2. chưa đủ size thì giữ chỗ tạo kết nối mới
+                if self._idle:
+                    result = self._idle.pop(), True
+                elif self._created < self.size:
+                    self._created += 1
+                    result = None, False
+                else:
+                    # 3. Pool đầy -> chờ kết nối được trả về hoặc slot được giải phóng
+                    now = time.perf_counter()
+                    if now >= deadline:
+                        raise PoolTimeout(f"Timeout waiting for connection to '{self.db_key}'")
+                    if wait_start is None:
+                        wait_start = now
+                    self._available.wait(deadline - now)
+                    continue
+                if wait_start is not None:
+                    self.stats["waits"] += 1
+                    self.stats["wait_time"] += time.perf_counter() - wait_start
+                return result
+
+    def acquire(self):
+        deadline = time.perf_counter() + self.timeout
+        while True:
+            conn, hit = self._take(deadline)
+            if conn is None:
+                try:
+                    conn = self._create()
+                except Exception:
+                    self._free_slot()
+                    raise
+
+            # 4. Kiểm tra sức khỏe kết nối trước khi đưa ra dùng
+            if hit and not self._is_healthy(conn):
+                with self._lock:
+                    self.stats["health_failures"] += 1
+                self._discard(conn)
+                continue
+
+            with self._lock:
+                self.stats["borrows"] += 1
+                if hit:
+                    self.stats["hits"] += 1
+            return conn
+
+    def release(self, conn):
+        if not self._is_healthy(conn):
+            self._discard(conn)
+            return
+        try:
+            # Bỏ transaction dở dang để người mượn sau nhận kết nối sạch
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        with self._available:
+            self._idle.append(conn)
+            self._available.notify()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._discard(conn)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["open"] = self._created
+            stats["idle"] = len(self._idle)
+        stats["size"] = self.size
+        return stats
+
+
+def _pool_settings(db_key):
+    pool_cfg = load_config().get("pool", {})
+    size = pool_cfg.get("sizes", {}).get(db_key, pool_cfg.get("default_size", DEFAULT_POOL_SIZE))
+    timeout = pool_cfg.get("timeout", DEFAULT_POOL_TIMEOUT)
+    return size, timeout
+
+
+def get_pool(db_key):
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Kết nối thừa hưởng từ process cha dùng chung socket với cha -> bỏ đi (không close,
+            # close sẽ gửi COM_QUIT trên socket của cha), mỗi worker mở kết nối của riêng nó
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(db_key)
+        if pool is None:
+            size, timeout = _pool_settings(db_key)
+            pool = ConnectionPool(db_key, size=size, timeout=timeout)
+            _pools[db_key] = pool
+        return pool
+
+
+def ensure_pool_size(db_key, size):
+    """
+    Nâng size pool của db_key lên ít nhất size (vd bằng số thread của web server: response NDJSON
+    giữ kết nối suốt lúc stream, pool nhỏ hơn số thread thì request khác phải chờ tới PoolTimeout)
+    """
+    pool = get_pool(db_key)
+    with pool._available:
+        if pool.size < size:
+            pool.size = size
+            pool._available.notify_all()
+    return pool.size
+
+
+@contextmanager
+def get_connection(db_key):
+    """
+    Mượn 1 kết nối từ pool của db_key, tự trả lại khi ra khỏi khối with
+    """
+    pool = get_pool(db_key)
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+def get_pool_stats():
+    with _pools_lock:
+        return {key: pool.get_stats() for key, pool in _pools.items()}
+
+
+def close_all_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -0,0 +1,74 @@
+# utils/file_manifest.py
+import os
+import hashlib
+import threading
+from utils.db_pool import get_connection
+
+_table_ready = False
+_table_lock = threading.Lock()
+
+# Đọc file theo từng khối khi tính checksum, không nạp cả file vào bộ nhớ
+CHECKSUM_BLOCK_SIZE = 1024 * 1024
+
+def file_checksum(path, block_size=CHECKSUM_BLOCK_SIZE):
+    """
+    SHA-256 (hex) của nội dung file
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def ensure_file_manifest_table(conn):
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS etl_file_manifest (
+            file_name VARCHAR(255) PRIMARY KEY,
+            file_path VARCHAR(500),
+            checksum CHAR(64) NOT NULL,
+            file_size BIGINT,
+            row_count INT,
+            processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.close()
+    conn.commit()
+
+def _ensure_table_once(conn):
+    # Chỉ chạy CREATE TABLE IF NOT EXISTS 1 lần mỗi process (record_file được gọi cho từng file backfill)
+    global _table_ready
+    with _table_lock:
+        if _table_ready:
+            return
+        ensure_file_manifest_table(conn)
+        _table_ready = True
+
+def get_manifest():
+    """
+    Trả về dict file_name -> checksum của các file raw đã nạp vào warehouse
+    """
+    with get_connection("control") as conn:
+        _ensure_table_once(conn)
+        cur = conn.cursor()
+        cur.execute("SELECT file_name, checksum FROM etl_file_manifest")
+        rows = cur.fetchall()
+        cur.close()
+    return {name: checksum for name, checksum in rows}
+
+def record_file(path, checksum=None, row_count=None):
+    """
+    Ghi/cập nhật file vào manifest sau khi đã nạp xong
+    """
+    checksum = checksum or file_checksum(path)
+    with get_connection("control") as conn:
+        _ensure_table_once(conn)
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO etl_file_manifest (file_name, file_path, checksum, file_size, row_count)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE file_path=VALUES(file_path), checksum=VALUES(checksum),
+                file_size=VALUES(file_size), row_count=VALUES(row_count), processed_at=CURRENT_TIMESTAMP
+        """, (os.path.basename(path), path, checksum, os.path.getsize(path), row_count))
+        conn.commit()
+        cur.close()
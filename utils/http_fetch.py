@@ -0,0 +1,99 @@
+# utils/http_fetch.py
+import os
+import json
+import time
+import hashlib
+import threading
+
+DEFAULT_HTTP_TIMEOUT = 20
+# Số kết nối keep-alive giữ lại cho mỗi host (crawler gửi nhiều request cùng lúc)
+HTTP_POOL_MAXSIZE = 32
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0 Safari/537.36")
+
+_session = None
+_session_lock = threading.Lock()
+
+# Bộ đếm cho log cuối pipeline (crawler gọi fetch_conditional từ nhiều thread)
+_stats_lock = threading.Lock()
+http_stats = {
+    "requests": 0,
+    "not_modified": 0,
+    "bytes_downloaded": 0,
+    "fetch_time": 0.0,
+}
+
+
+def get_session():
+    # 1 Session cho cả process: giữ kết nối keep-alive giữa các lần fetch
+    global _session
+    # requests chỉ được import khi thật sự tải trang (main chỉ cần http_stats)
+    import requests
+
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers["User-Agent"] = USER_AGENT
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=HTTP_POOL_MAXSIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+def _cache_paths(cache_dir, url):
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{key}.html"), os.path.join(cache_dir, f"{key}.json")
+
+def _decode(resp):
+    # Header không khai báo charset thì requests đoán ISO-8859-1 -> dùng utf-8 như trang gốc
+    if "charset" not in resp.headers.get("Content-Type", "").lower():
+        resp.encoding = "utf-8"
+    return resp.text
+
+def fetch_conditional(url, cache_dir, timeout=DEFAULT_HTTP_TIMEOUT):
+    """
+    GET url kèm If-None-Match / If-Modified-Since theo lần tải trước (lưu trong cache_dir);
+    server trả 304 thì dùng lại HTML đã lưu thay vì tải lại.
+    Trả về (html, info) với info = {status, not_modified, bytes, elapsed}
+    """
+    body_path, meta_path = _cache_paths(cache_dir, url)
+    meta = {}
+    if os.path.exists(body_path) and os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    start = time.perf_counter()
+    resp = get_session().get(url, headers=headers, timeout=timeout)
+    elapsed = time.perf_counter() - start
+
+    not_modified = resp.status_code == 304 and bool(meta)
+    if not_modified:
+        with open(body_path, "r", encoding="utf-8") as f:
+            html = f.read()
+    else:
+        resp.raise_for_status()
+        html = _decode(resp)
+        validators = {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+        if any(validators.values()):
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(body_path, "w", encoding="utf-8") as f:
+                f.write(html)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"url": url, **validators}, f)
+
+    with _stats_lock:
+        http_stats["requests"] += 1
+        http_stats["not_modified"] += int(not_modified)
+        http_stats["bytes_downloaded"] += len(resp.content)
+        http_stats["fetch_time"] += elapsed
+    return html, {"status": resp.status_code, "not_modified": not_modified,
+                  "bytes": len(resp.content), "elapsed": elapsed}
+
+def get_http_stats():
+    with _stats_lock:
+        return dict(http_stats)
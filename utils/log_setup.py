@@ -0,0 +1,48 @@
+# utils/log_setup.py
+import os
+import logging
+import threading
+from datetime import datetime
+
+from utils.log_to_db import install_db_log_handler
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Logger đã được gắn file log trong process này (None = root logger)
+_configured = {}
+_lock = threading.Lock()
+
+
+def configure_logging(prefix, default_dir, config_key=None, logger_name=None):
+    """
+    Tạo file log <dir>/<prefix>_<thời điểm>.log và gắn vào logger (logger_name None = root logger),
+    thêm StreamHandler ra console và handler ghi log vào db_control.etl_log.
+    Thư mục lấy từ etl_config[config_key] nếu có, không thì default_dir.
+    Module ETL gọi hàm này khi bắt đầu chạy (không phải lúc import); gọi lại trả về file đã tạo.
+    Root logger chỉ được gắn 1 lần mỗi process như logging.basicConfig: các bước ETL chạy chung
+    1 process (main) cùng ghi vào file của bước đầu tiên
+    """
+    with _lock:
+        if logger_name in _configured:
+            return _configured[logger_name]
+
+        log_dir = default_dir
+        if config_key:
+            from utils.db_connection import get_etl_config_from_db
+            log_dir = get_etl_config_from_db(config_key) or default_dir
+        os.makedirs(log_dir, exist_ok=True)
+        log_file = os.path.join(log_dir, f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+
+        logger = logging.getLogger(logger_name)
+        logger.setLevel(logging.INFO)
+        if logger_name is not None:
+            logger.handlers = []
+        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logger.addHandler(file_handler)
+        logger.addHandler(logging.StreamHandler())
+        _configured[logger_name] = log_file
+
+    # Log được ghi dần vào db_control.etl_log qua thread nền (handler gắn ở root)
+    install_db_log_handler()
+    return log_file
@@ -1,7 +1,23 @@
 # utils/log_to_db.py
 import os
-import mysql.connector
+import sys
+import time
+import queue
+import atexit
+import logging
+import threading
 from datetime import datetime
+from utils.db_connection import load_config
+from utils.db_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Số dòng tối đa mỗi câu INSERT và thời gian tối đa (giây) giữ log trong hàng đợi
+LOG_BATCH_SIZE = 200
+LOG_FLUSH_INTERVAL = 2.0
+
+_tables_ready = set()
+_tables_lock = threading.Lock()
 
 def ensure_etl_log_table(conn):
     cur = conn.cursor()
@@ -15,35 +31,218 @@ def ensure_etl_log_table(conn):
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS etl_log_offset (
+            source_file VARCHAR(255) PRIMARY KEY,
+            byte_offset BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
     cur.close()
     conn.commit()
 
-def push_log_file_to_db(log_file_path, db_config):
+def _ensure_tables_once(conn, db_key):
+    # Chỉ chạy CREATE TABLE IF NOT EXISTS 1 lần mỗi process cho mỗi database
+    with _tables_lock:
+        if db_key in _tables_ready:
+            return
+        ensure_etl_log_table(conn)
+        _tables_ready.add(db_key)
+
+def insert_log_rows(cur, rows, batch_size=LOG_BATCH_SIZE):
+    """
+    Ghi rows (log_time, log_level, message, source_file) bằng câu INSERT nhiều dòng
+    """
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        sql = "INSERT INTO etl_log (log_time, log_level, message, source_file) VALUES " \
+              + ",".join(["(%s, %s, %s, %s)"] * len(batch))
+        cur.execute(sql, [v for row in batch for v in row])
+
+def parse_log_line(line):
+    parts = line.strip().split(" - ", 2)
+    if len(parts) != 3:
+        return None
+    log_time_str, log_level, message = parts
+    # log_time_str like "2025-11-04 21:45:16,123"
+    log_time = log_time_str.split(",")[0]
+    try:
+        datetime.fromisoformat(log_time)
+    except Exception:
+        return None
+    return log_time, log_level, message
+
+def _resolve_db_key(db_config):
+    # Tham số cũ là dict cấu hình mysql.connector -> đổi sang db_key của pool theo tên database
+    if not isinstance(db_config, dict):
+        return db_config
+    for db_key, database in load_config()["databases"].items():
+        if database == db_config.get("database"):
+            return db_key
+    raise KeyError(f"Unknown database: {db_config.get('database')}")
+
+def push_log_file_to_db(log_file_path, db_config="control"):
+    """
+    Đẩy phần log mới của file lên etl_log, bắt đầu từ offset đã đẩy lần trước
+    (lưu trong etl_log_offset) nên gọi nhiều lần không bị ghi trùng dòng.
+    db_config: db_key của pool hoặc dict cấu hình kết nối như trước (vd get_db_config("control"))
+    """
     if not os.path.exists(log_file_path):
-        print(f"Log file not found: {log_file_path}")
+        logger.warning("Log file not found: %s", log_file_path)
         return
 
-    conn = mysql.connector.connect(**db_config)
-    ensure_etl_log_table(conn)
-    cur = conn.cursor()
+    db_key = _resolve_db_key(db_config)
+
+    source_file = os.path.basename(log_file_path)
+    with get_connection(db_key) as conn:
+        _ensure_tables_once(conn, db_key)
+        cur = conn.cursor()
+        cur.execute("SELECT byte_offset FROM etl_log_offset WHERE source_file=%s", (source_file,))
+        row = cur.fetchone()
+        offset = row[0] if row else 0
+        # File bị tạo lại/ghi đè ngắn hơn offset cũ -> đọc lại từ đầu
+        if offset > os.path.getsize(log_file_path):
+            offset = 0
+
+        rows = []
+        with open(log_file_path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                # Dòng chưa ghi xong (không có \n) để lần sau đẩy
+                if not raw.endswith(b"\n"):
+                    break
+                offset += len(raw)
+                parsed = parse_log_line(raw.decode("utf-8", errors="replace"))
+                if parsed:
+                    rows.append(parsed + (source_file,))
+
+        insert_log_rows(cur, rows)
+        cur.execute("""
+            INSERT INTO etl_log_offset (source_file, byte_offset) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE byte_offset=VALUES(byte_offset)
+        """, (source_file, offset))
+        conn.commit()
+        cur.close()
+    logger.info("Pushed %d log lines to %s", len(rows), db_key)
+
 
-    with open(log_file_path, "r", encoding="utf-8") as f:
-        for line in f:
-            parts = line.strip().split(" - ", 2)
-            if len(parts) == 3:
-                log_time_str, log_level, message = parts
-                # log_time_str like "2025-11-04 21:45:16,123"
-                log_time = log_time_str.split(",")[0]
+class DBLogHandler(logging.Handler):
+    """
+    logging.Handler ghi log vào etl_log qua 1 thread nền:
+    emit() chỉ đưa record vào hàng đợi, thread nền gom thành INSERT nhiều dòng
+    và ghi khi đủ batch_size dòng hoặc sau flush_interval giây
+    """
+
+    def __init__(self, db_key="control", batch_size=LOG_BATCH_SIZE, flush_interval=LOG_FLUSH_INTERVAL):
+        super().__init__(level=logging.INFO)
+        self.db_key = db_key
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._source_files = {}
+        self._stopped = False
+        self._thread = threading.Thread(target=self._worker, name="DBLogHandler", daemon=True)
+        self._thread.start()
+
+    def _source_file(self, record):
+        # Tên file log mà logger của record đang ghi vào (giống cột source_file khi đẩy từ file)
+        name = record.name
+        if name not in self._source_files:
+            source = None
+            lg = logging.getLogger(name) if name != "root" else logging.getLogger()
+            while lg is not None and source is None:
+                for h in lg.handlers:
+                    if isinstance(h, logging.FileHandler):
+                        source = os.path.basename(h.baseFilename)
+                        break
+                lg = lg.parent if lg.propagate else None
+            self._source_files[name] = source or name
+        return self._source_files[name]
+
+    def emit(self, record):
+        # Bỏ qua log sinh ra từ chính thread ghi DB để tránh vòng lặp
+        if record.thread == self._thread.ident or self._stopped:
+            return
+        try:
+            message = record.getMessage()
+            if record.exc_info:
+                message += "\n" + logging.Formatter().formatException(record.exc_info)
+            log_time = datetime.fromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S")
+            self._queue.put((log_time, record.levelname, message, self._source_file(record)))
+        except Exception:
+            self.handleError(record)
+
+    def _write(self, rows):
+        with get_connection(self.db_key) as conn:
+            _ensure_tables_once(conn, self.db_key)
+            cur = conn.cursor()
+            insert_log_rows(cur, rows, self.batch_size)
+            conn.commit()
+            cur.close()
+
+    def _worker(self):
+        batch = []
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            stop = item is _STOP
+            flush_event = item if isinstance(item, threading.Event) else None
+            if item is not None and not stop and flush_event is None:
+                batch.append(item)
+
+            due = time.monotonic() - last_flush >= self.flush_interval
+            if batch and (len(batch) >= self.batch_size or due or stop or flush_event):
                 try:
-                    # Try parse to ensure format
-                    dt = datetime.fromisoformat(log_time)
-                except Exception:
-                    dt = None
-                cur.execute("""
-                    INSERT INTO etl_log (log_time, log_level, message, source_file)
-                    VALUES (%s, %s, %s, %s)
-                """, (log_time, log_level, message, os.path.basename(log_file_path)))
-    conn.commit()
-    cur.close()
-    conn.close()
-    print("Pushed logs to DB Control.")
\ No newline at end of file
+                    self._write(batch)
+                except Exception as e:
+                    # Không dùng logging ở đây (sẽ quay lại chính handler này)
+                    print(f"DBLogHandler: failed to write {len(batch)} log rows: {e}", file=sys.stderr)
+                batch = []
+            if due or not batch:
+                last_flush = time.monotonic()
+            if flush_event:
+                flush_event.set()
+            if stop:
+                return
+
+    def flush(self, timeout=None):
+        """
+        Chờ tối đa timeout giây cho đến khi các log đã emit được ghi xuống DB
+        """
+        if self._stopped or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout=10):
+        if not self._stopped:
+            self._stopped = True
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        super().close()
+
+
+_STOP = object()
+_handler = None
+_handler_lock = threading.Lock()
+
+def install_db_log_handler(db_key="control"):
+    """
+    Gắn 1 DBLogHandler duy nhất vào root logger (log của các logger con cũng đi qua đây)
+    """
+    global _handler
+    with _handler_lock:
+        if _handler is None:
+            _handler = DBLogHandler(db_key)
+            logging.getLogger().addHandler(_handler)
+            atexit.register(_handler.close)
+        return _handler
+
+def flush_db_logs(timeout=10):
+    if _handler is not None:
+        _handler.flush(timeout)
@@ -0,0 +1,136 @@
+# utils/request_metrics.py
+import time
+import threading
+from bisect import bisect_left
+
+# Cận trên các bucket độ trễ (giây), giống bucket mặc định của Prometheus client
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # Phần tử cuối: lớn hơn mọi bucket (+Inf)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self):
+        """
+        [(cận trên, số request <= cận trên)], cận cuối là "+Inf"
+        """
+        total, result = 0, []
+        for bound, n in zip(self.buckets + ("+Inf",), self.counts):
+            total += n
+            result.append((bound, total))
+        return result
+
+
+class RequestMetrics:
+    """
+    Histogram độ trễ theo (endpoint, method, status), dùng chung giữa các thread của server
+    """
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.started_at = time.time()
+
+    def request_started(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def observe(self, endpoint, method, status, seconds):
+        key = (endpoint, method, str(status))
+        with self._lock:
+            self._in_flight -= 1
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram(self.buckets)
+            histogram.observe(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: (h.cumulative(), h.count, h.sum) for key, h in self._histograms.items()}, self._in_flight
+
+    def render(self, gauges=None):
+        """
+        Text format của Prometheus: histogram http_request_duration_seconds + các gauge thêm
+        (gauges: {tên: [(labels dict, giá trị)]})
+        """
+        histograms, in_flight = self.snapshot()
+        lines = [
+            "# HELP http_request_duration_seconds Request latency (until the response body is fully sent)",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (endpoint, method, status), (cumulative, count, total) in sorted(histograms.items()):
+            labels = f'endpoint="{endpoint}",method="{method}",status="{status}"'
+            for bound, n in cumulative:
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {n}')
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {count}")
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {total:.6f}")
+        gauges = dict(gauges or {})
+        gauges["http_requests_in_flight"] = [({}, in_flight)]
+        gauges["process_uptime_seconds"] = [({}, round(time.time() - self.started_at, 3))]
+        for name, samples in gauges.items():
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class _TimedBody:
+    # Bọc body WSGI: chỉ ghi nhận khi server đã gửi xong (gọi close), đúng cả với response stream
+    def __init__(self, body, on_close):
+        self._body = body
+        self._on_close = on_close
+
+    def __iter__(self):
+        return iter(self._body)
+
+    def close(self):
+        try:
+            if hasattr(self._body, "close"):
+                self._body.close()
+        finally:
+            self._on_close()
+
+
+class TimingMiddleware:
+    """
+    WSGI middleware đo thời gian mỗi request. endpoint_for(environ) trả về nhãn endpoint
+    (tên route, không dùng path thô để số series không tăng theo tham số / URL lạ)
+    """
+
+    def __init__(self, wsgi_app, metrics, endpoint_for):
+        self.wsgi_app = wsgi_app
+        self.metrics = metrics
+        self.endpoint_for = endpoint_for
+
+    def __call__(self, environ, start_response):
+        start = time.perf_counter()
+        status = {}
+
+        def timed_start_response(status_line, headers, exc_info=None):
+            status["code"] = status_line.split(" ", 1)[0]
+            return start_response(status_line, headers, exc_info)
+
+        def record():
+            self.metrics.observe(self.endpoint_for(environ), environ.get("REQUEST_METHOD", ""),
+                                 status.get("code", "500"), time.perf_counter() - start)
+
+        self.metrics.request_started()
+        try:
+            body = self.wsgi_app(environ, timed_start_response)
+        except Exception:
+            record()
+            raise
+        return _TimedBody(body, record)
@@ -0,0 +1,142 @@
+# utils/response_cache.py
+import time
+import threading
+from collections import OrderedDict
+
+from utils.db_connection import load_config
+from utils.api_payloads import compress
+
+# Giá trị mặc định nếu db_config.json không có mục "api_cache"
+DEFAULT_CACHE_TTL = 300
+DEFAULT_CACHE_MAX_ENTRIES = 256
+# Số giây giữa 2 lần hỏi DB datamart version (giữa 2 lần hỏi, request chỉ đọc bộ nhớ)
+DEFAULT_VERSION_CHECK_INTERVAL = 5
+
+
+class CachedResponse:
+    def __init__(self, version, etag, body, gzip_body, expires_at):
+        self.version = version
+        self.etag = etag
+        self.body = body
+        # Chưa có bản nén dựng sẵn thì nén 1 lần khi đưa vào cache, mọi request sau dùng lại
+        self.gzip_body = gzip_body if gzip_body is not None else compress(body)
+        self.expires_at = expires_at
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry = None
+
+
+class ResponseCache:
+    """
+    Cache body JSON của API trong bộ nhớ: LRU tối đa max_entries, mỗi entry sống ttl giây
+    và gắn với datamart version lúc tạo. version_source() (truy vấn DB) chỉ được gọi tối đa
+    1 lần mỗi version_check_interval giây; version đổi (vừa load datamart) thì bỏ toàn bộ cache
+    """
+
+    def __init__(self, version_source, ttl=DEFAULT_CACHE_TTL, max_entries=DEFAULT_CACHE_MAX_ENTRIES,
+                 version_check_interval=DEFAULT_VERSION_CHECK_INTERVAL):
+        self.version_source = version_source
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version_check_interval = version_check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0.0
+        # (key, version) -> _Flight của request đang gọi loader
+        self._loading = {}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "version_checks": 0,
+            "invalidations": 0,
+            "coalesced": 0,
+        }
+
+    def current_version(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._version is not None and now - self._version_checked_at < self.version_check_interval:
+                return self._version
+        version = self.version_source()
+        with self._lock:
+            self.stats["version_checks"] += 1
+            self._version_checked_at = now
+            if version != self._version:
+                if self._version is not None:
+                    self.stats["invalidations"] += 1
+                self._entries.clear()
+                self._version = version
+        return version
+
+    def get(self, key, loader):
+        """
+        Lấy response của key; miss thì gọi loader(key, version) -> (body bytes, etag, body gzip hoặc None)
+        """
+        version = self.current_version()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry
+            self.stats["misses"] += 1
+            # Nhiều request cùng miss 1 key (ngay sau lần load datamart mới): chỉ 1 request gọi loader,
+            # các request khác chờ và dùng chung kết quả thay vì cùng truy vấn DB
+            flight = self._loading.get((key, version))
+            leader = flight is None
+            if leader:
+                flight = self._loading[(key, version)] = _Flight()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.entry is not None:
+                return flight.entry
+            # Request đi trước lỗi -> tự load
+
+        try:
+            body, etag, gzip_body = loader(key, version)
+            entry = CachedResponse(version, etag, body, gzip_body, now + self.ttl)
+            with self._lock:
+                # Version đã đổi trong lúc load thì không cache bản cũ
+                if version == self._version:
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.stats["evictions"] += 1
+            flight.entry = entry
+        finally:
+            if leader:
+                with self._lock:
+                    self._loading.pop((key, version), None)
+                flight.done.set()
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["version"] = self._version
+        return stats
+
+
+def response_cache_settings():
+    cfg = load_config().get("api_cache", {})
+    return {
+        "ttl": cfg.get("ttl", DEFAULT_CACHE_TTL),
+        "max_entries": cfg.get("max_entries", DEFAULT_CACHE_MAX_ENTRIES),
+        "version_check_interval": cfg.get("version_check_interval", DEFAULT_VERSION_CHECK_INTERVAL),
+    }
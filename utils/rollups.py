@@ -0,0 +1,110 @@
+# utils/rollups.py
+import pandas as pd
+
+from utils.row_builders import iter_chunks
+
+# Bảng tổng hợp sẵn theo tuần (thứ 2 đầu tuần) / tháng (ngày 1) cho API: bucket -> (bảng, cột ngày bắt đầu)
+ROLLUP_TABLES = {
+    "week": ("dm_weekly_revenue", "week_start"),
+    "month": ("dm_monthly_revenue", "month_start"),
+}
+LEADERBOARD_TABLE = "dm_movie_leaderboard"
+# Khóa theo tên phim phải so sánh nhị phân: với collation _ci "Ma" / "Mà" là cùng 1 khóa và upsert ghi đè nhau
+MOVIE_NAME_COLUMN = "movie_name VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin"
+
+
+def ensure_rollup_tables(conn):
+    cur = conn.cursor()
+    for bucket, (table, date_col) in ROLLUP_TABLES.items():
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                {MOVIE_NAME_COLUMN} NOT NULL,
+                {date_col} DATE NOT NULL,
+                revenue_vnd BIGINT NOT NULL,
+                tickets_sold BIGINT NOT NULL,
+                showtimes INT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                PRIMARY KEY (movie_name, {date_col})
+            )
+        """)
+        # API đọc theo khoảng ngày + phân trang keyset (ngày, phim)
+        cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{bucket}ly_start_movie ON {table} ({date_col}, movie_name)")
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {LEADERBOARD_TABLE} (
+            {MOVIE_NAME_COLUMN} PRIMARY KEY,
+            total_revenue BIGINT NOT NULL,
+            total_tickets BIGINT NOT NULL,
+            total_showtimes INT NOT NULL,
+            ranking INT NOT NULL,
+            snapshot_date DATE NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_leaderboard_ranking ON {LEADERBOARD_TABLE} (ranking)")
+    cur.close()
+    conn.commit()
+
+
+def bucket_starts(dates, bucket):
+    """
+    Ngày bắt đầu bucket (tuần: thứ 2, tháng: ngày 1) của cả cột ngày, trả về cột date
+    """
+    dates = pd.to_datetime(dates)
+    if bucket == "week":
+        starts = dates - pd.to_timedelta(dates.dt.weekday, unit="D")
+    else:
+        starts = dates.dt.to_period("M").dt.start_time
+    return starts.dt.date
+
+
+def build_rollup(daily_df, bucket):
+    """
+    Cộng dồn daily aggregate theo (phim, bucket) -> DataFrame theo cột của bảng rollup
+    """
+    _, date_col = ROLLUP_TABLES[bucket]
+    df = daily_df[["movie_name", "revenue_vnd", "tickets_sold", "showtimes"]].copy()
+    df[date_col] = bucket_starts(daily_df["full_date"], bucket)
+    return (df.groupby(["movie_name", date_col], as_index=False)[["revenue_vnd", "tickets_sold", "showtimes"]]
+            .sum())
+
+
+def refresh_rollups(cur, daily_df):
+    """
+    Upsert bảng tuần/tháng từ daily aggregate (daily_df luôn là toàn bộ lịch sử của bước aggregate);
+    trả về {bucket: số dòng}
+    """
+    counts = {}
+    for bucket, (table, date_col) in ROLLUP_TABLES.items():
+        rollup = build_rollup(daily_df, bucket)
+        data = list(zip(rollup["movie_name"], rollup[date_col],
+                        rollup["revenue_vnd"].astype("int64").tolist(),
+                        rollup["tickets_sold"].astype("int64").tolist(),
+                        rollup["showtimes"].astype("int64").tolist()))
+        for chunk in iter_chunks(data):
+            cur.executemany(f"""
+                INSERT INTO {table} (movie_name, {date_col}, revenue_vnd, tickets_sold, showtimes)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    revenue_vnd = VALUES(revenue_vnd),
+                    tickets_sold = VALUES(tickets_sold),
+                    showtimes = VALUES(showtimes)
+            """, chunk)
+        counts[bucket] = len(data)
+    return counts
+
+
+def refresh_leaderboard(cur, top_df, snapshot_date):
+    """
+    Thay toàn bộ bảng xếp hạng hiện tại bằng top_df (trong transaction của bên gọi:
+    người đọc thấy bảng cũ cho tới khi commit)
+    """
+    data = [[row[0], int(row[1]), int(row[2]), int(row[3]), int(row[4]), snapshot_date] for row in
+            top_df[["movie_name", "revenue_vnd", "tickets_sold", "showtimes", "ranking"]].values.tolist()]
+    cur.execute(f"DELETE FROM {LEADERBOARD_TABLE}")
+    for chunk in iter_chunks(data):
+        cur.executemany(f"""
+            INSERT INTO {LEADERBOARD_TABLE}
+                (movie_name, total_revenue, total_tickets, total_showtimes, ranking, snapshot_date)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, chunk)
+    return len(data)
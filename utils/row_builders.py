@@ -0,0 +1,71 @@
+# utils/row_builders.py
+import pandas as pd
+
+from utils.table_parsers import RAW_SOURCE_COLUMN
+
+# Số dòng mỗi lần gọi executemany
+DEFAULT_CHUNK_SIZE = 5000
+
+def iter_chunks(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Chia list rows thành các đoạn cố định để đẩy dần vào executemany
+    """
+    for start in range(0, len(rows), chunk_size):
+        yield rows[start:start + chunk_size]
+
+def _column_values(df, col, default=None):
+    # Lấy cột dưới dạng list giá trị Python, NaN -> None (mysql-connector không nhận numpy/NaN)
+    if col not in df.columns:
+        return [default] * len(df)
+    s = df[col].astype(object)
+    return s.where(s.notna(), None).tolist()
+
+def build_staging_rows(df, scraped_date, source=None):
+    """
+    Dựng tuple (film_name, revenue_raw, tickets_raw, showtimes_raw, scraped_date, source) theo cột;
+    source lấy từ cột nguồn của file raw, file cũ không có cột này thì dùng giá trị source truyền vào
+    """
+    return list(zip(
+        _column_values(df, "Tên phim"),
+        _column_values(df, "Doanh thu"),
+        _column_values(df, "Vé"),
+        _column_values(df, "Suất chiếu"),
+        [scraped_date] * len(df),
+        _column_values(df, RAW_SOURCE_COLUMN, source),
+    ))
+
+def date_keys(dates):
+    """
+    Chuyển 1 cột ngày sang date_key dạng YYYYMMDD (parse 1 lần cho cả cột), lỗi -> NaN
+    """
+    parsed = pd.to_datetime(dates, errors="coerce")
+    return parsed.dt.year * 10000 + parsed.dt.month * 100 + parsed.dt.day
+
+def _int_column(df, col):
+    if col not in df.columns:
+        return pd.Series(0, index=df.index, dtype="int64")
+    return df[col].astype("int64")
+
+def build_fact_rows(df, movie_keys, load_date):
+    """
+    Dựng tuple cho fact_revenue theo cột:
+    (movie_key, date_key, revenue_vnd, tickets_sold, showtimes, load_date)
+    Dòng có scraped_date không hợp lệ bị bỏ qua
+    """
+    keys = date_keys(df["scraped_date"])
+    valid = keys.notna()
+    df = df[valid]
+    keys = keys[valid].astype("int64")
+
+    movie = df["film_name"].map(movie_keys).astype(object)
+    movie = movie.where(movie.notna(), None)
+    movie = [int(k) if k is not None else None for k in movie.tolist()]
+
+    return list(zip(
+        movie,
+        keys.tolist(),
+        _int_column(df, "revenue_clean").tolist(),
+        _int_column(df, "tickets_clean").tolist(),
+        _int_column(df, "showtimes_clean").tolist(),
+        [load_date] * len(df),
+    ))
@@ -0,0 +1,61 @@
+# utils/source_registry.py
+from datetime import date
+
+# Các nguồn dữ liệu mà crawler có thể tải, đăng ký theo tên
+_sources = {}
+
+
+class Source:
+    """
+    1 nguồn = 1 URL chứa bảng phim theo đúng thứ tự cột của file raw.
+    URL có "{date}" (vd "https://site/lich-su?ngay={date:%d-%m-%Y}") là trang theo ngày:
+    mỗi ngày cần lấy thành 1 trang, dòng của trang được ghi vào file raw của ngày đó
+    """
+
+    def __init__(self, name, url, parser=None, description=""):
+        self.name = name
+        self.url = url
+        # None -> dùng etl_config.html_parser
+        self.parser = parser
+        self.description = description
+
+    @property
+    def is_daily(self):
+        return "{date" in self.url
+
+    def targets(self, dates=None):
+        """
+        Trả về list (url, ngày của dữ liệu); trang không theo ngày luôn là dữ liệu hôm nay
+        """
+        if not self.is_daily:
+            return [(self.url, date.today())]
+        return [(self.url.format(date=d), d) for d in (dates or [date.today()])]
+
+    def __repr__(self):
+        return f"Source({self.name!r}, {self.url!r})"
+
+
+def register_source(name, url, parser=None, description=""):
+    # Đăng ký lại cùng tên thì ghi đè (vd benchmark trỏ nguồn sang server fixture)
+    source = Source(name, url, parser, description)
+    _sources[name] = source
+    return source
+
+
+def unregister_source(name):
+    _sources.pop(name, None)
+
+
+def get_source(name):
+    if name not in _sources:
+        raise KeyError(f"Unknown source: {name}")
+    return _sources[name]
+
+
+def list_sources(names=None):
+    """
+    Các nguồn theo thứ tự đăng ký, hoặc theo đúng danh sách names
+    """
+    if names is None:
+        return list(_sources.values())
+    return [get_source(name) for name in names]
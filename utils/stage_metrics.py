@@ -0,0 +1,330 @@
+# utils/stage_metrics.py
+import os
+import sys
+import time
+import uuid
+import logging
+import functools
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+from utils.db_connection import get_etl_config_from_db
+from utils.db_pool import get_connection, get_thread_round_trips
+
+logger = logging.getLogger(__name__)
+
+_run = {"run_id": None, "entry_point": None}
+_run_lock = threading.Lock()
+# Stage đang chạy của từng thread (stage lồng nhau: stage ngoài là parent)
+_active = threading.local()
+_active_count = 0
+# Các stage đã xong trong process (main in tóm tắt cuối pipeline)
+_finished = []
+_tables_ready = False
+_profile_override = None
+
+
+def ensure_run_metrics_table(conn):
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS etl_run_metrics (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            run_id VARCHAR(40) NOT NULL,
+            entry_point VARCHAR(100) NOT NULL,
+            stage VARCHAR(100) NOT NULL,
+            parent_stage VARCHAR(100) NULL,
+            status VARCHAR(20) NOT NULL,
+            started_at DATETIME NOT NULL,
+            finished_at DATETIME NOT NULL,
+            wall_time DOUBLE NOT NULL,
+            cpu_time DOUBLE NOT NULL,
+            rows_in BIGINT NOT NULL DEFAULT 0,
+            rows_out BIGINT NOT NULL DEFAULT 0,
+            bytes_read BIGINT NOT NULL DEFAULT 0,
+            bytes_written BIGINT NOT NULL DEFAULT 0,
+            db_round_trips INT NOT NULL DEFAULT 0,
+            peak_rss_bytes BIGINT NULL,
+            profile_path VARCHAR(500) NULL,
+            error TEXT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_run_metrics_run ON etl_run_metrics (run_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_run_metrics_stage ON etl_run_metrics (stage, started_at)")
+    cur.close()
+    conn.commit()
+
+
+def new_run(entry_point=None):
+    """
+    Bắt đầu 1 lần chạy mới: các stage sau đó ghi cùng run_id. Không gọi thì mỗi process là 1 run,
+    entry_point là tên script đang chạy
+    """
+    with _run_lock:
+        _run["run_id"] = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        _run["entry_point"] = entry_point or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+        return _run["run_id"]
+
+
+def current_run():
+    if _run["run_id"] is None:
+        new_run()
+    with _run_lock:
+        return dict(_run)
+
+
+def _read_hwm():
+    # Đỉnh RSS của process (byte): VmHWM trên Linux, ru_maxrss trên Unix khác, None nếu không đọc được
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _reset_hwm():
+    # Linux: đưa VmHWM về RSS hiện tại để đo đỉnh riêng của stage; nơi khác giữ đỉnh của cả process
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path) if path else 0
+    except OSError:
+        return 0
+
+
+def set_profile_stages(stages):
+    """
+    Ghi đè etl_config.profile_stages cho process này (vd. tham số --profile của main), None = theo config
+    """
+    global _profile_override
+    _profile_override = None if stages is None else set(stages)
+
+
+def _profile_stages():
+    if _profile_override is not None:
+        return _profile_override
+    try:
+        value = get_etl_config_from_db("profile_stages") or ""
+    except Exception:
+        # Không đọc được db_control thì coi như tắt profiler, stage vẫn chạy
+        return set()
+    return {s.strip() for s in value.split(",") if s.strip()}
+
+
+class _Profiler:
+    """
+    cProfile (mặc định) hoặc pyinstrument cho 1 stage, ghi file vào profile_path
+    """
+
+    def __init__(self, stage, run_id):
+        self.backend = get_etl_config_from_db("profile_backend") or "cprofile"
+        directory = get_etl_config_from_db("profile_path") or "logs/profile"
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{stage}_{run_id}")
+        self._profiler = None
+        if self.backend == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+                self._profiler = Profiler()
+                self.path += ".html"
+            except ImportError:
+                logger.warning("pyinstrument is not installed, profiling with cProfile")
+                self.backend = "cprofile"
+        if self._profiler is None:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self.path += ".prof"
+
+    def start(self):
+        if self.backend == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if self.backend == "pyinstrument":
+            self._profiler.stop()
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(self._profiler.output_html())
+        else:
+            self._profiler.disable()
+            # Xem bằng: python -m pstats <file> hoặc snakeviz
+            self._profiler.dump_stats(self.path)
+        return self.path
+
+
+class StageMetrics:
+    """
+    Số đo của 1 stage: code của stage cộng thêm rows/bytes qua add(), phần còn lại
+    (thời gian, CPU, round-trip DB, đỉnh RSS) do track_stage tự đo
+    """
+
+    def __init__(self, stage, run, parent=None):
+        self.stage = stage
+        self.run_id = run["run_id"]
+        self.entry_point = run["entry_point"]
+        self.parent = parent
+        self.parent_stage = parent.stage if parent else None
+        self.status = "running"
+        self.started_at = datetime.now()
+        self.finished_at = None
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.db_round_trips = 0
+        self.peak_rss_bytes = None
+        self.profile_path = None
+        self.error = None
+
+    def add(self, rows_in=0, rows_out=0, bytes_read=0, bytes_written=0):
+        self.rows_in += int(rows_in)
+        self.rows_out += int(rows_out)
+        self.bytes_read += int(bytes_read)
+        self.bytes_written += int(bytes_written)
+
+    def as_row(self):
+        return (self.run_id, self.entry_point, self.stage, self.parent_stage, self.status,
+                self.started_at.replace(microsecond=0), self.finished_at.replace(microsecond=0),
+                round(self.wall_time, 4), round(self.cpu_time, 4), self.rows_in, self.rows_out,
+                self.bytes_read, self.bytes_written, self.db_round_trips, self.peak_rss_bytes,
+                self.profile_path, self.error)
+
+    def summary(self):
+        rss = f"{self.peak_rss_bytes / 2 ** 20:.0f}MB" if self.peak_rss_bytes else "n/a"
+        return (f"Stage {self.stage} metrics: {self.status}, wall {self.wall_time:.2f}s, cpu {self.cpu_time:.2f}s, "
+                f"rows {self.rows_in} in / {self.rows_out} out, bytes {self.bytes_read} read / "
+                f"{self.bytes_written} written, {self.db_round_trips} DB round-trips, peak RSS {rss}")
+
+
+def save_stage_metrics(metrics):
+    global _tables_ready
+    with get_connection("control") as conn:
+        if not _tables_ready:
+            ensure_run_metrics_table(conn)
+            _tables_ready = True
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO etl_run_metrics (run_id, entry_point, stage, parent_stage, status, started_at,
+                                         finished_at, wall_time, cpu_time, rows_in, rows_out, bytes_read,
+                                         bytes_written, db_round_trips, peak_rss_bytes, profile_path, error)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, metrics.as_row())
+        conn.commit()
+        cur.close()
+
+
+@contextmanager
+def track_stage(stage):
+    """
+    Đo 1 stage ETL và ghi 1 dòng vào db_control.etl_run_metrics khi xong (kể cả khi lỗi):
+        with track_stage("warehouse") as m:
+            ...
+            m.add(rows_in=len(df), rows_out=inserted)
+    CPU time là của thread chạy stage; stage lồng trong stage khác (cùng thread) được ghi riêng,
+    số đo của stage ngoài bao gồm stage trong (record_stage cộng cho cả 2). Stage có trong
+    etl_config.profile_stages (hoặc "all") được chạy dưới profiler
+    """
+    global _active_count
+    parent = getattr(_active, "stage", None)
+    metrics = StageMetrics(stage, current_run(), parent)
+    with _run_lock:
+        # Stage khác đang chạy song song thì không reset đỉnh RSS của nó
+        if _active_count == 0:
+            _reset_hwm()
+        _active_count += 1
+    profile_stages = _profile_stages()
+    profiler = None
+    if stage in profile_stages or "all" in profile_stages:
+        profiler = _Profiler(stage, metrics.run_id)
+        profiler.start()
+
+    _active.stage = metrics
+    round_trips = get_thread_round_trips()
+    cpu_start = time.thread_time()
+    start = time.perf_counter()
+    try:
+        yield metrics
+        metrics.status = "success"
+    except BaseException as e:
+        metrics.status = "failed"
+        metrics.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        metrics.wall_time = time.perf_counter() - start
+        metrics.cpu_time = time.thread_time() - cpu_start
+        metrics.db_round_trips = get_thread_round_trips() - round_trips
+        metrics.finished_at = datetime.now()
+        metrics.peak_rss_bytes = _read_hwm()
+        _active.stage = parent
+        with _run_lock:
+            _active_count -= 1
+        if profiler is not None:
+            try:
+                metrics.profile_path = profiler.stop()
+                logger.info(f"Stage {stage} profile written to {metrics.profile_path}")
+            except Exception as e:
+                logger.warning(f"Failed to write profile for stage {stage}: {e}")
+        _finished.append(metrics)
+        logger.info(metrics.summary())
+        try:
+            save_stage_metrics(metrics)
+        except Exception as e:
+            # Không lưu được số đo thì không làm hỏng lần chạy ETL
+            logger.warning(f"Failed to save metrics for stage {stage}: {e}")
+
+
+def staged(stage):
+    """
+    Decorator: chạy cả hàm trong track_stage(stage)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track_stage(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_stage():
+    """
+    StageMetrics của stage đang chạy trên thread hiện tại (None nếu không có)
+    """
+    return getattr(_active, "stage", None)
+
+
+def record_stage(rows_in=0, rows_out=0, bytes_read=0, bytes_written=0):
+    """
+    Cộng rows/bytes vào stage đang chạy trên thread hiện tại và các stage ngoài của nó;
+    ngoài stage thì bỏ qua
+    """
+    metrics = current_stage()
+    while metrics is not None:
+        metrics.add(rows_in, rows_out, bytes_read, bytes_written)
+        metrics = metrics.parent
+
+
+def get_run_metrics(run_id=None):
+    """
+    Các stage đã xong trong process (của run_id, mặc định run hiện tại)
+    """
+    run_id = run_id or _run["run_id"]
+    return [m for m in _finished if m.run_id == run_id]
@@ -0,0 +1,132 @@
+# utils/table_parsers.py
+import re
+from html.entities import name2codepoint
+from lxml import etree
+
+# Cột của file raw theo thứ tự ô trong mỗi dòng của bảng
+RAW_COLUMNS = ["Tên phim", "Doanh thu", "Vé", "Suất chiếu"]
+# Cột cuối của file raw do bước extract thêm vào: URL trang chứa dòng đó (-> stg_boxoffice_raw.source)
+RAW_SOURCE_COLUMN = "Nguồn"
+
+
+def _rows_from_cells(cell_rows):
+    rows = []
+    for cols in cell_rows:
+        if len(cols) >= 4:
+            rows.append(dict(zip(RAW_COLUMNS, cols[:4])))
+    return rows
+
+
+class Bs4TableParser:
+    """
+    Bản gốc: BeautifulSoup "html.parser", bảng đầu tiên, các <td> trong "tbody tr"
+    """
+    name = "bs4"
+
+    def parse_rows(self, html):
+        # bs4 chỉ được import khi cần (parser lxml chỉ gọi tới với trang lxml không xử lý giống được)
+        from bs4 import BeautifulSoup
+
+        table = BeautifulSoup(html, "html.parser").find("table")
+        if not table:
+            return None
+        return _rows_from_cells(
+            [td.get_text(strip=True) for td in tr.find_all("td")] for tr in table.select("tbody tr"))
+
+
+# Text node trong ô, bỏ nội dung <script>/<style> giống get_text() của bs4 (comment không phải text())
+CELL_TEXT_XPATH = etree.XPath(".//text()[not(ancestor::script) and not(ancestor::style)]")
+ROW_XPATH = etree.XPath(".//tbody//tr")
+HAS_SCRIPT_XPATH = etree.XPath("boolean(.//script | .//style)")
+# Cấu trúc mà html.parser và libxml2 dựng cây khác nhau -> để bs4 xử lý cho kết quả giống hệt
+TABLE_TAGS = ("table", "tbody", "tr", "td", "th")
+_OPEN_TAG_RE = {tag: re.compile(rf"<{tag}\b", re.IGNORECASE) for tag in TABLE_TAGS}
+_CLOSE_TAG_RE = {tag: re.compile(rf"</{tag}\s*>", re.IGNORECASE) for tag in TABLE_TAGS}
+_UNSUPPORTED_RE = re.compile(r"<!\[CDATA\[|<template\b|\x00", re.IGNORECASE)
+_ENTITY_RE = re.compile(r"&([A-Za-z][A-Za-z0-9]*)(;?)")
+_TEXT_SEGMENT_RE = re.compile(r">([^<]*)")
+
+
+def _has_divergent_entity(html):
+    """
+    Entity mà 2 parser giải mã khác nhau: "&foo;" (html.parser bỏ ";", libxml2 giữ nguyên),
+    "&copy1" (html.parser giữ nguyên, libxml2 vẫn giải mã phần "&copy") và entity ngoài
+    Latin-1 thiếu ";" như "&lang=" (html.parser giải mã, libxml2 giữ nguyên)
+    """
+    for name, semicolon in _ENTITY_RE.findall(html):
+        if name in name2codepoint:
+            if not semicolon and name2codepoint[name] > 255:
+                return True
+            continue
+        if semicolon or any(name.startswith(known) for known in name2codepoint):
+            return True
+    return False
+
+
+def _has_inner_cr(html):
+    # libxml2 đổi \r\n, \r thành \n còn html.parser giữ nguyên: chỉ lệch khi \r nằm giữa 1 đoạn text
+    # (đoạn từ ">" tới "<" tiếp theo luôn chứa trọn đoạn text nên kiểm tra này không bỏ sót)
+    if "\r" not in html:
+        return False
+    return any("\r" in seg.strip() for seg in _TEXT_SEGMENT_RE.findall(html) if "\r" in seg)
+
+
+class LxmlTableParser:
+    """
+    lxml + XPath, cho ra đúng các dòng như Bs4TableParser nhưng nhanh hơn nhiều lần
+
+    html.parser không tự đóng <td>/<tr> thiếu thẻ đóng (ô sau lồng vào ô trước) còn libxml2 thì có;
+    libxml2 còn bỏ CDATA, đổi \\x00 và \\r, giải mã vài entity khác html.parser.
+    Trang có các trường hợp này được chuyển cho fallback (bs4)
+    """
+    name = "lxml"
+
+    def __init__(self, fallback=None):
+        self.fallback = fallback or Bs4TableParser()
+        # etree.HTMLParser thay vì lxml.html: không cần lớp HtmlElement, bỏ được chi phí lookup mỗi node
+        self._parser = etree.HTMLParser(encoding="utf-8")
+
+    def is_supported(self, html):
+        if _UNSUPPORTED_RE.search(html) or _has_inner_cr(html):
+            return False
+        if not all(len(_OPEN_TAG_RE[tag].findall(html)) == len(_CLOSE_TAG_RE[tag].findall(html))
+                   for tag in TABLE_TAGS):
+            return False
+        return "&" not in html or not _has_divergent_entity(html)
+
+    def parse_rows(self, html):
+        if not html or not html.strip():
+            return None
+        if not self.is_supported(html):
+            return self.fallback.parse_rows(html)
+        # Parse từ bytes: lxml không nhận chuỗi unicode có khai báo encoding
+        try:
+            doc = etree.fromstring(html.encode("utf-8"), parser=self._parser)
+        except etree.XMLSyntaxError:
+            doc = None
+        if doc is None:
+            # vd trang chỉ có comment: libxml2 không dựng được cây
+            return self.fallback.parse_rows(html)
+        table = next(doc.iter("table"), None)
+        if table is None:
+            return None
+        if HAS_SCRIPT_XPATH(table):
+            cell_text = CELL_TEXT_XPATH
+        else:
+            # Không có script/style: itertext() (bỏ qua comment) nhanh hơn XPath
+            cell_text = etree._Element.itertext
+        return _rows_from_cells(
+            ["".join(t.strip() for t in cell_text(td)) for td in tr.iter("td")]
+            for tr in ROW_XPATH(table))
+
+
+PARSERS = {
+    "bs4": Bs4TableParser,
+    "lxml": LxmlTableParser,
+}
+
+
+def get_table_parser(name="lxml"):
+    if name not in PARSERS:
+        raise ValueError(f"Unknown HTML parser: {name}")
+    return PARSERS[name]()
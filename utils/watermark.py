@@ -0,0 +1,60 @@
+# utils/watermark.py
+import threading
+from utils.db_pool import get_connection
+
+_table_ready = False
+_table_lock = threading.Lock()
+
+def ensure_etl_watermark_table(conn):
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS etl_watermark (
+            name VARCHAR(100) PRIMARY KEY,
+            value BIGINT,
+            state_path VARCHAR(500),
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
+    cur.close()
+    conn.commit()
+
+def _ensure_table_once(conn):
+    # Chỉ chạy CREATE TABLE IF NOT EXISTS 1 lần mỗi process
+    global _table_ready
+    with _table_lock:
+        if _table_ready:
+            return
+        ensure_etl_watermark_table(conn)
+        _table_ready = True
+
+def get_watermark(name):
+    """
+    Trả về (value, state_path) của high-water mark trong db_control, chưa có thì (None, None)
+    """
+    with get_connection("control") as conn:
+        _ensure_table_once(conn)
+        cur = conn.cursor()
+        cur.execute("SELECT value, state_path FROM etl_watermark WHERE name=%s", (name,))
+        row = cur.fetchone()
+        cur.close()
+    return (row[0], row[1]) if row else (None, None)
+
+def set_watermark(name, value, state_path=None):
+    with get_connection("control") as conn:
+        _ensure_table_once(conn)
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO etl_watermark (name, value, state_path)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE value=VALUES(value), state_path=VALUES(state_path)
+        """, (name, value, state_path))
+        conn.commit()
+        cur.close()
+
+def reset_watermark(name):
+    with get_connection("control") as conn:
+        _ensure_table_once(conn)
+        cur = conn.cursor()
+        cur.execute("DELETE FROM etl_watermark WHERE name=%s", (name,))
+        conn.commit()
+        cur.close()
@@ -0,0 +1,88 @@
+# wsgi.py
+# Chạy dashboard cho môi trường thật (thay cho app.run dev server của app.py):
+#   python wsgi.py [--host 0.0.0.0] [--port 8000] [--threads 16]
+#     -> waitress (chạy được trên cả Windows lẫn Linux), 1 process nhiều thread,
+#        các thread dùng chung pool kết nối datamart và cache response của process
+#   gunicorn -w 4 --threads 8 wsgi:application   (Linux, chạy trong thư mục dự án)
+#     -> mỗi worker import app sau khi fork: pool kết nối + cache riêng từng worker
+#        (utils.db_pool tự bỏ pool thừa hưởng từ process cha). gunicorn tự nạp gunicorn.conf.py:
+#        hook post_worker_init gọi prepare_worker (size pool + warm-up) cho từng worker; chạy với
+#        -c file khác thì không có hook đó: pool theo db_config.json, cache được dựng ở request đầu
+import os
+import sys
+import logging
+import argparse
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from utils.db_connection import load_config
+from utils.db_pool import close_all_pools, ensure_pool_size
+from app import app, warm_up
+
+application = app
+
+# Giá trị mặc định nếu db_config.json không có mục "server"
+DEFAULT_SERVER_HOST = "0.0.0.0"
+DEFAULT_SERVER_PORT = 8000
+DEFAULT_SERVER_THREADS = 16
+DEFAULT_CONNECTION_LIMIT = 200
+DEFAULT_CHANNEL_TIMEOUT = 30
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+logger = logging.getLogger("wsgi")
+
+
+def server_settings():
+    cfg = load_config().get("server", {})
+    return {
+        "host": cfg.get("host", DEFAULT_SERVER_HOST),
+        "port": cfg.get("port", DEFAULT_SERVER_PORT),
+        "threads": cfg.get("threads", DEFAULT_SERVER_THREADS),
+        "connection_limit": cfg.get("connection_limit", DEFAULT_CONNECTION_LIMIT),
+        "channel_timeout": cfg.get("channel_timeout", DEFAULT_CHANNEL_TIMEOUT),
+        "warm_up": cfg.get("warm_up", True),
+    }
+
+
+def prepare_worker(threads, warm):
+    """
+    Chuẩn bị process phục vụ request: pool datamart ít nhất bằng số thread (mỗi thread đang stream
+    NDJSON giữ 1 kết nối) và dựng sẵn cache nếu warm
+    """
+    size = ensure_pool_size("datamart", threads)
+    logger.info(f"Datamart pool size {size} for {threads} threads")
+    if warm:
+        logger.info(f"Warmed {warm_up()} cached responses")
+
+
+def serve(settings):
+    from waitress import serve as waitress_serve
+
+    prepare_worker(settings["threads"], settings["warm_up"])
+    logger.info(f"Serving on http://{settings['host']}:{settings['port']} with {settings['threads']} threads")
+    try:
+        waitress_serve(application, host=settings["host"], port=settings["port"], threads=settings["threads"],
+                       connection_limit=settings["connection_limit"],
+                       channel_timeout=settings["channel_timeout"], ident="boxoffice-dashboard")
+    finally:
+        close_all_pools()
+
+
+def main():
+    # Chỉ cấu hình logging khi chạy bằng "python wsgi.py": import wsgi:application (gunicorn) không đụng
+    # tới root logger, gunicorn tự quản lý log của nó
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    settings = server_settings()
+    parser = argparse.ArgumentParser(description="Serve the dashboard with waitress")
+    parser.add_argument("--host", default=settings["host"])
+    parser.add_argument("--port", type=int, default=settings["port"])
+    parser.add_argument("--threads", type=int, default=settings["threads"])
+    parser.add_argument("--no-warm-up", dest="warm_up", action="store_false", default=settings["warm_up"])
+    args = parser.parse_args()
+    settings.update(vars(args))
+    serve(settings)
+
+
+if __name__ == "__main__":
+    main()